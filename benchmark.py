@@ -0,0 +1,325 @@
+import argparse
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import profiler
+
+# directory of the contelog modules, the measured programs are run from there
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+# relative increase of a time over which a workload is reported as a regression
+THRESHOLD = 0.2
+
+# times shorter than this many seconds are not compared, as they are mostly noise
+MINIMUM_SECONDS = 0.05
+
+def chain(length = 200):
+    """
+    transitive closure of a chain of nodes
+    """
+    facts = ['edge(n%d, n%d).' % (node, node + 1) for node in range(0, length)]
+
+    return get_program(facts, get_closure_rules())
+
+def tree(depth = 6, fanout = 3):
+    """
+    transitive closure of a complete tree, from the root down to the leaves
+    """
+    return get_program(['edge(n%d, n%d).' % (parent, child) for parent, child in get_tree_edges(depth, fanout)], get_closure_rules())
+
+def grid(size = 12):
+    """
+    transitive closure of a square grid with edges to the right and down
+    """
+    facts = []
+
+    for row in range(0, size):
+        for column in range(0, size):
+            if column + 1 < size:
+                facts.append('edge(n%d_%d, n%d_%d).' % (row, column, row, column + 1))
+            if row + 1 < size:
+                facts.append('edge(n%d_%d, n%d_%d).' % (row, column, row + 1, column))
+
+    return get_program(facts, get_closure_rules())
+
+def random_graph(nodes = 300, edges = 600, seed = 1):
+    """
+    transitive closure of a random directed graph
+    """
+    generator = random.Random(seed)
+    facts = ['edge(n%d, n%d).' % (generator.randrange(nodes), generator.randrange(nodes)) for edge in range(0, edges)]
+
+    return get_program(facts, get_closure_rules())
+
+def same_generation(depth = 5, fanout = 3):
+    """
+    same generation over a complete tree: the nodes at the same depth whose ancestors are of the same generation
+    """
+    facts = ['parent(n%d, n%d).' % (parent, child) for parent, child in get_tree_edges(depth, fanout)]
+    rules = ['sg(X, Y) :- parent(P, X), parent(P, Y).',
+             'sg(X, Y) :- parent(P, X), sg(P, Q), parent(Q, Y).']
+
+    return get_program(facts, rules)
+
+def triangles(nodes = 200, edges = 2000, seed = 1):
+    """
+    triangles of a random directed graph
+    """
+    generator = random.Random(seed)
+    facts = ['edge(n%d, n%d).' % (generator.randrange(nodes), generator.randrange(nodes)) for edge in range(0, edges)]
+    rules = ['triangle(X, Y, Z) :- edge(X, Y), edge(Y, Z), edge(Z, X).']
+
+    return get_program(facts, rules)
+
+def contexts(contexts = 200, dimensions = 3, values = 40, edges = 400, seed = 1):
+    """
+    program with many contexts, each holding a few values in each dimension, like c1 = {from : [east], to : [right]}.
+    the reachability of a random graph is derived in each context, from the nodes of its first dimension to the nodes of its last one
+    """
+    generator = random.Random(seed)
+    statements = []
+
+    for context in range(0, contexts):
+        pairs = []
+
+        for dimension in range(0, dimensions):
+            members = sorted(set('n%d' % generator.randrange(values) for member in range(0, 3)))
+            pairs.append('d%d : [%s]' % (dimension, ', '.join(members)))
+
+        statements.append('c%d = {%s}.' % (context, ', '.join(pairs)))
+
+    facts = ['edge(n%d, n%d).' % (generator.randrange(values), generator.randrange(values)) for edge in range(0, edges)]
+    rules = ['reach(X, Y)@C :- edge(X, Y), d0(X)@C.',
+             'reach(X, Y)@C :- reach(X, Z)@C, edge(Z, Y).',
+             'target(X, Y)@C :- reach(X, Y)@C, d%d(Y)@C.' % (dimensions - 1)]
+
+    return get_program(facts, rules, statements)
+
+# workload generators, with the parameters of each size
+workloads = {
+    'chain' : (chain, {'small' : {'length' : 100}, 'medium' : {'length' : 400}, 'large' : {'length' : 1000}}),
+    'tree' : (tree, {'small' : {'depth' : 5, 'fanout' : 3}, 'medium' : {'depth' : 7, 'fanout' : 3}, 'large' : {'depth' : 8, 'fanout' : 3}}),
+    'grid' : (grid, {'small' : {'size' : 8}, 'medium' : {'size' : 16}, 'large' : {'size' : 24}}),
+    'random_graph' : (random_graph, {'small' : {'nodes' : 100, 'edges' : 200}, 'medium' : {'nodes' : 400, 'edges' : 800}, 'large' : {'nodes' : 1000, 'edges' : 2000}}),
+    'same_generation' : (same_generation, {'small' : {'depth' : 4, 'fanout' : 3}, 'medium' : {'depth' : 6, 'fanout' : 3}, 'large' : {'depth' : 7, 'fanout' : 3}}),
+    'triangles' : (triangles, {'small' : {'nodes' : 100, 'edges' : 1000}, 'medium' : {'nodes' : 400, 'edges' : 8000}, 'large' : {'nodes' : 1000, 'edges' : 40000}}),
+    'contexts' : (contexts, {'small' : {'contexts' : 50, 'dimensions' : 3, 'values' : 30}, 'medium' : {'contexts' : 500, 'dimensions' : 4, 'values' : 60}, 'large' : {'contexts' : 2000, 'dimensions' : 5, 'values' : 100, 'edges' : 1000}})
+}
+
+def get_closure_rules():
+    return ['path(X, Y) :- edge(X, Y).', 'path(X, Y) :- path(X, Z), edge(Z, Y).']
+
+def get_tree_edges(depth, fanout):
+    """
+    returns the (parent, child) edges of a complete tree, its nodes numbered level by level from the root 0
+    """
+    edges = []
+    level = [0]
+    count = 1
+
+    for generation in range(1, depth):
+        children = []
+
+        for parent in level:
+            for child in range(count, count + fanout):
+                edges.append((parent, child))
+                children.append(child)
+            count += fanout
+
+        level = children
+
+    return edges
+
+def get_program(facts, rules, contexts = []):
+    """
+    returns the text of a program with the sections of the programs of Test Cases
+    """
+    return '\n'.join(['%Contexts'] + contexts + ['', '%Facts'] + facts + ['', '%Rules'] + rules) + '\n'
+
+def generate(workload, size = 'small', parameters = {}):
+    """
+    returns the parameters and the program text of a workload of the given size, with some of its parameters replaced
+    """
+    generator, sizes = workloads[workload]
+    parameters = dict(sizes[size], **parameters)
+
+    return parameters, generator(**parameters)
+
+class IterationLog(profiler.Tracer):
+
+    def __init__(self):
+        """
+        tracer of the bottom-up evaluation, keeping the time and the number of new facts of each iteration of each stratum
+        """
+        self.iterations = []
+
+    def record_iteration(self, relations, iteration, seconds, new_facts):
+        self.iterations.append({'relations' : list(relations), 'iteration' : iteration, 'seconds' : seconds, 'new_facts' : new_facts})
+
+    def __repr__(self):
+        return '%r' % (self.__dict__)
+
+def measure(file_path, options = []):
+    """
+    returns the measures of a single run of a program file in this process: parse, load and evaluation times in seconds,
+    the iterations of the evaluation, the peak memory in kilobytes and the number of facts of each IDB relation
+    """
+    import contelog
+    import engine
+
+    arguments = contelog.get_argument_parser().parse_args([file_path, '--no-cache'] + options)
+    log = IterationLog()
+
+    start = time.perf_counter()
+    program = contelog.parse_file(file_path)
+    parsed = time.perf_counter()
+
+    program_engine = engine.Engine(program, os.path.dirname(file_path), **dict(contelog.get_engine_options(arguments), tracer = log))
+    loaded = time.perf_counter()
+
+    IDB = program_engine.evaluate()
+    evaluated = time.perf_counter()
+
+    return {'parse_seconds' : parsed - start,
+            'load_seconds' : loaded - parsed,
+            'evaluation_seconds' : evaluated - loaded,
+            'iterations' : log.iterations,
+            'peak_memory_kb' : get_peak_memory_kb(),
+            'derived_facts' : dict((relation, len(data_frame)) for relation, data_frame in sorted(IDB.items())),
+            'total_derived_facts' : sum(len(data_frame) for data_frame in IDB.values())}
+
+def get_peak_memory_kb():
+    """
+    returns the peak resident memory of this process in kilobytes, which getrusage gives in bytes on macOS and in kilobytes on Linux
+    """
+    peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    if sys.platform == 'darwin':
+        return peak_memory // 1024
+
+    return peak_memory
+
+def run(workload_names, size, runs, options):
+    """
+    returns the results of the workloads, each measured in fresh interpreters, keeping the run with the median evaluation time
+    """
+    results = {'size' : size, 'options' : options, 'python' : sys.version.split()[0], 'workloads' : {}}
+
+    with tempfile.TemporaryDirectory() as directory:
+        for workload in workload_names:
+            parameters, text = generate(workload, size)
+            file_path = os.path.join(directory, workload + '.clg')
+
+            with open(file_path, 'w') as file:
+                file.write(text)
+
+            measures = []
+
+            for run in range(0, runs):
+                process = subprocess.run([sys.executable, '-W', 'ignore', os.path.abspath(__file__), 'measure', file_path] + ['--option=' + option for option in options], cwd = DIRECTORY, stdout = subprocess.PIPE, check = True)
+                measures.append(json.loads(process.stdout))
+
+            measures.sort(key = lambda measure: measure['evaluation_seconds'])
+            result = dict(measures[len(measures) // 2], parameters = parameters)
+
+            if runs > 1:
+                for key in ['parse_seconds', 'load_seconds', 'evaluation_seconds']:
+                    result[key] = statistics.median(measure[key] for measure in measures)
+
+            results['workloads'][workload] = result
+            print('%-16s parse %8.3f s  load %8.3f s  evaluation %8.3f s  %4d iterations  %8d kB  %10d facts' % (workload, result['parse_seconds'], result['load_seconds'], result['evaluation_seconds'], len(result['iterations']), result['peak_memory_kb'], result['total_derived_facts']), file = sys.stderr)
+
+    return results
+
+def compare(baseline, current, threshold = THRESHOLD):
+    """
+    returns the regressions of the current results against the baseline results: the times over the baseline by more than the threshold,
+    and the workloads deriving other facts, as a list of messages
+    """
+    regressions = []
+
+    for workload, result in sorted(current['workloads'].items()):
+        if workload not in baseline['workloads']:
+            continue
+
+        base = baseline['workloads'][workload]
+
+        if base['derived_facts'] != result['derived_facts']:
+            regressions.append('%s: derived facts %r, baseline %r' % (workload, result['derived_facts'], base['derived_facts']))
+
+        for key in ['parse_seconds', 'load_seconds', 'evaluation_seconds']:
+            change = (result[key] - base[key]) / base[key] if base[key] > 0 else 0.0
+            print('%-16s %-20s %8.3f s -> %8.3f s  %+7.1f%%' % (workload, key, base[key], result[key], change * 100))
+
+            if max(base[key], result[key]) >= MINIMUM_SECONDS and change > threshold:
+                regressions.append('%s: %s %.3f s, baseline %.3f s' % (workload, key, result[key], base[key]))
+
+        memory_change = (result['peak_memory_kb'] - base['peak_memory_kb']) / base['peak_memory_kb']
+        print('%-16s %-20s %8d kB -> %8d kB %+7.1f%%' % (workload, 'peak_memory_kb', base['peak_memory_kb'], result['peak_memory_kb'], memory_change * 100))
+
+        if memory_change > threshold:
+            regressions.append('%s: peak memory %d kB, baseline %d kB' % (workload, result['peak_memory_kb'], base['peak_memory_kb']))
+
+    return regressions
+
+def main(arguments = None):
+
+    parser = argparse.ArgumentParser(description = 'Benchmarks contelog on synthetic Datalog workloads')
+    commands = parser.add_subparsers(dest = 'command', required = True)
+
+    run_parser = commands.add_parser('run', help = 'measure the workloads and write the results as JSON')
+    run_parser.add_argument('--workloads', default = ','.join(workloads.keys()), help = 'comma separated workloads among ' + ', '.join(workloads.keys()))
+    run_parser.add_argument('--size', choices = ['small', 'medium', 'large'], default = 'small', help = 'size of the workloads')
+    run_parser.add_argument('--runs', type = int, default = 1, help = 'number of runs of each workload, the median times are reported')
+    run_parser.add_argument('--option', action = 'append', default = [], help = 'contelog option for the runs, like --option=--join=pandas, may be repeated')
+    run_parser.add_argument('--output', help = 'file to write the results to, standard output by default')
+
+    compare_parser = commands.add_parser('compare', help = 'compare two results files, exiting with 1 on regressions')
+    compare_parser.add_argument('baseline', help = 'results file of the baseline run')
+    compare_parser.add_argument('current', help = 'results file of the current run')
+    compare_parser.add_argument('--threshold', type = float, default = THRESHOLD, help = 'relative increase of a time or of the peak memory reported as a regression')
+
+    generate_parser = commands.add_parser('generate', help = 'write the program of a workload to standard output')
+    generate_parser.add_argument('workload', choices = list(workloads.keys()))
+    generate_parser.add_argument('--size', choices = ['small', 'medium', 'large'], default = 'small', help = 'size of the workload')
+
+    measure_parser = commands.add_parser('measure', help = 'measure a single run of a program file, as JSON')
+    measure_parser.add_argument('file', help = 'Contelog program file')
+    measure_parser.add_argument('--option', action = 'append', default = [], help = 'contelog option for the run')
+
+    args = parser.parse_args(arguments)
+
+    if args.command == 'run':
+        results = json.dumps(run(args.workloads.split(','), args.size, args.runs, args.option), indent = 2)
+
+        if args.output is None:
+            print(results)
+        else:
+            with open(args.output, 'w') as file:
+                file.write(results + '\n')
+
+    elif args.command == 'compare':
+        with open(args.baseline) as baseline_file, open(args.current) as current_file:
+            regressions = compare(json.load(baseline_file), json.load(current_file), args.threshold)
+
+        for regression in regressions:
+            print('Regression:', regression)
+
+        return 1 if len(regressions) else 0
+
+    elif args.command == 'generate':
+        sys.stdout.write(generate(args.workload, args.size)[1])
+
+    else:
+        print(json.dumps(measure(os.path.abspath(args.file), args.option)))
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,197 @@
+import hashlib
+import os
+import numpy as np
+import pandas as pd
+import strata
+from factsets import get_fingerprints
+from symbols import symbol_table, SYMBOL_DTYPE
+from elements import is_upper_case
+
+# version of the layout of the cache files, part of every key so that files of another layout are never read
+CACHE_VERSION = '2'
+
+class EvaluationCache(object):
+
+    def __init__(self, directory):
+        """
+        on-disk cache of the IDB relations derived by each stratum of a program
+
+        the key of a stratum is a hash of its normalized rules, of the fingerprints of the EDB, CDB and IDB facts it reads,
+        and of the keys of the strata it reads from, so that a stratum is evaluated again only when something it depends on changed
+        the relations of a stratum are stored in a compressed numpy file, with a column of codes into the symbols of the file for each column
+        """
+        self.directory = directory
+        self.strata = []
+
+        # key of the stratum deriving each IDB relation
+        self.keys = {}
+
+    def prepare(self, rules, EDB, IDB, CDB):
+        """
+        computes the key of each stratum of the rules, from the relations of EDB, CDB and the facts IDB relations start with
+        """
+        self.strata = strata.get_strata(rules)
+        fingerprints = {}
+
+        for DB in [EDB, CDB, IDB]:
+            for relation in DB.keys():
+                fingerprints[relation] = get_fingerprint(DB[relation])
+
+        # strata are in topological order, so the keys of the strata a stratum reads from are known before its own key
+        for stratum in self.strata:
+            digest = hashlib.sha256(('version ' + CACHE_VERSION + '\n').encode())
+
+            for text in sorted(get_rule_text(rule) for rule in stratum.rules):
+                digest.update(('rule ' + text + '\n').encode())
+
+            for relation in stratum.relations:
+                digest.update(('facts ' + relation + ' ' + fingerprints.get(relation, '') + '\n').encode())
+
+            body_relations = set(predicate.name for rule in stratum.rules for predicate in rule.body if predicate.type != 'constraint')
+
+            for relation in sorted(body_relations - set(stratum.relations)):
+                digest.update(('reads ' + relation + ' ' + self.keys.get(relation, fingerprints.get(relation, '')) + '\n').encode())
+
+            key = digest.hexdigest()
+
+            for relation in stratum.relations:
+                self.keys[relation] = key
+
+    def load_all(self, IDB, IDB_relations):
+        """
+        returns a dictionary with the data frames of all the IDB relations if every stratum is in the cache, None otherwise
+        IDB relations which are not derived by rules keep the facts they start with
+        """
+        results = dict((relation, IDB[relation]) for relation in IDB_relations)
+
+        for stratum in self.strata:
+            stratum_IDB = self.load(stratum)
+
+            if stratum_IDB is None:
+                return None
+
+            results.update(stratum_IDB)
+
+        return results
+
+    def load(self, stratum):
+        """
+        returns a dictionary with the data frames of the relations of a stratum from the cache, or None if the stratum is not in the cache
+        """
+        path = self.get_path(stratum)
+
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with np.load(path, allow_pickle = False) as data:
+
+                # the codes in the file are positions in the symbols of the file, mapped to the ids of the symbols in this run
+                ids = symbol_table.intern_array(get_symbols(data['symbols'], data['kinds']))
+                stratum_IDB = {}
+
+                for index, relation in enumerate(data['relations']):
+                    arity = int(data['arities'][index])
+                    columns = dict((column, ids[data[str(index) + '.' + str(column)]]) for column in range(0, arity))
+                    stratum_IDB[str(relation)] = pd.DataFrame(columns, index = None, columns = range(0, arity)).astype(SYMBOL_DTYPE)
+
+        except (OSError, KeyError, ValueError) as error:
+            print('Could not read the cache file ' + path + ':', error)
+            return None
+
+        if sorted(stratum_IDB.keys()) != sorted(stratum.relations):
+            return None
+
+        return stratum_IDB
+
+    def store(self, stratum, stratum_IDB):
+        """
+        writes the data frames of the relations of a stratum to the cache
+        """
+        path = self.get_path(stratum)
+        values = [stratum_IDB[relation].values.astype(SYMBOL_DTYPE).ravel() for relation in stratum.relations]
+        symbol_ids = np.unique(np.concatenate(values)) if len(values) else np.empty(0, dtype = SYMBOL_DTYPE)
+
+        symbols = symbol_table.decode_array(symbol_ids)
+        data = {'symbols' : symbols.astype(str), 'kinds' : get_kinds(symbols), 'relations' : np.array(stratum.relations, dtype = str), 'arities' : np.array([len(stratum_IDB[relation].columns) for relation in stratum.relations])}
+
+        # each column is stored as the positions of its symbols in the symbols of the file, in the smallest integer type holding them
+        code_type = np.min_scalar_type(max(len(symbol_ids) - 1, 0))
+
+        for index, relation in enumerate(stratum.relations):
+            for column in range(0, len(stratum_IDB[relation].columns)):
+                data[str(index) + '.' + str(column)] = np.searchsorted(symbol_ids, stratum_IDB[relation].iloc[:, column].values).astype(code_type)
+
+        # write to a temporary file first, so that an interrupted run never leaves a partial file under the key
+        try:
+            os.makedirs(self.directory, exist_ok = True)
+            temporary_path = path + '.tmp'
+
+            with open(temporary_path, 'wb') as file:
+                np.savez_compressed(file, **data)
+
+            os.replace(temporary_path, path)
+
+        except OSError as error:
+            print('Could not write the cache file ' + path + ':', error)
+
+    def get_path(self, stratum):
+        return os.path.join(self.directory, self.keys[stratum.relations[0]] + '.npz')
+
+    def __repr__(self):
+        return '%r' % (self.__dict__)
+
+def get_fingerprint(data_frame):
+    """
+    returns a hash of the set of records of a data frame of symbol ids, which does not depend on the order of the records or the ids of the symbols
+    only the distinct symbols are decoded: the records are hashed as int64 codes, the ranks of their symbols in the sorted texts of the distinct symbols,
+    which are hashed with the records
+    """
+    values = data_frame.values.astype(SYMBOL_DTYPE)
+    positions, symbol_ids = pd.factorize(values.ravel())
+    symbols = symbol_table.decode_array(symbol_ids)
+    texts = np.array([str(kind) + ' ' + str(symbol) for kind, symbol in zip(get_kinds(symbols).tolist(), symbols.tolist())], dtype = str)
+
+    order = np.argsort(texts, kind = 'stable')
+    ranks = np.empty(len(order), dtype = SYMBOL_DTYPE)
+    ranks[order] = np.arange(0, len(order))
+    row_hashes = np.unique(get_fingerprints(ranks[positions].reshape(values.shape)))
+
+    digest = hashlib.sha256(str(len(data_frame.columns)).encode())
+    digest.update('\n'.join(texts[order].tolist()).encode())
+    digest.update(row_hashes.tobytes())
+
+    return digest.hexdigest()
+
+def get_kinds(symbols):
+    """
+    returns the kind of each symbol of an object array, 0 for a string, 1 for an int and 2 for a float, as the symbols are written as text
+    """
+    return np.array([2 if isinstance(symbol, float) else 0 if isinstance(symbol, str) else 1 for symbol in symbols.tolist()], dtype = np.int8)
+
+def get_symbols(texts, kinds):
+    """
+    returns an object array of the symbols written as texts, with their kinds
+    """
+    return np.array([text if kind == 0 else int(text) if kind == 1 else float(text) for text, kind in zip(texts.tolist(), kinds.tolist())], dtype = object)
+
+def get_rule_text(rule):
+    """
+    returns the text of a rule with its variables renamed in the order they first appear, so that rules differing only
+    in the names of their variables have the same text
+    """
+    names = {}
+
+    def rename(term):
+        if not is_upper_case(term):
+            return str(term)
+        return names.setdefault(term, 'V' + str(len(names)))
+
+    def get_text(predicate):
+        if predicate.type == 'constraint':
+            return rename(predicate.term_x) + ' ' + predicate.theta + ' ' + rename(predicate.term_y)
+        return predicate.name + '(' + ', '.join(rename(argument) for argument in predicate.arguments) + ')@' + rename(predicate.context)
+
+    head = get_text(rule.head)
+
+    return head + ' :- ' + ', '.join(get_text(predicate) for predicate in rule.body)
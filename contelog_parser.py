@@ -1,7 +1,8 @@
+import os
 import ply.yacc as yacc
 
 from tokenizer import tokens
-from elements import Fact, Rule, Query, Predicate, Constraint, Context
+from elements import Fact, Rule, Query, Predicate, Constraint, Context, Input
 
 def p_program(p):
     """
@@ -52,7 +53,8 @@ def p_contexts_list(p):
     if len(p) == 2:
         p[0] = [p[1]]
     elif len(p) == 3:
-        p[0] = p[1] + [p[2]]
+        p[1].append(p[2])
+        p[0] = p[1]
 
 def p_context(p):
     """
@@ -68,7 +70,8 @@ def p_pairs_list(p):
     if len(p) == 2:
         p[0] = [p[1]]
     elif len(p) == 4:
-        p[0] = p[1] + [p[3]]
+        p[1].append(p[3])
+        p[0] = p[1]
 
 def p_pair(p):
     """
@@ -84,7 +87,8 @@ def p_elements_list(p):
     if len(p) == 2:
         p[0] = [p[1]]
     elif len(p) == 4:
-        p[0] = p[1] + [p[3]]
+        p[1].append(p[3])
+        p[0] = p[1]
 
 def p_element(p):
     """
@@ -104,11 +108,12 @@ def p_attributes_list(p):
     if len(p) == 2:
         p[0] = [p[1]]
     elif len(p) == 4:
-        p[0] = p[1] + [p[3]]
+        p[1].append(p[3])
+        p[0] = p[1]
 
 def p_attribute(p):
     """
-    attribute : LOWER_NAME
+    attribute : constant
     """
     p[0] = p[1]
 
@@ -120,7 +125,10 @@ def p_facts_list(p):
     if len(p) == 2:
         p[0] = [p[1]]
     elif len(p) == 3:
-        p[0] = p[1] + [p[2]]
+
+        # lists are extended in place, copying them on every reduction would make long lists quadratic to build
+        p[1].append(p[2])
+        p[0] = p[1]
 
 def p_fact(p):
     """
@@ -128,6 +136,14 @@ def p_fact(p):
     """
     p[0] = Fact(p[1])
 
+def p_input(p):
+    """
+    fact : INPUT LOWER_NAME STRING
+         | INPUT LOWER_NAME STRING PERIOD
+    """
+    # input declarations are accepted wherever facts are, the quotes are stripped from the file path
+    p[0] = Input(p[2], p[3][1 : -1])
+
 def p_rules_list(p):
     """
     rules : rules rule
@@ -136,7 +152,8 @@ def p_rules_list(p):
     if len(p) == 2:
         p[0] = [p[1]]
     elif len(p) == 3:
-        p[0] = p[1] + [p[2]]
+        p[1].append(p[2])
+        p[0] = p[1]
 
 def p_rule(p):
     """
@@ -152,7 +169,8 @@ def p_queries_list(p):
     if len(p) == 2:
         p[0] = [p[1]]
     elif len(p) == 3:
-        p[0] = p[1] + [p[2]]
+        p[1].append(p[2])
+        p[0] = p[1]
 
 def p_query(p):
     """
@@ -176,13 +194,15 @@ def p_predicate_list_normal(p):
     """
     predicate_list : predicate_list COMMA predicate
     """
-    p[0] = p[1] + [p[3]]
+    p[1].append(p[3])
+    p[0] = p[1]
 
 def p_predicate_list_built_in(p):
     """
     predicate_list : predicate_list COMMA constraint
     """
-    p[0] = p[1] + [p[3]]
+    p[1].append(p[3])
+    p[0] = p[1]
 
 def p_predicate_list_normal_last(p):
     """
@@ -210,9 +230,22 @@ def p_context_name(p):
     """
     context_name : LOWER_NAME
                  | UPPER_NAME
+                 | context_members
     """
     p[0] = p[1]
 
+def p_context_members(p):
+    """
+    context_members : context_members '+' LOWER_NAME
+                    | LOWER_NAME '+' LOWER_NAME
+    """
+    # the member names of a composite context like c1+c2, named canonically by the predicate
+    if isinstance(p[1], list):
+        p[1].append(p[3])
+        p[0] = p[1]
+    else:
+        p[0] = [p[1], p[3]]
+
 def p_term_list(p):
     """
     term_list : term_list COMMA term
@@ -221,7 +254,8 @@ def p_term_list(p):
     if len(p) == 2:
         p[0] = [p[1]]
     elif len(p) == 4:
-        p[0] = p[1] + [p[3]]
+        p[1].append(p[3])
+        p[0] = p[1]
 
 def p_term_variable(p):
     """
@@ -231,8 +265,17 @@ def p_term_variable(p):
 
 def p_term_constant(p):
     """
-    term : LOWER_NAME
+    term : constant
+    """
+    p[0] = p[1]
+
+def p_constant(p):
+    """
+    constant : LOWER_NAME
+             | INTEGER
+             | FLOAT
     """
+    # numbers are the ints and floats of their tokens, the other constants strings
     p[0] = p[1]
       
 def p_constraint_variable(p):
@@ -243,7 +286,7 @@ def p_constraint_variable(p):
 
 def p_constraint_constant(p):
     """
-    constraint : UPPER_NAME THETA LOWER_NAME
+    constraint : UPPER_NAME THETA constant
     """
     p[0] = Constraint(p[1], p[2], p[3])
 
@@ -253,8 +296,9 @@ def p_error(p):
     error_list.append("Syntax error in input! " + str(p) + "\n")
     print("Syntax error in input! ", p)
 
-out = open('p.res', 'w')
-parser = yacc.yacc(start='program', write_tables = False, debug = False)
+# the LALR tables are generated once into contelog_parsetab.py next to this file and read from there on later imports,
+# they are generated again whenever the grammar changes
+parser = yacc.yacc(start = 'program', tabmodule = 'contelog_parsetab', outputdir = os.path.dirname(os.path.abspath(__file__)), debug = False)
 
 if __name__ == '__main__':
     parser = yacc.yacc(start = 'program')
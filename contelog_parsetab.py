@@ -0,0 +1,105 @@
+
+# contelog_parsetab.py
+# This file is automatically generated. Do not edit.
+# pylint: disable=W,C,R
+_tabversion = '3.10'
+
+_lr_method = 'LALR'
+
+_lr_signature = "programANNOTATION CLOSE_CURLY CLOSE_ROUND CLOSE_SQUARE COLON COMMA FLOAT IMPLY INPUT INTEGER LOWER_NAME OPEN_CURLY OPEN_ROUND OPEN_SQUARE PERIOD QUESTION_MARK STRING THETA UPPER_NAME\n    program : contexts facts rules queries\n            | contexts facts queries rules\n            | contexts rules facts queries\n            | contexts rules queries facts\n            | contexts queries facts rules\n            | contexts queries rules facts\n            | contexts facts rules\n            | contexts rules facts\n            | contexts rules queries\n            | contexts queries rules\n            | facts rules queries\n            | facts queries rules\n            | rules facts queries\n            | rules queries facts\n            | queries facts rules\n            | queries rules facts\n            | contexts facts\n            | contexts rules\n            | contexts queries\n            | facts rules\n            | rules facts            \n            | facts queries\n            | queries facts    \t\t\n            | rules queries\n    \t\t| queries rules    \t\t\n            | contexts\n            | facts\n    \t\t| rules\n    \t\t| queries\n    \n    contexts : contexts context\n             | context\n    \n    context : LOWER_NAME THETA OPEN_CURLY pairs CLOSE_CURLY PERIOD\n    \n    pairs : pairs COMMA pair\n          | pair\n    \n    pair : LOWER_NAME COLON OPEN_SQUARE elements CLOSE_SQUARE\n    \n    elements : elements COMMA element\n             | element\n    \n    element : attribute\n            | OPEN_SQUARE attributes CLOSE_SQUARE\n    \n    attributes : attributes COMMA attribute\n               | attribute\n    \n    attribute : constant\n    \n    facts : facts fact\n          | fact\n    \n    fact : predicate PERIOD\n    \n    fact : INPUT LOWER_NAME STRING\n         | INPUT LOWER_NAME STRING PERIOD\n    \n    rules : rules rule\n          | rule\n    \n    rule : head IMPLY body PERIOD\n    \n    queries : queries query\n            | query\n    \n    query : predicate_list QUESTION_MARK\n    \n    head : predicate\n    \n    body : predicate_list\n    \n    predicate_list : predicate_list COMMA predicate\n    \n    predicate_list : predicate_list COMMA constraint\n    \n    predicate_list : predicate\n    \n    predicate_list : constraint\n    \n    predicate : LOWER_NAME OPEN_ROUND term_list CLOSE_ROUND\n              | LOWER_NAME OPEN_ROUND term_list CLOSE_ROUND ANNOTATION context_name\n    \n    context_name : LOWER_NAME\n                 | UPPER_NAME\n                 | context_members\n    \n    context_members : context_members '+' LOWER_NAME\n                    | LOWER_NAME '+' LOWER_NAME\n    \n    term_list : term_list COMMA term\n              | term\n    \n    term : UPPER_NAME\n    \n    term : constant\n    \n    constant : LOWER_NAME\n             | INTEGER\n             | FLOAT\n    \n    constraint : UPPER_NAME THETA UPPER_NAME\n    \n    constraint : UPPER_NAME THETA constant\n    "
+    
+_lr_action_items = {'LOWER_NAME':([0,2,3,4,5,6,7,8,9,12,17,18,19,20,21,22,23,25,26,27,28,29,30,33,34,36,37,38,39,40,41,42,43,44,45,46,48,50,52,53,55,56,64,72,73,74,75,76,77,84,85,86,89,90,92,93,99,104,105,109,113,],[10,10,24,24,24,-31,-44,-49,-52,35,24,24,24,-30,24,24,-43,24,24,-48,24,24,-51,57,-45,24,-53,24,57,24,24,24,24,24,24,24,24,24,24,24,24,80,-46,24,24,24,24,24,24,57,-47,-50,80,95,57,-32,57,110,111,57,57,]),'INPUT':([0,2,3,4,5,6,7,8,9,17,18,19,20,23,25,26,27,28,29,30,34,37,42,43,44,45,52,55,64,75,77,85,86,93,],[12,12,12,12,12,-31,-44,-49,-52,12,12,12,-30,-43,12,12,-48,12,12,-51,-45,-53,12,12,12,12,12,12,-46,12,12,-47,-50,-32,]),'UPPER_NAME':([0,2,3,4,5,6,7,8,9,17,18,19,20,21,22,23,25,26,27,30,33,34,36,37,38,39,40,41,42,43,46,50,64,72,74,84,85,86,90,93,],[16,16,16,16,16,-31,-44,-49,-52,16,16,16,-30,16,16,-43,16,16,-48,-51,60,-45,16,-53,16,70,16,16,16,16,16,16,-46,16,16,60,-47,-50,97,-32,]),'$end':([1,2,3,4,5,6,7,8,9,17,18,19,20,21,22,23,25,26,27,28,29,30,34,37,40,42,43,45,46,48,50,52,53,55,64,72,73,74,75,76,77,85,86,93,],[0,-26,-27,-28,-29,-31,-44,-49,-52,-17,-18,-19,-30,-20,-22,-43,-21,-24,-48,-23,-25,-51,-45,-53,-7,-8,-9,-10,-11,-12,-13,-14,-15,-16,-46,-1,-2,-3,-4,-5,-6,-47,-50,-32,]),'THETA':([10,16,],[32,39,]),'OPEN_ROUND':([10,24,],[33,33,]),'PERIOD':([11,15,31,51,54,57,62,63,64,65,66,67,68,69,70,71,79,83,88,95,96,97,98,110,111,],[34,-59,34,34,34,-71,-72,-73,85,86,-55,-58,-56,-57,-74,-75,34,-60,93,-62,-61,-63,-64,-66,-65,]),'IMPLY':([11,13,31,47,49,54,78,83,95,96,97,98,110,111,],[-54,36,-54,-54,-54,-54,-54,-60,-62,-61,-63,-64,-66,-65,]),'QUESTION_MARK':([11,14,15,31,47,49,51,57,62,63,67,68,69,70,71,83,95,96,97,98,110,111,],[-58,37,-59,-58,-58,-58,-58,-71,-72,-73,-58,-56,-57,-74,-75,-60,-62,-61,-63,-64,-66,-65,]),'COMMA':([11,14,15,31,47,49,51,57,58,59,60,61,62,63,66,67,68,69,70,71,81,82,83,91,94,95,96,97,98,100,101,102,103,106,107,108,110,111,112,114,115,],[-58,38,-59,-58,-58,-58,-58,-71,84,-68,-69,-70,-72,-73,38,-58,-56,-57,-74,-75,89,-34,-60,-67,-33,-62,-61,-63,-64,109,-37,-38,-42,113,-41,-35,-66,-65,-39,-36,-40,]),'OPEN_CURLY':([32,],[56,]),'INTEGER':([33,39,84,92,99,109,113,],[62,62,62,62,62,62,62,]),'FLOAT':([33,39,84,92,99,109,113,],[63,63,63,63,63,63,63,]),'STRING':([35,],[64,]),'CLOSE_ROUND':([57,58,59,60,61,62,63,91,],[-71,83,-68,-69,-70,-72,-73,-67,]),'CLOSE_SQUARE':([57,62,63,100,101,102,103,106,107,112,114,115,],[-71,-72,-73,108,-37,-38,-42,112,-41,-39,-36,-40,]),'COLON':([80,],[87,]),'CLOSE_CURLY':([81,82,94,108,],[88,-34,-33,-35,]),'ANNOTATION':([83,],[90,]),'OPEN_SQUARE':([87,92,109,],[92,99,99,]),'+':([95,98,110,111,],[104,105,-66,-65,]),}
+
+_lr_action = {}
+for _k, _v in _lr_action_items.items():
+   for _x,_y in zip(_v[0],_v[1]):
+      if not _x in _lr_action:  _lr_action[_x] = {}
+      _lr_action[_x][_k] = _y
+del _lr_action_items
+
+_lr_goto_items = {'program':([0,],[1,]),'contexts':([0,],[2,]),'facts':([0,2,4,5,18,19,26,29,43,45,],[3,17,25,28,42,44,52,55,75,77,]),'rules':([0,2,3,5,17,19,22,28,41,44,],[4,18,21,29,40,45,48,53,73,76,]),'queries':([0,2,3,4,17,18,21,25,40,42,],[5,19,22,26,41,43,46,50,72,74,]),'context':([0,2,],[6,20,]),'fact':([0,2,3,4,5,17,18,19,25,26,28,29,42,43,44,45,52,55,75,77,],[7,7,23,7,7,23,7,7,23,7,23,7,23,7,23,7,23,23,23,23,]),'rule':([0,2,3,4,5,17,18,19,21,22,28,29,40,41,44,45,48,53,73,76,],[8,8,8,27,8,8,27,8,27,8,8,27,27,8,8,27,27,27,27,27,]),'query':([0,2,3,4,5,17,18,19,21,22,25,26,40,41,42,43,46,50,72,74,],[9,9,9,9,30,9,9,30,9,30,9,30,9,30,9,30,30,30,30,30,]),'predicate':([0,2,3,4,5,17,18,19,21,22,25,26,28,29,36,38,40,41,42,43,44,45,46,48,50,52,53,55,72,73,74,75,76,77,],[11,11,11,11,31,11,11,31,47,49,51,51,54,54,67,68,47,49,51,51,54,54,67,78,67,79,78,79,67,78,67,79,78,79,]),'head':([0,2,3,4,5,17,18,19,21,22,28,29,40,41,44,45,48,53,73,76,],[13,13,13,13,13,13,13,13,13,13,13,13,13,13,13,13,13,13,13,13,]),'predicate_list':([0,2,3,4,5,17,18,19,21,22,25,26,36,40,41,42,43,46,50,72,74,],[14,14,14,14,14,14,14,14,14,14,14,14,66,14,14,14,14,14,14,14,14,]),'constraint':([0,2,3,4,5,17,18,19,21,22,25,26,36,38,40,41,42,43,46,50,72,74,],[15,15,15,15,15,15,15,15,15,15,15,15,15,69,15,15,15,15,15,15,15,15,]),'term_list':([33,],[58,]),'term':([33,84,],[59,91,]),'constant':([33,39,84,92,99,109,113,],[61,71,61,103,103,103,103,]),'body':([36,],[65,]),'pairs':([56,],[81,]),'pair':([56,89,],[82,94,]),'context_name':([90,],[96,]),'context_members':([90,],[98,]),'elements':([92,],[100,]),'element':([92,109,],[101,114,]),'attribute':([92,99,109,113,],[102,107,102,115,]),'attributes':([99,],[106,]),}
+
+_lr_goto = {}
+for _k, _v in _lr_goto_items.items():
+   for _x, _y in zip(_v[0], _v[1]):
+       if not _x in _lr_goto: _lr_goto[_x] = {}
+       _lr_goto[_x][_k] = _y
+del _lr_goto_items
+_lr_productions = [
+  ("S' -> program","S'",1,None,None,None),
+  ('program -> contexts facts rules queries','program',4,'p_program','contelog_parser.py',9),
+  ('program -> contexts facts queries rules','program',4,'p_program','contelog_parser.py',10),
+  ('program -> contexts rules facts queries','program',4,'p_program','contelog_parser.py',11),
+  ('program -> contexts rules queries facts','program',4,'p_program','contelog_parser.py',12),
+  ('program -> contexts queries facts rules','program',4,'p_program','contelog_parser.py',13),
+  ('program -> contexts queries rules facts','program',4,'p_program','contelog_parser.py',14),
+  ('program -> contexts facts rules','program',3,'p_program','contelog_parser.py',15),
+  ('program -> contexts rules facts','program',3,'p_program','contelog_parser.py',16),
+  ('program -> contexts rules queries','program',3,'p_program','contelog_parser.py',17),
+  ('program -> contexts queries rules','program',3,'p_program','contelog_parser.py',18),
+  ('program -> facts rules queries','program',3,'p_program','contelog_parser.py',19),
+  ('program -> facts queries rules','program',3,'p_program','contelog_parser.py',20),
+  ('program -> rules facts queries','program',3,'p_program','contelog_parser.py',21),
+  ('program -> rules queries facts','program',3,'p_program','contelog_parser.py',22),
+  ('program -> queries facts rules','program',3,'p_program','contelog_parser.py',23),
+  ('program -> queries rules facts','program',3,'p_program','contelog_parser.py',24),
+  ('program -> contexts facts','program',2,'p_program','contelog_parser.py',25),
+  ('program -> contexts rules','program',2,'p_program','contelog_parser.py',26),
+  ('program -> contexts queries','program',2,'p_program','contelog_parser.py',27),
+  ('program -> facts rules','program',2,'p_program','contelog_parser.py',28),
+  ('program -> rules facts','program',2,'p_program','contelog_parser.py',29),
+  ('program -> facts queries','program',2,'p_program','contelog_parser.py',30),
+  ('program -> queries facts','program',2,'p_program','contelog_parser.py',31),
+  ('program -> rules queries','program',2,'p_program','contelog_parser.py',32),
+  ('program -> queries rules','program',2,'p_program','contelog_parser.py',33),
+  ('program -> contexts','program',1,'p_program','contelog_parser.py',34),
+  ('program -> facts','program',1,'p_program','contelog_parser.py',35),
+  ('program -> rules','program',1,'p_program','contelog_parser.py',36),
+  ('program -> queries','program',1,'p_program','contelog_parser.py',37),
+  ('contexts -> contexts context','contexts',2,'p_contexts_list','contelog_parser.py',50),
+  ('contexts -> context','contexts',1,'p_contexts_list','contelog_parser.py',51),
+  ('context -> LOWER_NAME THETA OPEN_CURLY pairs CLOSE_CURLY PERIOD','context',6,'p_context','contelog_parser.py',61),
+  ('pairs -> pairs COMMA pair','pairs',3,'p_pairs_list','contelog_parser.py',67),
+  ('pairs -> pair','pairs',1,'p_pairs_list','contelog_parser.py',68),
+  ('pair -> LOWER_NAME COLON OPEN_SQUARE elements CLOSE_SQUARE','pair',5,'p_pair','contelog_parser.py',78),
+  ('elements -> elements COMMA element','elements',3,'p_elements_list','contelog_parser.py',84),
+  ('elements -> element','elements',1,'p_elements_list','contelog_parser.py',85),
+  ('element -> attribute','element',1,'p_element','contelog_parser.py',95),
+  ('element -> OPEN_SQUARE attributes CLOSE_SQUARE','element',3,'p_element','contelog_parser.py',96),
+  ('attributes -> attributes COMMA attribute','attributes',3,'p_attributes_list','contelog_parser.py',105),
+  ('attributes -> attribute','attributes',1,'p_attributes_list','contelog_parser.py',106),
+  ('attribute -> constant','attribute',1,'p_attribute','contelog_parser.py',116),
+  ('facts -> facts fact','facts',2,'p_facts_list','contelog_parser.py',122),
+  ('facts -> fact','facts',1,'p_facts_list','contelog_parser.py',123),
+  ('fact -> predicate PERIOD','fact',2,'p_fact','contelog_parser.py',135),
+  ('fact -> INPUT LOWER_NAME STRING','fact',3,'p_input','contelog_parser.py',141),
+  ('fact -> INPUT LOWER_NAME STRING PERIOD','fact',4,'p_input','contelog_parser.py',142),
+  ('rules -> rules rule','rules',2,'p_rules_list','contelog_parser.py',149),
+  ('rules -> rule','rules',1,'p_rules_list','contelog_parser.py',150),
+  ('rule -> head IMPLY body PERIOD','rule',4,'p_rule','contelog_parser.py',160),
+  ('queries -> queries query','queries',2,'p_queries_list','contelog_parser.py',166),
+  ('queries -> query','queries',1,'p_queries_list','contelog_parser.py',167),
+  ('query -> predicate_list QUESTION_MARK','query',2,'p_query','contelog_parser.py',177),
+  ('head -> predicate','head',1,'p_head','contelog_parser.py',183),
+  ('body -> predicate_list','body',1,'p_body','contelog_parser.py',189),
+  ('predicate_list -> predicate_list COMMA predicate','predicate_list',3,'p_predicate_list_normal','contelog_parser.py',195),
+  ('predicate_list -> predicate_list COMMA constraint','predicate_list',3,'p_predicate_list_built_in','contelog_parser.py',202),
+  ('predicate_list -> predicate','predicate_list',1,'p_predicate_list_normal_last','contelog_parser.py',209),
+  ('predicate_list -> constraint','predicate_list',1,'p_predicate_list_built_in_last','contelog_parser.py',215),
+  ('predicate -> LOWER_NAME OPEN_ROUND term_list CLOSE_ROUND','predicate',4,'p_predicate','contelog_parser.py',221),
+  ('predicate -> LOWER_NAME OPEN_ROUND term_list CLOSE_ROUND ANNOTATION context_name','predicate',6,'p_predicate','contelog_parser.py',222),
+  ('context_name -> LOWER_NAME','context_name',1,'p_context_name','contelog_parser.py',231),
+  ('context_name -> UPPER_NAME','context_name',1,'p_context_name','contelog_parser.py',232),
+  ('context_name -> context_members','context_name',1,'p_context_name','contelog_parser.py',233),
+  ('context_members -> context_members + LOWER_NAME','context_members',3,'p_context_members','contelog_parser.py',239),
+  ('context_members -> LOWER_NAME + LOWER_NAME','context_members',3,'p_context_members','contelog_parser.py',240),
+  ('term_list -> term_list COMMA term','term_list',3,'p_term_list','contelog_parser.py',251),
+  ('term_list -> term','term_list',1,'p_term_list','contelog_parser.py',252),
+  ('term -> UPPER_NAME','term',1,'p_term_variable','contelog_parser.py',262),
+  ('term -> constant','term',1,'p_term_constant','contelog_parser.py',268),
+  ('constant -> LOWER_NAME','constant',1,'p_constant','contelog_parser.py',274),
+  ('constant -> INTEGER','constant',1,'p_constant','contelog_parser.py',275),
+  ('constant -> FLOAT','constant',1,'p_constant','contelog_parser.py',276),
+  ('constraint -> UPPER_NAME THETA UPPER_NAME','constraint',3,'p_constraint_variable','contelog_parser.py',283),
+  ('constraint -> UPPER_NAME THETA constant','constraint',3,'p_constraint_constant','contelog_parser.py',289),
+]
@@ -0,0 +1,184 @@
+import numpy as np
+import pandas as pd
+import parallel
+from elements import is_upper_case
+from symbols import NONE, SYMBOL_DTYPE
+
+class ContextIndex(object):
+
+    def __init__(self, data_frame):
+        """
+        inverted indexes of a relation on the context of its records, the last column:
+        context -> positions of its records, and attributes, the other columns, -> positions of the records holding them
+        the index reads the records of data_frame, it is only used to select records of that data frame
+        """
+        self.data_frame = data_frame
+
+        values = data_frame.values.astype(SYMBOL_DTYPE)
+
+        # positions of the records of each context, the records being grouped by context in a stable order
+        self.context_positions = get_positions(values[:, -1])
+
+        # positions of the records of each tuple of attributes, built when first needed
+        self.attribute_positions = None
+        self.values = values
+
+    def get_contexts(self):
+        """
+        returns the contexts of the records, except none
+        """
+        return [context for context in self.context_positions.keys() if context != NONE]
+
+    def get_context_positions(self, contexts):
+        """
+        returns the sorted positions of the records of the given contexts
+        """
+        parts = [self.context_positions[context] for context in contexts if context in self.context_positions]
+
+        if not len(parts):
+            return np.empty(0, dtype = np.int64)
+
+        return np.sort(np.concatenate(parts))
+
+    def get_attribute_positions(self, attributes):
+        """
+        returns the positions of the records holding a tuple of attributes, in all their contexts
+        """
+        if self.attribute_positions is None:
+            keys = [tuple(record) for record in self.values[:, 0 : -1].tolist()]
+            self.attribute_positions = {}
+
+            for position, key in enumerate(keys):
+                self.attribute_positions.setdefault(key, []).append(position)
+
+        return np.array(self.attribute_positions.get(tuple(attributes), []), dtype = np.int64)
+
+    def select(self, data_frame, constant_selections):
+        """
+        returns the records of data_frame which may satisfy constant selections of the form (column position, symbol id),
+        read through the context index for a constant context, or through the attribute index for constant attributes,
+        or data_frame itself if the index cannot select them
+        """
+        if data_frame is not self.data_frame:
+            return data_frame
+
+        selections = dict(constant_selections)
+        context_position = len(data_frame.columns) - 1
+
+        if context_position in selections:
+            positions = self.get_context_positions([selections[context_position]])
+        elif len(selections) == context_position and context_position > 0:
+            positions = self.get_attribute_positions([selections[position] for position in range(0, context_position)])
+        else:
+            return data_frame
+
+        return data_frame.iloc[positions].reset_index(drop = True)
+
+    def __repr__(self):
+        return '%r' % (self.__dict__)
+
+def get_positions(column):
+    """
+    returns a dictionary mapping each value of a column to the sorted array of the positions of its records
+    """
+    order = np.argsort(column, kind = 'stable')
+    values, starts = np.unique(column[order], return_index = True)
+    ends = np.append(starts[1 : len(starts)], len(order))
+
+    return dict((int(value), order[start : end]) for value, start, end in zip(values, starts, ends))
+
+def get_context_indexes(DB):
+    """
+    returns a dictionary with the context index of each relation of a database, like the CDB relations
+    """
+    return dict((relation, ContextIndex(data_frame)) for relation, data_frame in DB.items())
+
+def is_context_local(rules):
+    """
+    returns whether the rules of a stratum can be evaluated independently for each context:
+    the head context of each rule is a variable C which is the context of a body predicate, and every body predicate
+    has the context C or none, with C in no argument and no constraint, so that the facts of a context are derived
+    only from the records of that context and the records without context
+    """
+    for rule in rules:
+        context = rule.head.context
+
+        if not is_upper_case(context) or context in rule.head.arguments:
+            return False
+
+        predicates = [predicate for predicate in rule.body if predicate.type != 'constraint']
+        constraints = [predicate for predicate in rule.body if predicate.type == 'constraint']
+
+        if not any(predicate.context == context for predicate in predicates):
+            return False
+
+        if any(predicate.context not in [context, 'none'] or context in predicate.arguments for predicate in predicates):
+            return False
+
+        if any(context in [constraint.term_x, constraint.term_y] for constraint in constraints):
+            return False
+
+    return True
+
+def context_partitioned_evaluation(rule_plans, EDB, IDB, CDB, IDB_relations, recursive, join_backend, join_planner, evaluate_stratum, partitions, CDB_indexes = None, tracer = None):
+    """
+    evaluates the rules of a context-local stratum once for each partition of the contexts, over the records of the contexts of the partition
+    and the records without context, and returns the IDB relations of the stratum with the facts derived for all the contexts
+    the contexts are hash-partitioned into the given number of partitions, at most one per context, each converging on its own,
+    as evaluating each of many small contexts on its own costs more than the joins it saves
+    evaluate_stratum evaluates the rule plans of a partition like single_pass_evaluation or semi_naive_evaluation, recording its iterations with the tracer
+
+    the relations read only without context are the same for all the contexts, so their hash tables are built once,
+    the relations read through the context variable are sliced for each context with their context index
+    """
+    # context index of each relation read through the context variable, and the contexts of their records
+    indexes = {}
+    contexts = set()
+
+    for rule_plan in rule_plans:
+        for scan in rule_plan.scans:
+            if scan.context_position is None or (scan.database, scan.name) in indexes:
+                continue
+
+            if scan.database == 'CDB' and CDB_indexes is not None and scan.name in CDB_indexes:
+                indexes[(scan.database, scan.name)] = CDB_indexes[scan.name]
+            else:
+                indexes[(scan.database, scan.name)] = ContextIndex({'EDB' : EDB, 'CDB' : CDB, 'IDB' : IDB}[scan.database][scan.name])
+
+            contexts.update(indexes[(scan.database, scan.name)].get_contexts())
+
+    # relations of each partition: the relations read without context are read whole, only their records without context being selected
+    context_DB = {'EDB' : dict(EDB), 'CDB' : dict(CDB), 'IDB' : dict(IDB)}
+    sliced = set(indexes.keys())
+
+    # facts of the stratum relations, with the facts they start with
+    derived = dict((relation, [IDB[relation]]) for relation in IDB_relations)
+
+    contexts = np.array(sorted(contexts), dtype = SYMBOL_DTYPE)
+    shard_numbers = parallel.get_shard_numbers(contexts, min(partitions, max(len(contexts), 1)))
+
+    for shard in np.unique(shard_numbers):
+        partition_contexts = list(contexts[shard_numbers == shard]) + [NONE]
+
+        for (database, relation), index in indexes.items():
+            context_DB[database][relation] = index.data_frame.iloc[index.get_context_positions(partition_contexts)].reset_index(drop = True)
+
+            if database != 'IDB':
+                join_planner.statistics.update((database, relation), context_DB[database][relation])
+
+        # the rule plans keep the scans of the fixed relations they read, each partition has plans of its own
+        context_plans = [type(rule_plan)(rule_plan.rule, list(EDB.keys()), IDB_relations, list(CDB.keys())) for rule_plan in rule_plans]
+        context_IDB = evaluate_stratum(context_plans, context_DB['EDB'], dict((relation, context_DB['IDB'][relation]) for relation in IDB_relations), context_DB['CDB'], recursive, join_backend, join_planner, None, tracer)
+
+        # the hash tables of the sliced relations are only valid for this partition
+        join_backend.clear(sliced)
+
+        for relation in IDB_relations:
+            derived[relation].append(context_IDB[relation])
+
+    # the statistics of the sliced relations are the ones of the whole relations again
+    for (database, relation), index in indexes.items():
+        if database != 'IDB':
+            join_planner.statistics.update((database, relation), index.data_frame)
+
+    return dict((relation, pd.concat(derived[relation], ignore_index = True).drop_duplicates().reset_index(drop = True)) for relation in IDB_relations)
@@ -0,0 +1,259 @@
+import os
+import loader
+import numpy as np
+import pandas as pd
+from symbols import symbol_table, encode_records, empty_data_frame, SYMBOL_DTYPE
+
+class Database(object):
+
+    def __init__(self, program, directory = ''):
+        """
+        relations of a parsed program as data frames of symbol ids: the facts of the program and of its input files in EDB,
+        the attributes of its contexts in CDB, and an IDB data frame for each rule head and each predicate without facts
+        IDB data frames of predicates which also have facts start with these facts
+        input file paths are relative to directory
+        """
+        # stores various types of program program statements
+        self.contexts = []
+        self.facts = []
+        self.rules = []
+        self.queries = []
+
+        # dictionaries of data frames for the relations/predicates
+        self.EDB = {}
+        self.IDB = {}
+        self.CDB = {}
+
+        # lists of relation/predicate names
+        self.EDB_relations = []
+        self.IDB_relations = []
+        self.CDB_relations = []
+
+        self.directory = directory
+        self.load(program)
+
+    def load(self, program):
+        """
+        generates the data frames and name lists for the relations/predicates of the program statements
+        """
+        contexts = self.contexts
+        facts = self.facts
+        rules = self.rules
+        queries = self.queries
+        EDB = self.EDB
+        IDB = self.IDB
+        CDB = self.CDB
+        EDB_relations = self.EDB_relations
+        IDB_relations = self.IDB_relations
+        CDB_relations = self.CDB_relations
+
+        # records and data frames gathered for each EDB relation, the EDB data frames are built once all the facts are read
+        EDB_records = {}
+        EDB_inputs = {}
+        EDB_blocks = {}
+
+        # records gathered for each CDB relation, the CDB data frames are built once all the contexts are read
+        CDB_records = {}
+
+        # processing each program statement
+        # segregating them in different lists
+        # generating the corresponding data frames and name lists for relations/predicates
+        for element in program:
+
+            # processing context type statements
+            if element.type == 'context':
+                contexts.append(element)
+
+                # for each dimension in the context, generate data frames of records with the structure
+                # (dimension attribute, context) that is from: (east, c1), (west, c2)
+
+                for predicate in element.contextual_predicates:
+                    argument_list = predicate.arguments
+                    records = []
+
+                    # if argument list is a list of lists
+                    if isinstance(argument_list[0], list):
+                        for argument in argument_list:
+                            records.append(argument + [predicate.context])
+
+                    # if argument list is a list of elementary types
+                    else:
+                        for argument in argument_list:
+                            records.append([argument, predicate.context])
+
+                    if predicate.name not in CDB_relations:
+                        CDB_relations.append(predicate.name)
+
+                    CDB_records.setdefault(predicate.name, []).extend(records)
+
+            # for facts, gather records with the structure
+            # (argument_1, argument_2,..., context) that is per: (john, east, none), (rose, west, none)
+            elif element.type == 'fact':
+                facts.append(element)
+                record = element.predicate.arguments + [element.predicate.context]
+
+                if element.predicate.name not in EDB_relations:
+                    EDB_relations.append(element.predicate.name)
+
+                EDB_records.setdefault(element.predicate.name, []).append(record)
+
+            # blocks of facts read by the fact reader are kept in their columns of codes until the EDB data frames are encoded
+            elif element.type == 'fact_block':
+                if element.name not in EDB_relations:
+                    EDB_relations.append(element.name)
+
+                EDB_blocks.setdefault(element.name, []).append(element)
+
+            # for input declarations, load the relation file straight into a data frame of records
+            # with the same structure as the records of facts
+            elif element.type == 'input':
+                file_path = os.path.join(self.directory, element.path)
+
+                try:
+                    data_frame = loader.load_input(file_path)
+                except Exception as error:
+                    print('Could not load input file for ' + element.name + ':', error)
+                    continue
+
+                if data_frame.empty:
+                    continue
+
+                if element.name not in EDB_relations:
+                    EDB_relations.append(element.name)
+
+                EDB_inputs.setdefault(element.name, []).append(data_frame)
+
+            # processing rule type statements
+            elif element.type == 'rule':
+
+                rules.append(element)
+
+                # create a new empty data frame for rule head predicate in IDB if it does not already exist in IDB
+                # with a column for each of (argument1, argument2,..., context) that is side: (X, Z, C)
+                # columns are numbered like the columns of EDB data frames, as heads may repeat arguments like (X, none, none)
+                if not element.head.name in IDB_relations:
+                    column_header = element.head.arguments + [element.head.context]
+                    IDB[element.head.name] = empty_data_frame(range(0, len(column_header)))
+                    IDB_relations.append(element.head.name)
+
+                for predicate in element.body:
+                    if predicate.type != 'constraint':
+
+                        # changing the type of contextual predicates for later use
+                        if predicate.name in CDB_relations:
+                            predicate.type = 'contextual_predicate'
+
+                        # if predicate does not already occur in EDB and IDB then create a new data frame for it
+                        elif not ((predicate.name in EDB_relations) or (predicate.name in IDB_relations)):
+                            column_header = predicate.arguments + [predicate.context]
+                            IDB[predicate.name] = empty_data_frame(range(0, len(column_header)))
+                            IDB_relations.append(predicate.name)
+
+            # processing query type statements
+            elif element.type == 'query':
+                queries.append(element)
+
+        # generate the EDB and CDB data frames once all the facts and contexts have been read
+        build_EDB(EDB, EDB_records, EDB_inputs)
+
+        for relation in CDB_relations:
+            CDB[relation] = pd.DataFrame(data = CDB_records[relation], index = None, dtype = object)
+
+        # intern all the constants of EDB and CDB to integer symbol ids
+        for relation in EDB_relations:
+            if relation in EDB:
+                EDB[relation] = encode_records(EDB[relation])
+
+        # the fact blocks are encoded from their distinct constants only
+        add_fact_blocks(EDB, EDB_blocks)
+
+        for relation in CDB_relations:
+            CDB[relation] = encode_records(CDB[relation])
+
+        # if a predicate is found in both EDB and IDB, move it to IDB only
+        for relation in list(EDB_relations):
+            if relation in IDB_relations:
+                IDB[relation] = EDB[relation]
+                EDB.pop(relation)
+                EDB_relations.remove(relation)
+
+        # reordering rule body predicates in the order: IDB predicates, CDB predicates, EDB predicates, constraints
+        reorder_rule_bodies(rules, EDB_relations, IDB_relations, CDB_relations)
+
+    def __repr__(self):
+        return '%r' % (self.__dict__)
+
+def build_EDB(EDB, EDB_records, EDB_inputs):
+    """
+    generates one data frame per EDB relation from the records of its facts and the data frames loaded from its input files
+    """
+    for relation in set(EDB_records.keys()) | set(EDB_inputs.keys()):
+        data_frames = []
+
+        if relation in EDB_records:
+            data_frames.append(pd.DataFrame(data = EDB_records[relation], index = None, dtype = object))
+
+        if relation in EDB_inputs:
+            for data_frame in EDB_inputs[relation]:
+
+                # skip input files whose arity does not match the facts already read for the relation
+                if len(data_frames) and len(data_frame.columns) != len(data_frames[0].columns):
+                    print('Arity mismatch in input file for ' + relation + ', expected', len(data_frames[0].columns) - 1, 'arguments')
+                    continue
+
+                data_frames.append(data_frame)
+
+        if len(data_frames) == 1:
+            EDB[relation] = data_frames[0]
+        elif len(data_frames) > 1:
+            EDB[relation] = pd.concat(data_frames, ignore_index = True)
+
+def add_fact_blocks(EDB, EDB_blocks):
+    """
+    adds the facts of the fact blocks of each EDB relation to its encoded data frame, whose facts must have as many arguments
+    """
+    for relation, blocks in EDB_blocks.items():
+
+        # the fact reader only puts facts with the same number of arguments in the blocks of a relation
+        data_frames = [get_block_data_frame(block) for block in blocks]
+
+        if relation in EDB:
+            if len(EDB[relation].columns) == blocks[0].arity + 1:
+                data_frames.append(EDB[relation])
+            else:
+                print('Arity mismatch in the facts of ' + relation + ', expected', blocks[0].arity, 'arguments')
+
+        EDB[relation] = data_frames[0] if len(data_frames) == 1 else pd.concat(data_frames, ignore_index = True)
+
+def get_block_data_frame(block):
+    """
+    returns the data frame of symbol ids of the facts of a fact block
+    """
+    ids = symbol_table.intern_array(block.symbols)
+    columns = dict((column, ids[np.frombuffer(codes, dtype = SYMBOL_DTYPE)]) for column, codes in block.codes.items())
+
+    return pd.DataFrame(columns, index = None, columns = range(0, block.arity + 1))
+
+def reorder_rule_bodies(rules, EDB_relations, IDB_relations, CDB_relations):
+    """
+    reordering all rules bodies to get predicates in the order: IDB predicates, CDB predicates, EDB predicates, constraints
+    """
+    for rule in rules:
+        EDB_predicates = []
+        IDB_predicates = []
+        CDB_predicates = []
+        constraints = []
+
+        for predicate in rule.body:
+            if predicate.type == 'constraint':
+                constraints.append(predicate)
+            elif predicate.name in EDB_relations:
+                EDB_predicates.append(predicate)
+            elif predicate.name in IDB_relations:
+                IDB_predicates.append(predicate)
+            elif predicate.name in CDB_relations:
+                CDB_predicates.append(predicate)            
+
+        rule.body = IDB_predicates + CDB_predicates + EDB_predicates + constraints
+
+    return rules
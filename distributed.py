@@ -0,0 +1,489 @@
+import os
+import sys
+import threading
+import traceback
+import multiprocessing
+import numpy as np
+import pandas as pd
+from multiprocessing.connection import Listener, Client
+import factsets
+import joins
+import parallel
+import planner
+import plans
+import strata
+from symbols import symbol_table, empty_data_frame, SYMBOL_DTYPE
+
+# number of pending connections a listener accepts, enough for the workers connecting to each other at the same time
+BACKLOG = 128
+
+class Coordinator(object):
+
+    def __init__(self, workers, join_backend_type, join_planner_type, address = ('localhost', 0), authkey = None, start_workers = True):
+        """
+        drives the evaluation of a program on worker processes, each owning a hash partition of every relation
+        the workers connect to the coordinator at address, and to each other to exchange facts
+
+        with start_workers, the worker processes are started on this machine, otherwise they are started by running
+        python distributed.py host port on each machine, with the authentication key in the environment variable CONTELOG_AUTHKEY
+        """
+        self.authkey = authkey or os.environ.get('CONTELOG_AUTHKEY', '').encode() or os.urandom(16)
+        self.listener = Listener(address, authkey = self.authkey, backlog = BACKLOG)
+        self.processes = []
+
+        if start_workers:
+            for number in range(0, workers):
+                process = multiprocessing.Process(target = serve, args = (self.listener.address, self.authkey, address[0]), daemon = True)
+                process.start()
+                self.processes.append(process)
+        else:
+            print('Waiting for', workers, 'workers at', self.listener.address)
+
+        self.connections = [self.listener.accept() for number in range(0, workers)]
+
+        # each worker sends the address at which the other workers connect to it
+        peer_addresses = [connection.recv() for connection in self.connections]
+
+        # the workers intern the symbols of the coordinator in the same order, and the symbols interned later are sent with each stratum
+        self.symbol_count = len(symbol_table)
+        self.command([('setup', number, peer_addresses, list(symbol_table.values), join_backend_type, join_planner_type) for number in range(0, workers)])
+
+    def command(self, messages):
+        """
+        sends a message to each worker and returns their replies
+        a single message is sent to all the workers
+        """
+        if not isinstance(messages, list):
+            messages = [messages] * len(self.connections)
+
+        for connection, message in zip(self.connections, messages):
+            connection.send(message)
+
+        replies = [connection.recv() for connection in self.connections]
+
+        for reply in replies:
+            if isinstance(reply, tuple) and len(reply) and reply[0] == 'error':
+                raise RuntimeError('Distributed worker failed:\n' + reply[1])
+
+        return replies
+
+    def load(self, database, DB):
+        """
+        sends each worker its hash partition of the records of each relation of a database
+        """
+        messages = [{} for connection in self.connections]
+
+        for relation, data_frame in DB.items():
+            values = data_frame.values.astype(SYMBOL_DTYPE)
+            shard_numbers = get_row_shard_numbers(values, len(self.connections))
+
+            for number, message in enumerate(messages):
+                message[relation] = values[shard_numbers == number]
+
+        self.command([('load', database, message) for message in messages])
+
+    def evaluate_stratum(self, stratum, rule_plans):
+        """
+        evaluates the rules of a stratum on the workers, iteration by iteration for a recursive stratum, until no new fact is derived
+        """
+        # each rule is partitioned on the variable held by most of its body predicates
+        keys = [get_scan_keys(rule_plan) for rule_plan in rule_plans]
+
+        # partitions of the relations read by the rules, on the column of the partition variable or whole if they do not hold it
+        fixed_views = set()
+        IDB_views = set()
+
+        for rule_plan, scan_keys in zip(rule_plans, keys):
+            for scan, key in zip(rule_plan.scans, scan_keys):
+                if scan.database == 'IDB':
+                    IDB_views.add((scan.name, key))
+                else:
+                    fixed_views.add((scan.database, scan.name, key))
+
+        symbols = symbol_table.values[self.symbol_count : len(symbol_table)]
+        self.symbol_count = len(symbol_table)
+        self.command(('stratum', symbols, rule_plans, keys, stratum.relations, sorted(fixed_views, key = repr), sorted(IDB_views, key = repr)))
+
+        first_iteration = True
+
+        while True:
+            count = sum(self.command(('iterate', first_iteration)))
+            first_iteration = False
+
+            if not stratum.recursive or count == 0:
+                break
+
+        self.command(('finish',))
+
+    def collect(self, relations):
+        """
+        returns a dictionary with the data frames of the relations, gathered from the partitions of the workers
+        """
+        partitions = self.command(('collect', relations))
+        results = {}
+
+        for relation in relations:
+            values = np.concatenate([partition[relation] for partition in partitions])
+            results[relation] = pd.DataFrame(values, index = None, columns = range(0, values.shape[1]))
+
+        return results
+
+    def close(self):
+        for connection in self.connections:
+            try:
+                connection.send(('stop',))
+                connection.close()
+            except OSError:
+                pass
+
+        for process in self.processes:
+            process.join(5)
+            if process.is_alive():
+                process.terminate()
+
+        self.listener.close()
+
+    def __repr__(self):
+        return '%r' % (self.__dict__)
+
+class DistributedWorker(object):
+
+    def __init__(self, connection, peer_listener, authkey):
+        """
+        worker owning a hash partition of every relation, on the hash of the whole records, as its home partitions
+
+        the rules of a stratum read views of the relations: partitions on the column of the partition variable of the rule, or whole relations,
+        built by exchanging records with the other workers
+        facts derived in an iteration are sent to the worker owning them, which keeps the ones it did not already have as the delta,
+        and the delta is sent again to the views of the next iteration
+        the other workers are connected to with the authkey of the coordinator, which their listeners accept
+        """
+        self.connection = connection
+        self.peer_listener = peer_listener
+        self.authkey = authkey
+
+        # home partitions keyed by (database, relation), views keyed by (database, relation, key) with key a column position or None
+        self.home = {}
+        self.views = {}
+
+        # rules of the current stratum, with the key of each of their scans, and the fact sets of the stratum relations and of their views,
+        # with the position of the first record of the delta of each
+        self.rule_plans = []
+        self.keys = []
+        self.relations = []
+        self.fact_sets = {}
+        self.view_sets = {}
+        self.delta_starts = {}
+        self.view_starts = {}
+
+    def run(self):
+        handlers = {'setup' : self.setup, 'load' : self.load, 'stratum' : self.start_stratum, 'iterate' : self.iterate, 'finish' : self.finish_stratum, 'collect' : self.collect}
+
+        while True:
+            message = self.connection.recv()
+
+            if message[0] == 'stop':
+                break
+
+            try:
+                reply = handlers[message[0]](*message[1 : len(message)])
+            except Exception:
+                reply = ('error', traceback.format_exc())
+
+            self.connection.send(reply)
+
+        for connection in list(self.outgoing.values()) + list(self.incoming.values()):
+            connection.close()
+
+        self.peer_listener.close()
+
+    def setup(self, number, peer_addresses, symbols, join_backend_type, join_planner_type):
+        """
+        interns the symbols of the coordinator, and opens a connection to and from each other worker
+        """
+        for symbol in symbols:
+            symbol_table.intern(symbol)
+
+        self.number = number
+        self.worker_count = len(peer_addresses)
+        self.join_backend = join_backend_type()
+        self.join_planner_type = join_planner_type
+        self.incoming = {}
+        self.outgoing = {}
+
+        # connections from the other workers are accepted while connecting to them, each connecting worker sending its number first
+        def accept():
+            for peer in range(0, self.worker_count - 1):
+                connection = self.peer_listener.accept()
+                self.incoming[connection.recv()] = connection
+
+        accepting = threading.Thread(target = accept)
+        accepting.start()
+
+        for peer, address in enumerate(peer_addresses):
+            if peer != number:
+                self.outgoing[peer] = Client(address, authkey = self.authkey)
+                self.outgoing[peer].send(number)
+
+        accepting.join()
+
+        return 'ready'
+
+    def load(self, database, relations):
+        for relation, values in relations.items():
+            self.home[(database, relation)] = get_data_frame(values)
+
+        return 'loaded'
+
+    def start_stratum(self, symbols, rule_plans, keys, relations, fixed_views, IDB_views):
+        """
+        builds the views of the fixed relations the rules of a stratum read, and the delta views of the facts the stratum relations start with
+        """
+        for symbol in symbols:
+            symbol_table.intern(symbol)
+
+        self.rule_plans = rule_plans
+        self.keys = keys
+        self.relations = relations
+
+        self.build_views(self.views, [view for view in fixed_views if view not in self.views], self.home)
+
+        # facts of the partitions of the stratum relations owned by this worker, and of their views, in the order they were derived,
+        # the facts the stratum relations start with being their first delta, as in semi-naive evaluation
+        self.fact_sets = {}
+        self.view_sets = {}
+
+        for relation in relations:
+            data_frame = self.home.pop(('IDB', relation))
+            self.fact_sets[relation] = factsets.FactSet(data_frame.columns)
+            self.fact_sets[relation].add(data_frame)
+
+        for relation, key in IDB_views:
+            self.view_sets[(relation, key)] = factsets.FactSet(self.fact_sets[relation].columns, keyed = False)
+
+        self.delta_starts = dict((relation, 0) for relation in relations)
+        self.add_delta_views()
+
+        return 'started'
+
+    def add_delta_views(self):
+        """
+        appends the views of the delta of the partitions of the stratum relations to the views of their facts,
+        the views of the old facts being the records appended before
+        """
+        delta = dict((relation, fact_set.get_data_frame(self.delta_starts[relation])) for relation, fact_set in self.fact_sets.items())
+        delta_views = {}
+        self.build_views(delta_views, list(self.view_sets.keys()), delta)
+
+        self.view_starts = {}
+
+        for view, view_set in self.view_sets.items():
+            self.view_starts[view] = len(view_set)
+            view_set.append(delta_views[view])
+
+    def iterate(self, first_iteration):
+        """
+        evaluates the rules of the stratum on the views of this worker, sends the derived facts to the workers owning them,
+        and keeps the facts received which are not already known as the new delta, then sends the delta to the views
+        returns the number of facts of the delta
+        """
+        derived = dict((relation, []) for relation in self.relations)
+
+        for rule_plan, scan_keys in zip(self.rule_plans, self.keys):
+
+            # rules without IDB predicates of the stratum derive all their facts in the first iteration
+            if not (first_iteration or len(rule_plan.IDB_scans)):
+                continue
+
+            # rules reading only whole relations derive the same facts on every worker, they are evaluated by the first worker only
+            if all(key is None for key in scan_keys) and self.number != 0:
+                continue
+
+            frames = {}
+            join_planner = self.join_planner_type()
+
+            for index, (scan, key) in enumerate(zip(rule_plan.scans, scan_keys)):
+                for source in set(sources[index] for sources in rule_plan.variants):
+                    if source == 'IDB_old':
+                        frames[(index, source)] = self.view_sets[(scan.name, key)].get_data_frame(0, self.view_starts[(scan.name, key)])
+                    elif source == 'IDB_delta':
+                        frames[(index, source)] = self.view_sets[(scan.name, key)].get_data_frame(self.view_starts[(scan.name, key)])
+                    else:
+                        frames[(index, source)] = self.views[(source, scan.name, key)]
+
+                    join_planner.statistics.update(scan.get_statistics_key(source), frames[(index, source)])
+
+            new_facts = rule_plan.execute({}, self.join_backend, join_planner, None, frames)
+
+            if new_facts is not None:
+                derived[rule_plan.head_name].append(new_facts.drop_duplicates().values)
+
+        # send each derived fact to the worker owning it
+        outgoing = [{} for number in range(0, self.worker_count)]
+
+        for relation, parts in derived.items():
+            if not len(parts):
+                continue
+
+            values = np.concatenate(parts)
+            shard_numbers = get_row_shard_numbers(values, self.worker_count)
+
+            for number in range(0, self.worker_count):
+                outgoing[number][relation] = values[shard_numbers == number]
+
+        received = self.exchange(outgoing)
+
+        # the facts received which are not already known are the new delta, the delta becoming old
+        for relation, fact_set in self.fact_sets.items():
+            self.delta_starts[relation] = len(fact_set)
+
+            for partition in received:
+                if relation in partition:
+                    fact_set.add(partition[relation])
+
+        self.add_delta_views()
+
+        return sum(len(fact_set) - self.delta_starts[relation] for relation, fact_set in self.fact_sets.items())
+
+    def finish_stratum(self):
+        """
+        the relations of the stratum are complete, later strata read them as fixed relations, with the views already built
+        """
+        for relation, fact_set in self.fact_sets.items():
+            self.home[('EDB', relation)] = fact_set.get_data_frame()
+
+        for (relation, key), view_set in self.view_sets.items():
+            self.views[('EDB', relation, key)] = view_set.get_data_frame()
+
+        self.rule_plans = []
+        self.fact_sets, self.view_sets, self.delta_starts, self.view_starts = {}, {}, {}, {}
+
+        return 'finished'
+
+    def collect(self, relations):
+        return dict((relation, self.home[('EDB', relation)].values.astype(SYMBOL_DTYPE)) for relation in relations)
+
+    def build_views(self, views, required, DB):
+        """
+        builds the required views from the partitions of the relations in DB, exchanging their records with the other workers
+        a view is keyed by the key of the partitions, (database, relation) or relation, followed by the column position or None for a whole relation
+        """
+        outgoing = [{} for number in range(0, self.worker_count)]
+
+        for view in required:
+            values = DB[view[0 : -1] if len(view) > 2 else view[0]].values.astype(SYMBOL_DTYPE)
+            key = view[-1]
+
+            if key is None:
+                for message in outgoing:
+                    message[view] = values
+            else:
+                shard_numbers = parallel.get_shard_numbers(values[:, key], self.worker_count)
+                for number, message in enumerate(outgoing):
+                    message[view] = values[shard_numbers == number]
+
+        received = self.exchange(outgoing)
+
+        for view in required:
+            views[view] = get_data_frame(np.concatenate([partition[view] for partition in received]))
+
+    def exchange(self, outgoing):
+        """
+        sends a message to each other worker and returns the messages received from all the workers, including the one for this worker
+        messages are sent by a thread while the messages of the other workers are received, so that large messages do not block both ways
+        """
+        def send():
+            for number, connection in self.outgoing.items():
+                connection.send(outgoing[number])
+
+        sending = threading.Thread(target = send)
+        sending.start()
+
+        received = [outgoing[self.number]]
+
+        for number, connection in self.incoming.items():
+            received.append(connection.recv())
+
+        sending.join()
+
+        return received
+
+    def __repr__(self):
+        return '%r' % (self.__dict__)
+
+def serve(address, authkey, host = 'localhost'):
+    """
+    runs a worker connected to the coordinator at address, reachable by the other workers at host
+    """
+    connection = Client(address, authkey = authkey)
+    peer_listener = Listener((host, 0), authkey = authkey, backlog = BACKLOG)
+    connection.send(peer_listener.address)
+
+    DistributedWorker(connection, peer_listener, authkey).run()
+
+def distributed_evaluation(rules, EDB, IDB, CDB, EDB_relations, IDB_relations, CDB_relations, workers, join_backend = None, join_planner = None, coordinator = None):
+    """
+    returns a dictionary with the data frames of all the IDB relations, derived by the workers of a coordinator stratum by stratum,
+    like bottom_up_evaluation, with worker processes started on this machine if no coordinator is given
+    """
+    join_backend_type = joins.HashJoin if join_backend is None else type(join_backend)
+    join_planner_type = planner.JoinPlanner if join_planner is None else type(join_planner)
+    started = coordinator is None
+
+    if started:
+        coordinator = Coordinator(workers, join_backend_type, join_planner_type)
+
+    try:
+        head_relations = set(rule.head.name for rule in rules)
+
+        # IDB relations which are not the head of any rule only hold the facts they start with, they are read like EDB relations
+        fixed_relations = list(EDB_relations) + [relation for relation in IDB_relations if relation not in head_relations]
+
+        coordinator.load('EDB', dict((relation, EDB[relation] if relation in EDB else IDB[relation]) for relation in fixed_relations))
+        coordinator.load('CDB', CDB)
+        coordinator.load('IDB', dict((relation, IDB[relation]) for relation in IDB_relations if relation in head_relations))
+
+        for stratum in strata.get_strata(rules):
+            coordinator.evaluate_stratum(stratum, [plans.RulePlan(rule, fixed_relations, stratum.relations, CDB_relations) for rule in stratum.rules])
+            fixed_relations += stratum.relations
+
+        return coordinator.collect(IDB_relations)
+
+    finally:
+        if started:
+            coordinator.close()
+
+def get_scan_keys(rule_plan):
+    """
+    returns the column position of the partition variable of a rule in each of its scans, or None for the scans without it
+    the partition variable is the one held by most of the scans, the first one in the body among them
+    """
+    counts = {}
+
+    for scan in rule_plan.scans:
+        for column in scan.columns:
+            counts[column] = counts.get(column, 0) + 1
+
+    if not len(counts):
+        return [None] * len(rule_plan.scans)
+
+    variable = max(counts.keys(), key = lambda column: counts[column])
+
+    return [scan.positions[scan.columns.index(variable)] if variable in scan.columns else None for scan in rule_plan.scans]
+
+def get_row_shard_numbers(values, shards):
+    """
+    returns the shard of each record of an array of symbol ids, from a hash of all its columns
+    """
+    hashes = np.zeros(len(values), dtype = np.uint64)
+
+    for column in range(0, values.shape[1]):
+        hashes = hashes * np.uint64(1099511628211) + values[:, column].astype(np.uint64)
+
+    return parallel.get_shard_numbers(hashes, shards)
+
+def get_data_frame(values):
+    return pd.DataFrame(values, index = None, columns = range(0, values.shape[1]))
+
+if __name__ == '__main__':
+    serve((sys.argv[1], int(sys.argv[2])), os.environ['CONTELOG_AUTHKEY'].encode(), sys.argv[3] if len(sys.argv) > 3 else 'localhost')
@@ -1,14 +1,19 @@
+import math
+import operator
+from array import array
+
 class Predicate(object):
 
     def __init__(self, name = '', arguments = [], context = 'none', type = 'predicate'):
         """
         types: predicate, contextual_predicate
+        a composite context given as a list of context names is named canonically, its members sorted, like c1+c2
         """
         self.name = name
         self.arguments = arguments
 
         if isinstance(context, list):
-            self.context = '+'.join(context)
+            self.context = get_context_name(context)
         else:
             self.context = context
 
@@ -26,6 +31,9 @@ class Predicate(object):
     def __repr__(self):
         return '%r' % (self.__dict__)
 
+# operations of the theta operators of the constraints
+theta_operations = {'<' : operator.lt, '>' : operator.gt, '<=' : operator.le, '>=' : operator.ge, '!=' : operator.ne, '=' : operator.eq}
+
 class Constraint(object):
 
     def __init__(self, term_x = '', theta = '', term_y = '', type = 'constraint'):
@@ -66,6 +74,10 @@ class Query(object):
         self.predicates = predicates
         self.type = type
 
+        # name of the relation holding the answers to the query, and the query's variables as its arguments
+        self.name = None
+        self.variables = []
+
     def __repr__(self):
         return '%r' % (self.__dict__)
 
@@ -86,4 +98,88 @@ class Fact(object):
         return not self.__eq__(other)
 
     def __repr__(self):
-        return '%r' % (self.__dict__)
\ No newline at end of file
+        return '%r' % (self.__dict__)
+
+
+class Input(object):
+
+    def __init__(self, name, path, type = 'input'):
+        """
+        declares that the facts of predicate name are stored in an external file at path
+        """
+        self.name = name
+        self.path = path
+        self.type = type
+
+    def __repr__(self):
+        return '%r' % (self.__dict__)
+
+class FactBlock(object):
+
+    def __init__(self, name, arity, type = 'fact_block'):
+        """
+        ground facts of predicate name read by the fact reader, stored column by column instead of as fact statements
+        symbols are the distinct constants of the facts, and there is an array of codes into symbols for each argument and the context
+        """
+        self.name = name
+        self.arity = arity
+        self.symbols = []
+        self.codes = dict((column, array('q')) for column in range(0, arity + 1))
+        self.type = type
+
+        # code of each constant in symbols, keyed by get_symbol_key
+        self.symbol_codes = {}
+
+    def add(self, record):
+        """
+        adds a fact given as a record with the structure (argument_1, argument_2,..., context)
+        """
+        for column, value in enumerate(record):
+            key = get_symbol_key(value)
+            code = self.symbol_codes.get(key)
+
+            if code is None:
+                code = len(self.symbols)
+                self.symbol_codes[key] = code
+                self.symbols.append(value)
+
+            self.codes[column].append(code)
+
+    def renamed(self, name):
+        """
+        returns a block with the same facts for another predicate name
+        """
+        block = FactBlock(name, self.arity)
+        block.symbols = self.symbols
+        block.codes = self.codes
+        block.symbol_codes = self.symbol_codes
+
+        return block
+
+    def __len__(self):
+        return len(self.codes[0])
+
+    def __repr__(self):
+        return '%r' % ({'name' : self.name, 'arity' : self.arity, 'facts' : len(self), 'type' : self.type})
+
+def is_upper_case(s):
+	return isinstance(s, str) and s[0].isupper()
+
+def get_context_name(members):
+    """
+    returns the canonical name of the context made of the given member context names: the sorted distinct names joined by +
+    """
+    return '+'.join(sorted(set(members)))
+
+def get_symbol_key(value):
+    """
+    returns the key of a constant in dictionaries of constants, a string being its own key, and a number being keyed with its type,
+    and with its sign for a float, so that equal numbers of different types, like 1 and 1.0, and the zeros of both signs are distinct constants
+    """
+    if isinstance(value, str):
+        return value
+
+    if isinstance(value, float):
+        return ('float', value, math.copysign(1.0, value))
+
+    return ('int', value)
@@ -0,0 +1,326 @@
+import os
+import time
+import pandas as pd
+import contelog
+import database
+import distributed
+import evaluation
+import explain
+import incremental
+import magic
+import parallel
+import plans
+import cache
+import topdown
+import joins
+import planner
+from elements import Rule
+from symbols import encode_records, decode_data_frame, empty_data_frame
+
+class Engine(object):
+
+    def __init__(self, program, directory = '', engine = 'bottomup', join = 'hash', join_order = 'cost', magic_sets = True, cache_directory = None, workers = 1, partitions = 1, distributed = 0, context_partitions = 0, tracer = None):
+        """
+        embeddable Contelog engine: parses a program and loads its EDB and CDB relations once,
+        then evaluates the program and answers queries as many times as needed, returning data frames or iterators of records
+
+        program is the text of a program, or its statements returned by contelog.parse_program or contelog.parse_file
+        input file paths of the program are relative to directory
+        engine is bottomup or topdown, join and join_order select the join backend and the join planner of the bottom-up evaluation
+        with magic_sets, queries asked before the program is evaluated are answered by bottom-up evaluation of the rules rewritten with magic sets
+        with a cache_directory, the strata evaluated bottom-up are read from and written to the on-disk cache
+        with several workers, the rules of each iteration of the bottom-up evaluation are evaluated in a pool of worker processes
+        with several partitions, the inputs of each rule are hash-partitioned into shards joined by the worker processes
+        with several context_partitions, the strata whose rules derive the facts of a context only from the records of that context and
+        the records without context are evaluated bottom-up once for each partition of the contexts
+        the tracer, if any, is a profiler.Tracer recording the bottom-up evaluation: start_rule, record_variant and end_rule are called
+        for each rule evaluated, record_dedup for the facts derived by each rule and record_iteration for each iteration
+        with distributed workers, the bottom-up evaluation is run by that many worker processes, each owning a hash partition of every relation,
+        with a coordinator driving the iterations, and the cache is not used
+        the distributed workers do not report to a tracer, so a tracer cannot be given with distributed workers
+        """
+        self.engine = engine
+        self.join = join
+        self.join_order = join_order
+        self.magic_sets = magic_sets
+        self.cache_directory = cache_directory
+        self.workers = parallel.get_worker_count(workers)
+        self.partitions = parallel.get_worker_count(partitions)
+        self.distributed = distributed
+        self.context_partitions = context_partitions
+        self.tracer = tracer
+
+        if distributed and tracer is not None:
+            raise ValueError('A tracer cannot be used with distributed workers')
+
+        # statements of the program, empty if the program is
+        if isinstance(program, str):
+            program = contelog.parse_program(program)
+
+        self.program = program or []
+        program = self.program
+
+        # queries of the program, answered with answer, and the database of the other statements
+        self.queries = [element for element in program if element.type == 'query']
+
+        # rules with their bodies in the order of the program, the order in which magic sets pass the bindings of the queries,
+        # as the database reorders the bodies of its rules
+        self.rules = [Rule(element.head, list(element.body)) for element in program if element.type == 'rule']
+        self.database = database.Database([element for element in program if element.type != 'query'], directory)
+
+        # current data frames of all the EDB and IDB relations, once the program is evaluated
+        self.relations = None
+
+        # top-down engine keeping the tables of the subgoals of the queries already answered
+        self.top_down = None
+
+        # incremental database keeping the relations up to date once facts are inserted or deleted
+        self.incremental = None
+
+        # number of the queries answered, naming the relations of their answers
+        self.query_count = 0
+
+    @classmethod
+    def from_file(cls, file_path, **options):
+        """
+        returns an engine for a program file, whose input file paths are relative to the directory of the program file
+        """
+        return cls(contelog.parse_file(file_path), os.path.dirname(file_path), **options)
+
+    def evaluate(self):
+        """
+        derives all the facts of the IDB relations, and returns a dictionary with their data frames of symbol ids
+        the relations are evaluated again on every call, unless facts were inserted or deleted, which keeps them up to date
+        """
+        program_database = self.database
+
+        if self.incremental is not None:
+            return dict((relation, self.relations[relation]) for relation in program_database.IDB_relations)
+
+        if self.engine == 'topdown':
+            IDB = topdown.top_down_evaluation(program_database.rules, program_database.EDB, program_database.IDB, program_database.CDB, program_database.IDB_relations)
+        else:
+            IDB = self.bottom_up(program_database.rules, program_database.EDB, program_database.IDB, program_database.EDB_relations, program_database.IDB_relations)
+
+        self.relations = dict(program_database.EDB)
+        self.relations.update(IDB)
+
+        return IDB
+
+    def query(self, query, decode = True):
+        """
+        returns a data frame with the answers to a query, given as text like 'path(a, X)?' or as a parsed query,
+        with a column named after each variable of the query in the order they first appear
+        the values are symbols, integers and floats being numbers, or symbol ids if decode is False
+        """
+        if isinstance(query, str):
+            query = self.parse_query(query)
+
+        answers = self.answer(query)
+
+        # the last column is the context of the answers, which is always none
+        answers = answers.iloc[:, 0 : len(query.variables)]
+        answers.columns = list(query.variables)
+
+        return decode_data_frame(answers) if decode else answers
+
+    def rows(self, query):
+        """
+        returns an iterator over the answers to a query as tuples of symbols, in the order of the variables of the query
+        """
+        return self.query(query).itertuples(index = False, name = None)
+
+    def relation(self, relation, decode = True):
+        """
+        returns the data frame of all the facts of a relation, with a column for each argument and a last column for the context
+        the values are symbols, integers and floats being numbers, or symbol ids if decode is False
+        """
+        if self.relations is None:
+            self.evaluate()
+
+        if relation in self.relations:
+            data_frame = self.relations[relation]
+        elif relation in self.database.CDB:
+            data_frame = self.database.CDB[relation]
+        else:
+            raise KeyError('Unknown relation: ' + relation)
+
+        return decode_data_frame(data_frame) if decode else data_frame
+
+    def facts(self, relation):
+        """
+        returns an iterator over all the facts of a relation as tuples of symbols: the arguments, then the context
+        """
+        return self.relation(relation).itertuples(index = False, name = None)
+
+    def update(self, inserts = {}, deletes = {}):
+        """
+        deletes and then inserts a batch of facts, given as dictionaries mapping a relation name to a list of records
+        with the structure (argument_1, argument_2,..., context), and updates the derived facts incrementally
+        returns dictionaries mapping each changed relation to a data frame of the symbol ids of its inserted facts and of its deleted facts
+        """
+        program_database = self.database
+
+        if self.incremental is None:
+            derived = None if self.relations is None else dict((relation, self.relations[relation]) for relation in program_database.IDB_relations)
+            self.incremental = incremental.IncrementalDatabase(program_database.rules, program_database.EDB, program_database.IDB, program_database.CDB, program_database.EDB_relations, program_database.IDB_relations, program_database.CDB_relations, joins.join_backends[self.join](), planner.join_planners[self.join_order](), derived)
+
+        changes = self.incremental.update(inserts, deletes)
+
+        # queries are answered from the updated relations from now on
+        self.relations = self.incremental.relations
+        self.top_down = None
+
+        return changes
+
+    def explain(self, analyze = False):
+        """
+        returns the text of the physical plans of the rules evaluated bottom-up for the program and its queries,
+        with analyze, the program is evaluated and the plans are annotated with the rows and times of each of their nodes
+        """
+        return explain.explain(self, analyze)
+
+    def parse_query(self, text):
+        """
+        returns the parsed query of a query text
+        """
+        queries = [element for element in contelog.parse_program(text) or [] if element.type == 'query']
+
+        if len(queries) != 1:
+            raise ValueError('Expected a single query: ' + text)
+
+        return queries[0]
+
+    def answer(self, query):
+        """
+        returns the data frame of symbol ids of the answers to a parsed query, with the query's variables and the none context as columns
+        once the program is evaluated, the query is evaluated over its relations,
+        otherwise with the top-down engine, or by bottom-up evaluation of the rules rewritten with magic sets for the query
+        """
+        self.query_count += 1
+        query_rule = magic.get_query_rule(query, self.query_count)
+        arity = len(query.variables) + 1
+
+        if self.relations is None and self.engine == 'topdown':
+            if self.top_down is None:
+                self.top_down = topdown.TopDownEngine(self.database.rules, self.database.EDB, self.database.IDB, self.database.CDB)
+
+            self.top_down.add_rule(query_rule)
+
+            return self.top_down.query(query.name, arity)
+
+        if self.relations is None and self.magic_sets:
+            return self.answer_with_magic_sets(query_rule)
+
+        if self.relations is None:
+            self.evaluate()
+
+        return self.answer_from_relations(query_rule)
+
+    def answer_from_relations(self, query_rule):
+        """
+        returns the answers derived by a query rule in a single pass over the evaluated relations
+        """
+        program_database = self.database
+        arity = len(query_rule.head.arguments) + 1
+        body_relations = [predicate.name for predicate in query_rule.body if predicate.type != 'constraint']
+
+        if any(relation not in self.relations and relation not in program_database.CDB for relation in body_relations):
+            return empty_data_frame(range(0, arity))
+
+        join_planner = planner.join_planners[self.join_order]()
+
+        for relation in body_relations:
+            if relation in self.relations:
+                join_planner.statistics.update(('EDB', relation), self.relations[relation])
+            else:
+                join_planner.statistics.update(('CDB', relation), program_database.CDB[relation])
+
+        # the tracer, if any, records the query rule as a single pass of its own
+        start = time.perf_counter()
+        rule_plan = plans.RulePlan(query_rule, list(self.relations.keys()), [], program_database.CDB_relations)
+        answers = evaluation.execute_rules([rule_plan], {'EDB' : self.relations, 'CDB' : program_database.CDB}, joins.join_backends[self.join](), join_planner, None, self.tracer)[0]
+        answers = empty_data_frame(range(0, arity)) if answers is None else answers.drop_duplicates().reset_index(drop = True)
+
+        if self.tracer is not None:
+            self.tracer.record_iteration([query_rule.head.name], 1, time.perf_counter() - start, len(answers))
+
+        return answers
+
+    def answer_with_magic_sets(self, query_rule):
+        """
+        returns the answers derived by a query rule from the rules rewritten with magic sets for the bindings of the query
+        """
+        rules, EDB, IDB = self.get_magic_program(query_rule)
+        IDB = self.bottom_up(rules, EDB, IDB, list(EDB.keys()), list(IDB.keys()))
+
+        return IDB[query_rule.head.name].reset_index(drop = True)
+
+    def get_magic_program(self, query_rule):
+        """
+        returns the rules rewritten with magic sets for the bindings of a query rule, with their EDB and IDB relations
+        the facts of the program are read as loaded, the facts of IDB relations through their own EDB relations
+        """
+        program_database = self.database
+        IDB = program_database.IDB
+        head_relations = set(rule.head.name for rule in program_database.rules)
+
+        EDB = dict(program_database.EDB)
+        rules = list(self.rules)
+
+        for relation in head_relations:
+            if len(IDB[relation]):
+                EDB[magic.get_facts_name(relation)] = IDB[relation]
+                rules += magic.get_copy_rules(relation, len(IDB[relation].columns) - 1)
+
+        rules, seeds = magic.rewrite_rules(rules, [query_rule], head_relations)
+        rewritten_heads = set(rule.head.name for rule in rules)
+
+        # IDB relations of the rewritten rules, with the facts seeding the magic predicates
+        # the relations of the program derived by no rule keep their facts
+        rewritten_IDB = dict((relation, IDB[relation]) for relation in program_database.IDB_relations if relation not in head_relations)
+
+        seed_records = {}
+
+        for seed in seeds:
+            seed_records.setdefault(seed.predicate.name, []).append(seed.predicate.arguments + [seed.predicate.context])
+
+        for relation, records in seed_records.items():
+            data_frame = encode_records(pd.DataFrame(data = records, index = None, dtype = object))
+
+            if relation in rewritten_heads:
+                rewritten_IDB[relation] = data_frame
+            else:
+                EDB[relation] = data_frame
+
+        for rule in rules:
+            for predicate in [rule.head] + rule.body:
+                if predicate.type != 'constraint' and not (predicate.name in EDB or predicate.name in rewritten_IDB or predicate.name in program_database.CDB):
+                    rewritten_IDB[predicate.name] = empty_data_frame(range(0, len(predicate.arguments) + 1))
+
+        return rules, EDB, rewritten_IDB
+
+    def bottom_up(self, rules, EDB, IDB, EDB_relations, IDB_relations):
+        """
+        returns the data frames of the IDB relations derived by semi-naive bottom-up evaluation of rules,
+        reading the strata whose rules and facts did not change from the cache if there is one
+        """
+        CDB, CDB_relations = self.database.CDB, self.database.CDB_relations
+        evaluation_cache = None
+
+        if self.distributed:
+            return distributed.distributed_evaluation(rules, EDB, IDB, CDB, EDB_relations, IDB_relations, CDB_relations, self.distributed, joins.join_backends[self.join](), planner.join_planners[self.join_order]())
+
+        if self.cache_directory is not None:
+            evaluation_cache = cache.EvaluationCache(self.cache_directory)
+            evaluation_cache.prepare(rules, EDB, IDB, CDB)
+            cached_IDB = evaluation_cache.load_all(IDB, IDB_relations)
+
+            if cached_IDB is not None:
+                return cached_IDB
+
+        # the hash tables of the join backend are kept by relation name, which may be bound to other facts in another evaluation
+        return evaluation.bottom_up_evaluation(rules, EDB, IDB, CDB, EDB_relations, IDB_relations, CDB_relations, joins.join_backends[self.join](), planner.join_planners[self.join_order](), evaluation_cache, self.workers, self.partitions, self.context_partitions, self.tracer)
+
+    def __repr__(self):
+        return '%r' % (self.__dict__)
@@ -0,0 +1,233 @@
+import time
+import contexts
+import factsets
+import joins
+import parallel
+import planner
+import plans
+import strata
+
+def bottom_up_evaluation(rules, EDB, IDB, CDB, EDB_relations, IDB_relations, CDB_relations, join_backend = None, join_planner = None, cache = None, workers = 1, partitions = 1, context_partitions = 0, tracer = None):
+
+    # join backend used to join the predicates of rule bodies
+    if join_backend is None:
+        join_backend = joins.HashJoin()
+
+    # join planner ordering the predicates of rule bodies using statistics of the relations
+    if join_planner is None:
+        join_planner = planner.JoinPlanner()
+
+    # read-only views of the relations, sharing the buffers of the data frames of the database instead of copying them
+    EDB = factsets.get_views(EDB)
+    CDB = factsets.get_views(CDB)
+
+    # relations whose facts are all known: EDB relations, and IDB relations of the strata evaluated so far
+    # rule plans read them the same way as EDB relations
+    fixed = dict(EDB)
+    fixed_relations = list(EDB_relations)
+
+    # IDB relations which are not the head of any rule only hold the facts they start with
+    head_relations = [rule.head.name for rule in rules]
+
+    for relation in IDB_relations:
+        if relation not in head_relations:
+            fixed[relation] = IDB[relation]
+            fixed_relations.append(relation)
+
+    # statistics of the fixed relations and CDB relations do not change during the evaluation of a stratum
+    for relation in fixed_relations:
+        join_planner.statistics.update(('EDB', relation), fixed[relation])
+
+    for relation in CDB_relations:
+        join_planner.statistics.update(('CDB', relation), CDB[relation])
+
+    # inverted indexes of the CDB relations on their contexts and attributes
+    CDB_indexes = contexts.get_context_indexes(CDB)
+
+    evaluator = None
+
+    try:
+        # evaluate the strongly connected components of the predicate dependency graph in topological order
+        for stratum in strata.get_strata(rules):
+
+            # a stratum whose rules and input relations did not change since it was cached is read from the cache
+            stratum_IDB = None if cache is None else cache.load(stratum)
+
+            if stratum_IDB is None:
+
+                # with several workers, the rules of each iteration and their delta variants are evaluated in a pool of worker processes,
+                # started when the first stratum is evaluated, and with several partitions each delta variant is split into shards
+                if evaluator is None and (workers > 1 or partitions > 1):
+                    evaluator = parallel.ParallelEvaluator(workers, type(join_backend), type(join_planner), partitions)
+
+                # compile each rule once into an execution plan, reused in every iteration
+                rule_plans = [plans.RulePlan(rule, fixed_relations, stratum.relations, CDB_relations, CDB_indexes) for rule in stratum.rules]
+                stratum_IDB = dict((relation, IDB[relation]) for relation in stratum.relations)
+
+                # with context partitions, the rules of a stratum whose facts of a context only depend on the records of that context
+                # are evaluated once for each partition of the contexts
+                if context_partitions > 1 and contexts.is_context_local(stratum.rules):
+                    stratum_IDB = contexts.context_partitioned_evaluation(rule_plans, fixed, stratum_IDB, CDB, stratum.relations, stratum.recursive, join_backend, join_planner, evaluate_stratum, context_partitions, CDB_indexes, tracer)
+                else:
+                    stratum_IDB = evaluate_stratum(rule_plans, fixed, stratum_IDB, CDB, stratum.recursive, join_backend, join_planner, evaluator, tracer)
+
+                if cache is not None:
+                    cache.store(stratum, stratum_IDB)
+
+                # the old and delta records of the relations of the stratum are not read again
+                if evaluator is not None:
+                    evaluator.release(stratum.relations)
+
+            # the relations of the stratum are complete, later strata read them as fixed relations
+            for relation in stratum.relations:
+                fixed[relation] = stratum_IDB[relation]
+                fixed_relations.append(relation)
+                join_planner.statistics.update(('EDB', relation), fixed[relation])
+
+    finally:
+        if evaluator is not None:
+            evaluator.close()
+
+    return dict((relation, fixed[relation]) for relation in IDB_relations)
+
+def evaluate_stratum(rule_plans, EDB, IDB, CDB, recursive, join_backend, join_planner, evaluator = None, tracer = None):
+    """
+    evaluates the rules of a stratum over its IDB relations, until no new facts are derived if the stratum is recursive
+    """
+    if recursive:
+        return semi_naive_evaluation(rule_plans, EDB, IDB, CDB, list(IDB.keys()), join_backend, join_planner, evaluator, tracer)
+
+    return single_pass_evaluation(rule_plans, EDB, IDB, CDB, join_backend, join_planner, evaluator, tracer)
+
+def execute_rules(rule_plans, databases, join_backend, join_planner, evaluator = None, tracer = None):
+    """
+    returns the facts derived by each rule plan from the relations in databases, as a list of data frames or None,
+    evaluating the rules one after another, or in the worker processes of a parallel evaluator
+    the tracer, if any, records each rule evaluated one after another
+    """
+    if evaluator is not None:
+        return evaluator.execute(rule_plans, databases)
+
+    if tracer is None:
+        return [rule_plan.execute(databases, join_backend, join_planner) for rule_plan in rule_plans]
+
+    results = []
+
+    for rule_plan in rule_plans:
+        tracer.start_rule(rule_plan, databases)
+        start = time.perf_counter()
+        new_facts = rule_plan.execute(databases, join_backend, join_planner, None, None, tracer)
+        tracer.end_rule(rule_plan, time.perf_counter() - start, 0 if new_facts is None else len(new_facts))
+        results.append(new_facts)
+
+    return results
+
+def single_pass_evaluation(rule_plans, EDB, IDB, CDB, join_backend, join_planner, evaluator = None, tracer = None):
+    """
+    evaluates the rules of a non-recursive stratum, whose rule bodies only read fixed relations, in a single pass
+    the tracer, if any, records the pass as a single iteration
+    """
+    start = time.perf_counter()
+    databases = {'EDB' : EDB, 'CDB' : CDB}
+    initial_count = get_count(IDB)
+
+    # facts of each relation, starting with the facts it holds, the facts derived being added when they are not known
+    fact_sets = dict((relation, factsets.FactSet(IDB[relation].columns)) for relation in IDB.keys())
+    derived_rows = dict((relation, [0, 0]) for relation in IDB.keys())
+
+    for relation in IDB.keys():
+        fact_sets[relation].add(IDB[relation])
+
+    for rule_plan, new_facts in zip(rule_plans, execute_rules(rule_plans, databases, join_backend, join_planner, evaluator, tracer)):
+
+        if new_facts is not None:
+            added = fact_sets[rule_plan.head_name].add(new_facts)
+            derived_rows[rule_plan.head_name][0] += len(new_facts)
+            derived_rows[rule_plan.head_name][1] += added
+
+    IDB = dict((relation, fact_set.get_data_frame()) for relation, fact_set in fact_sets.items())
+
+    if tracer is not None:
+        for relation, (rows, added) in derived_rows.items():
+            tracer.record_dedup(relation, None, rows, added)
+
+        tracer.record_iteration(list(IDB.keys()), 1, time.perf_counter() - start, get_count(IDB) - initial_count)
+
+    return IDB
+
+def semi_naive_evaluation(rule_plans, EDB, IDB, CDB, IDB_relations, join_backend, join_planner, evaluator = None, tracer = None):
+    """
+    evaluates the rules of a recursive stratum until no new facts are derived
+    the facts of each relation are kept in a fact set, in the order they were derived: the old facts are the records before the delta,
+    and the delta the records added in the last iteration, so that the facts derived in an iteration which are not known are found
+    and added in time proportional to their number, without copying the facts known
+    the tracer, if any, records the time and the number of new facts of each iteration
+    """
+    fact_sets = dict((relation, factsets.FactSet(IDB[relation].columns)) for relation in IDB_relations)
+
+    # the facts the relations start with are the first delta
+    for relation in IDB_relations:
+        fact_sets[relation].add(IDB[relation])
+
+    # position of the first record of the delta of each relation
+    delta_starts = dict((relation, 0) for relation in IDB_relations)
+
+    # rules without IDB predicates of the stratum in their body derive all their facts in the first iteration
+    first_iteration = True
+    iteration = 0
+
+    while(True):
+        iteration += 1
+        start = time.perf_counter()
+
+        # old facts, from T(i-2), and delta, from T(i-1), viewing the records of the fact sets
+        # the facts derived in the current step T(i) are added after them
+        delta_ends = dict((relation, len(fact_sets[relation])) for relation in IDB_relations)
+        IDB_old = dict((relation, fact_sets[relation].get_data_frame(0, delta_starts[relation])) for relation in IDB_relations)
+        IDB_delta = dict((relation, fact_sets[relation].get_data_frame(delta_starts[relation], delta_ends[relation])) for relation in IDB_relations)
+
+        # update the statistics of IDB old and delta relations, so that rule bodies are planned for the current sizes
+        for relation in IDB_relations:
+            join_planner.statistics.update(('IDB_old', relation), IDB_old[relation])
+            join_planner.statistics.update(('IDB_delta', relation), IDB_delta[relation])
+
+        databases = {'EDB' : EDB, 'CDB' : CDB, 'IDB_old' : IDB_old, 'IDB_delta' : IDB_delta}
+
+        # rules without IDB predicates of the stratum are only evaluated in the first iteration
+        iteration_plans = [rule_plan for rule_plan in rule_plans if first_iteration or len(rule_plan.IDB_scans)]
+
+        # processing each rule, adding the facts it derived which are not known, in the old facts, the delta or the facts derived before
+        for rule_plan, new_facts in zip(iteration_plans, execute_rules(iteration_plans, databases, join_backend, join_planner, evaluator, tracer)):
+
+            if new_facts is not None:
+                added = fact_sets[rule_plan.head_name].add(new_facts)
+
+                if tracer is not None:
+                    tracer.record_dedup(rule_plan.head_name, rule_plan, len(new_facts), added)
+
+        first_iteration = False
+
+        # the delta becomes old, and the facts added become the delta
+        delta_starts = delta_ends
+
+        # if no new facts are derived, then the evaluation is complete
+        count = sum(len(fact_sets[relation]) - delta_starts[relation] for relation in IDB_relations)
+
+        if tracer is not None:
+            tracer.record_iteration(IDB_relations, iteration, time.perf_counter() - start, count)
+
+        if count == 0:
+            break
+
+    return dict((relation, fact_sets[relation].get_data_frame()) for relation in IDB_relations)
+
+def get_count(DB):
+    """
+    returns the count of all the rows in all the data frames in a dictionary of data frames
+    """
+    count = 0
+
+    for key in DB.keys():
+            count += len(DB[key].axes[0])
+
+    return count
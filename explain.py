@@ -0,0 +1,364 @@
+import contexts
+import magic
+import planner
+import plans
+import profiler
+import strata
+
+def explain(program_engine, analyze = False):
+    """
+    returns the text of the physical plans of the rules an engine evaluates bottom-up for its program:
+    the strata in the order they are evaluated, and for each rule the scans of its body in the order of the rule plan with their filters,
+    the semi-naive delta variants, the join order chosen by the join planner with the variables of each join or the cross joins,
+    the constraints and the projection on the rule head
+    with queries, the plans are the ones of the rules rewritten with magic sets for each query, or of the program and of the query rules
+
+    without analyze, the program is not evaluated, and the join orders are the ones the join planner chooses
+    for the facts the relations start with
+    with analyze, the program is evaluated, and each node of the plans is annotated with the rows it read and produced and its time,
+    summed over the iterations, with the join orders actually taken
+    """
+    if program_engine.engine == 'topdown':
+        return 'top-down evaluation: the queries are resolved against the rules by tabled resolution, without physical plans\n'
+
+    lines = []
+
+    if analyze and (program_engine.workers > 1 or program_engine.partitions > 1 or program_engine.distributed):
+        lines.append('the rules evaluated by worker processes are not recorded, their plans are not annotated')
+
+    # the engine tracer is replaced while the program is evaluated, each evaluation being profiled on its own
+    tracer = program_engine.tracer
+    program_database = program_engine.database
+
+    try:
+        # without magic sets, the program is evaluated once, then each query rule is evaluated over the evaluated relations
+        if not len(program_engine.queries) or not program_engine.magic_sets:
+            lines += explain_program(program_engine, program_database.rules, program_database.EDB, program_database.IDB, analyze, program_engine.evaluate)
+
+        for query in program_engine.queries:
+            query_rule = magic.get_query_rule(query, program_engine.query_count + 1)
+            lines.append('query ' + profiler.get_rule_text(query_rule))
+
+            if program_engine.magic_sets and program_engine.relations is None:
+                rules, EDB, IDB = program_engine.get_magic_program(query_rule)
+                lines += indent(explain_program(program_engine, rules, EDB, IDB, analyze, lambda: program_engine.answer(query)))
+
+                # the queries are numbered as if they were answered
+                if not analyze:
+                    program_engine.query_count += 1
+
+                continue
+
+            lines += indent(explain_query(program_engine, query, query_rule, analyze))
+
+    finally:
+        program_engine.tracer = tracer
+
+    return '\n'.join(lines) + '\n'
+
+def explain_program(program_engine, rules, EDB, IDB, analyze, run):
+    """
+    returns the lines of the plans of the strata of rules over relations starting with the facts of EDB and IDB,
+    with analyze, the plans are annotated with the profile of run, the function evaluating them
+    """
+    program_database = program_engine.database
+    CDB = program_database.CDB
+    records = None
+    evaluated = {}
+
+    if analyze:
+        program_engine.tracer = profiler.Profiler(memory = False)
+        evaluated = run()
+
+        if not isinstance(evaluated, dict):
+            evaluated = {}
+
+        records = get_records(program_engine.tracer)
+
+    join_planner = planner.join_planners[program_engine.join_order]()
+
+    # relations whose facts are all known when a stratum is evaluated, read as EDB relations, like the bottom-up evaluation does
+    head_relations = set(rule.head.name for rule in rules)
+    fixed = dict(EDB)
+    fixed.update((relation, data_frame) for relation, data_frame in IDB.items() if relation not in head_relations)
+
+    for relation, data_frame in fixed.items():
+        join_planner.statistics.update(('EDB', relation), data_frame)
+
+    for relation, data_frame in CDB.items():
+        join_planner.statistics.update(('CDB', relation), data_frame)
+
+    lines = []
+
+    for number, stratum in enumerate(strata.get_strata(rules)):
+        evaluation = 'semi-naive evaluation' if stratum.recursive else 'single pass'
+
+        if program_engine.context_partitions > 1 and contexts.is_context_local(stratum.rules):
+            evaluation += ', once for each of %d context partitions' % (program_engine.context_partitions)
+
+        lines.append('stratum %d: %s (%s)' % (number + 1, ', '.join(stratum.relations), evaluation))
+
+        if records is not None:
+            lines.append('  ' + get_stratum_annotation(records['iterations'].get(tuple(stratum.relations))))
+
+        # the old and delta relations are planned with the facts the relations start with
+        for relation in stratum.relations:
+            join_planner.statistics.update(('IDB_old', relation), IDB[relation])
+            join_planner.statistics.update(('IDB_delta', relation), IDB[relation])
+
+        databases = {'EDB' : fixed, 'CDB' : CDB, 'IDB_old' : IDB, 'IDB_delta' : IDB}
+
+        for rule in stratum.rules:
+            rule_plan = plans.RulePlan(rule, list(fixed.keys()), stratum.relations, program_database.CDB_relations)
+            lines += indent(explain_rule_plan(rule_plan, databases, join_planner, None if records is None else records['rules']))
+
+        # later strata read the relations of the stratum as fixed relations, with their facts once evaluated
+        for relation in stratum.relations:
+            fixed[relation] = evaluated.get(relation, IDB[relation])
+            join_planner.statistics.update(('EDB', relation), fixed[relation])
+
+    if records is not None:
+        lines.append('total: %s' % (get_milliseconds(records['seconds'])))
+
+    return lines
+
+def explain_query(program_engine, query, query_rule, analyze):
+    """
+    returns the lines of the plan of a query rule evaluated in a single pass over the relations of the program,
+    with analyze, annotated with the profile of its answer
+    """
+    program_database = program_engine.database
+    records = None
+
+    if analyze:
+        program_engine.tracer = profiler.Profiler(memory = False)
+        program_engine.answer(query)
+        records = get_records(program_engine.tracer)
+    else:
+        program_engine.query_count += 1
+
+    # the relations are the evaluated ones once the program is evaluated, otherwise the facts they start with
+    relations = program_engine.relations
+
+    if relations is None:
+        relations = dict(program_database.EDB)
+        relations.update(program_database.IDB)
+
+    join_planner = planner.join_planners[program_engine.join_order]()
+
+    for relation, data_frame in relations.items():
+        join_planner.statistics.update(('EDB', relation), data_frame)
+
+    for relation, data_frame in program_database.CDB.items():
+        join_planner.statistics.update(('CDB', relation), data_frame)
+
+    missing = [predicate.name for predicate in query_rule.body if predicate.type != 'constraint' and predicate.name not in relations and predicate.name not in program_database.CDB]
+
+    if len(missing):
+        return ['no answers: unknown relations ' + ', '.join(missing)]
+
+    lines = ['single pass over the evaluated relations']
+
+    if records is not None:
+        lines.append('  ' + get_stratum_annotation(records['iterations'].get((query_rule.head.name,))))
+
+    rule_plan = plans.RulePlan(query_rule, list(relations.keys()), [], program_database.CDB_relations)
+    lines += indent(explain_rule_plan(rule_plan, {'EDB' : relations, 'CDB' : program_database.CDB}, join_planner, None if records is None else records['rules']))
+
+    return lines
+
+def explain_rule_plan(rule_plan, databases, join_planner, rule_records = None):
+    """
+    returns the lines of the plan of a rule: its scans, each delta variant with its joins and constraints, and its projection
+    with the records of the rules of a profile, the rule, its variants and their joins are annotated with the rows and times recorded
+    """
+    rule_text = profiler.get_rule_text(rule_plan.rule)
+    record = None if rule_records is None else rule_records.get(rule_text)
+    lines = ['rule ' + rule_text]
+
+    if rule_records is not None:
+        lines.append('  ' + get_rule_annotation(record))
+
+    predicates = [predicate for predicate in rule_plan.rule.body if predicate.type != 'constraint']
+
+    # records of each scan read from each source, as the estimates of the join planner
+    scanned = {}
+
+    for index, (scan, predicate) in enumerate(zip(rule_plan.scans, predicates)):
+        sources = set(sources[index] for sources in rule_plan.variants)
+        rows = []
+
+        for source in sorted(sources):
+            scanned[(index, source)] = scan.evaluate(databases[source][scan.name])
+            rows.append('%s %d rows' % (source, len(scanned[(index, source)])))
+
+        # the rows actually read by each variant are annotated with the variants
+        if rule_records is None:
+            lines.append('  scan %d: %s from %s (%s)' % (index, profiler.get_predicate_text(predicate), scan.database, ', '.join(rows)))
+        else:
+            lines.append('  scan %d: %s from %s' % (index, profiler.get_predicate_text(predicate), scan.database))
+
+        for scan_filter in get_scan_filters(scan):
+            lines.append('    ' + scan_filter)
+
+    for number, sources in enumerate(rule_plan.variants):
+        variant_record = None if record is None else record['variants'].get(tuple(sources))
+        lines.append('  variant %d: %s' % (number + 1, ', '.join('scan %d %s' % (index, source) for index, source in enumerate(sources))))
+
+        if rule_records is None or variant_record is None:
+            inputs = [scanned[(index, source)] for index, source in enumerate(sources)]
+            order = join_planner.order([(list(data_frame.columns), len(data_frame), scan.get_statistics_key(source), scan.positions) for data_frame, scan, source in zip(inputs, rule_plan.scans, sources)])
+
+            if rule_records is not None:
+                lines.append('    not executed')
+
+            lines += indent(explain_joins(rule_plan, order), 2)
+            continue
+
+        lines.append('    executed %d times, %d skipped with an empty input, input rows %s' % (variant_record['executions'], variant_record['skipped'], ', '.join('scan %d %d' % (index, rows) for index, rows in enumerate(variant_record['input_rows']))))
+
+        for order, order_record in variant_record['orders'].items():
+            lines += indent(explain_joins(rule_plan, list(order), order_record), 2)
+
+    lines.append('  project %s(%s)' % (rule_plan.head_name, ', '.join(str(term) for term in rule_plan.head_header)))
+
+    return lines
+
+def explain_joins(rule_plan, order, order_record = None):
+    """
+    returns the lines of the joins of the scans of a rule plan in the given order, an inner join on the variables
+    shared with the scans joined before, or a cross join if they share none, then the constraints bound by the join and the columns it keeps
+    with the record of a join order of a profile, each join is annotated with the rows and times recorded
+    """
+    lines = ['join order: ' + ', '.join('scan %d' % (position) for position in order)]
+
+    if order_record is not None:
+        lines[0] += ' (taken %d times)' % (order_record['executions'])
+
+    columns = list(rule_plan.scans[order[0]].columns)
+    join_steps, unbound_constraints = rule_plan.get_join_steps(order)
+
+    for step, (position, join_columns, constraints, kept_columns) in enumerate(join_steps):
+        join_on = [column for column in columns if column in rule_plan.scans[position].columns]
+
+        if len(join_on):
+            line = '  hash join scan %d on %s' % (position, ', '.join(join_on))
+        else:
+            line = '  cross join scan %d, no shared variable' % (position)
+
+        if order_record is not None:
+            if step < len(order_record['steps']):
+                line += ': ' + get_join_annotation(order_record['steps'][step])
+            else:
+                line += ': not reached, an earlier join was empty'
+
+        lines.append(line)
+
+        for constraint in constraints:
+            lines.append('    filter %s %s %s' % constraint)
+
+        if len(kept_columns) < len(columns) + len([column for column in rule_plan.scans[position].columns if column not in columns]):
+            lines.append('    keep %s' % (', '.join(kept_columns) if len(kept_columns) else 'no column'))
+
+        columns = kept_columns
+
+    for constraint in unbound_constraints:
+        lines.append('  filter %s %s %s, on variables of no scan' % constraint)
+
+    return lines
+
+def get_scan_filters(scan):
+    """
+    returns the descriptions of the selections of a scan: constants, repeated variables, the not none context of a variable context,
+    the constraints on its variables only, the columns it keeps, and the context index reading the records of a constant context or of constant attributes
+    """
+    context_position = len(scan.header) - 1
+    filters = []
+
+    for position, symbol_id in scan.constant_selections:
+        filters.append('filter %s = %s' % (get_column_name(position, context_position), scan.header[position]))
+
+    for position_x, position_y in scan.variable_selections:
+        filters.append('filter %s = %s, repeated variable %s' % (get_column_name(position_x, context_position), get_column_name(position_y, context_position), scan.header[position_x]))
+
+    if scan.context_position is not None:
+        filters.append('filter context != none, variable context %s' % (scan.header[context_position]))
+
+    for constraint in scan.constraints:
+        filters.append('filter %s %s %s' % constraint)
+
+    # the columns of the variables needed by no other predicate, the head or the constraints applied by the joins are not kept
+    if len(scan.columns) < len(scan.variable_positions):
+        filters.append('keep %s' % (', '.join(scan.columns) if len(scan.columns) else 'no column, existence check'))
+
+    constants = set(position for position, symbol_id in scan.constant_selections)
+
+    if scan.database == 'CDB' and (context_position in constants or (len(constants) == context_position and context_position > 0)):
+        filters.append('read through the context index of ' + scan.name)
+
+    return filters
+
+def get_column_name(position, context_position):
+    return 'context' if position == context_position else 'argument %d' % (position + 1)
+
+def get_records(tracer):
+    """
+    returns the records of the profile of a profiler summed over the iterations: the iterations of each stratum keyed by its relations,
+    and the rules keyed by their text, with the records of their variants keyed by their sources, and of their join orders
+    """
+    iterations = {}
+    rules = {}
+
+    for iteration in tracer.iterations:
+        stratum = iterations.setdefault(tuple(iteration['relations']), {'iterations' : 0, 'seconds' : 0.0, 'new_facts' : 0})
+        stratum['iterations'] += 1
+        stratum['seconds'] += iteration['seconds']
+        stratum['new_facts'] += iteration['new_facts']
+
+        for rule in iteration['rules']:
+            record = rules.setdefault(rule['rule'], {'executions' : 0, 'seconds' : 0.0, 'derived_rows' : 0, 'variants' : {}})
+            record['executions'] += 1
+            record['seconds'] += rule['seconds']
+            record['derived_rows'] += rule['derived_rows']
+
+            for variant in rule['variants']:
+                variant_record = record['variants'].setdefault(tuple(variant['sources']), {'executions' : 0, 'skipped' : 0, 'input_rows' : [0] * len(variant['input_rows']), 'orders' : {}})
+                variant_record['executions'] += 1
+                variant_record['input_rows'] = [total + rows for total, rows in zip(variant_record['input_rows'], variant['input_rows'])]
+
+                if variant['order'] is None:
+                    variant_record['skipped'] += 1
+                    continue
+
+                order_record = variant_record['orders'].setdefault(tuple(variant['order']), {'executions' : 0, 'steps' : []})
+                order_record['executions'] += 1
+
+                for step, join in enumerate(variant['joins']):
+                    if step == len(order_record['steps']):
+                        order_record['steps'].append({'left_rows' : 0, 'right_rows' : 0, 'rows' : 0, 'seconds' : 0.0})
+
+                    for key in ['left_rows', 'right_rows', 'rows', 'seconds']:
+                        order_record['steps'][step][key] += join[key]
+
+    return {'iterations' : iterations, 'rules' : rules, 'seconds' : sum(stratum['seconds'] for stratum in iterations.values())}
+
+def get_stratum_annotation(record):
+    if record is None:
+        return 'actual: not evaluated, read from the cache or by worker processes'
+
+    return 'actual: %d iterations, %s, %d new facts' % (record['iterations'], get_milliseconds(record['seconds']), record['new_facts'])
+
+def get_rule_annotation(record):
+    if record is None:
+        return 'actual: not executed'
+
+    return 'actual: executed %d times, %s, %d rows derived' % (record['executions'], get_milliseconds(record['seconds']), record['derived_rows'])
+
+def get_join_annotation(record):
+    return '%d x %d rows -> %d rows, %s' % (record['left_rows'], record['right_rows'], record['rows'], get_milliseconds(record['seconds']))
+
+def get_milliseconds(seconds):
+    return '%.3f ms' % (seconds * 1000)
+
+def indent(lines, levels = 1):
+    return ['  ' * levels + line for line in lines]
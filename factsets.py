@@ -0,0 +1,411 @@
+import numpy as np
+import pandas as pd
+from symbols import SYMBOL_DTYPE
+
+# states of the slots of a key table
+EMPTY = 0
+FULL = 1
+REMOVED = 2
+
+class FactSet(object):
+
+    def __init__(self, columns, keyed = True, capacity = 1024):
+        """
+        facts of a relation held in a growing array of symbol ids, in the order they were added,
+        with the 64-bit key of each record mapped to its position in a key table updated in place if keyed,
+        so that adding and removing facts costs time in the number of facts added or removed, not in the number of facts known
+
+        the records already known are not copied when facts are appended, except when the array is full and its capacity doubles,
+        and the data frames of the facts are views of the array: when facts are removed while views of the array were returned,
+        the records are copied to a new array before they move, so that the views keep the records they had
+        the key of a record is its columns packed into 64 bits when its symbol ids fit, or otherwise a 64-bit fingerprint of its columns,
+        a record is compared with the record known under its fingerprint, and a distinct record whose fingerprint is already taken
+        is kept with its position in a dictionary of collisions, so that no fact is lost or duplicated when fingerprints collide
+        """
+        self.columns = list(columns)
+        self.values = np.empty((capacity, len(self.columns)), dtype = SYMBOL_DTYPE)
+        self.count = 0
+
+        # position of the record of each key known, and bits of each column of a key, None once the keys are fingerprints
+        self.keys = KeyTable() if keyed else None
+        self.bits = 63 // max(len(self.columns), 1)
+
+        # records whose fingerprint is the key of another record, as tuples, mapped to their positions
+        self.collisions = {}
+
+        # whether a data frame viewing the array was returned since the array was last copied
+        self.viewed = False
+
+    def __len__(self):
+        return self.count
+
+    def add(self, data_frame):
+        """
+        appends the records of a data frame which are not known yet, each once, and returns their number
+        """
+        values = get_values(data_frame)
+
+        if not len(values):
+            return 0
+
+        keys = self.get_keys(values)
+
+        # records not known, the first record of each key being kept, so that each is kept once
+        positions = np.flatnonzero(self.keys.lookup(keys) == -1)
+
+        if len(self.collisions):
+            positions = np.array([position for position in positions.tolist() if tuple(values[position].tolist()) not in self.collisions], dtype = np.int64)
+
+        positions = positions[~pd.Series(keys[positions]).duplicated().values]
+
+        # then the keys of the records kept are mapped to their positions among the records known
+        self.keys.insert(keys[positions], np.arange(self.count, self.count + len(positions), dtype = np.int64))
+        self.append_values(values[positions])
+
+        if self.bits is None:
+            return len(positions) + self.add_collisions(values, keys)
+
+        return len(positions)
+
+    def add_collisions(self, values, keys):
+        """
+        appends the records whose fingerprint is the key of a different record known, each once, and returns their number
+        """
+        added = 0
+
+        for position in np.flatnonzero((self.values[self.keys.lookup(keys)] != values).any(axis = 1)).tolist():
+            record = tuple(values[position].tolist())
+
+            if record not in self.collisions:
+                self.collisions[record] = self.count
+                self.append_values(values[position : position + 1])
+                added += 1
+
+        return added
+
+    def append(self, data_frame):
+        """
+        appends the records of a data frame known to be distinct from each other and from the records known
+        """
+        values = get_values(data_frame)
+
+        if self.keys is not None and len(values):
+            keys = self.get_keys(values)
+            positions = np.arange(self.count, self.count + len(values), dtype = np.int64)
+
+            # with fingerprints, the records whose fingerprint is already taken are collisions
+            if self.bits is None:
+                taken = self.keys.lookup(keys) != -1
+                self.keys.map_keys_to_values(keys[~taken], positions[~taken])
+                taken |= self.keys.lookup(keys) != positions
+
+                for position in np.flatnonzero(taken).tolist():
+                    self.collisions[tuple(values[position].tolist())] = self.count + position
+            else:
+                self.keys.insert(keys, positions)
+
+        self.append_values(values)
+
+    def append_values(self, values):
+        if self.count + len(values) > len(self.values):
+            grown = np.empty((max(2 * len(self.values), self.count + len(values)), len(self.columns)), dtype = SYMBOL_DTYPE)
+            grown[0 : self.count] = self.values[0 : self.count]
+            self.values = grown
+            self.viewed = False
+
+        self.values[self.count : self.count + len(values)] = values
+        self.count += len(values)
+
+    def get_positions(self, data_frame):
+        """
+        returns the position of each record of a data frame among the records known, or -1 for the records not known
+        """
+        values = get_values(data_frame)
+
+        if not len(values):
+            return np.empty(0, dtype = np.int64)
+
+        positions = self.keys.lookup(self.get_keys(values))
+
+        if self.bits is None:
+            found = np.flatnonzero(positions >= 0)
+            positions[found[(self.values[positions[found]] != values[found]).any(axis = 1)]] = -1
+
+            if len(self.collisions):
+                for position in np.flatnonzero(positions == -1).tolist():
+                    positions[position] = self.collisions.get(tuple(values[position].tolist()), -1)
+
+        return positions
+
+    def remove(self, data_frame):
+        """
+        removes the records of a data frame which are known, and returns a data frame of them, each once
+        the last records are moved to the positions of the removed records, so that removing facts costs time in the number of facts removed,
+        except when data frames viewing the records were returned, which keep their records as the records are first copied to a new array
+        """
+        positions = self.get_positions(data_frame)
+        positions = np.unique(positions[positions >= 0])
+        removed = pd.DataFrame(self.values[positions], columns = self.columns)
+
+        if not len(positions):
+            return removed
+
+        self.map_positions(self.values[positions], positions, np.full(len(positions), -1, dtype = np.int64))
+
+        # the last records which are not removed fill the positions of the removed records before the new end
+        count = self.count - len(positions)
+        holes = positions[positions < count]
+        moved = np.setdiff1d(np.arange(count, self.count, dtype = np.int64), positions)
+
+        if len(holes):
+            if self.viewed:
+                self.values = self.values.copy()
+                self.viewed = False
+
+            self.values[holes] = self.values[moved]
+            self.map_positions(self.values[holes], moved, holes)
+
+        self.count = count
+
+        return removed
+
+    def map_positions(self, values, positions, new_positions):
+        """
+        maps the records known at positions to new positions, -1 to forget them, in the hash table or in the dictionary of collisions
+        """
+        keys = self.get_keys(values)
+        keyed = self.keys.lookup(keys) == positions
+        forgotten = new_positions == -1
+        self.keys.map_keys_to_values(keys[keyed & ~forgotten], new_positions[keyed & ~forgotten])
+        self.keys.remove(keys[keyed & forgotten])
+
+        for position in np.flatnonzero(~keyed).tolist():
+            record = tuple(values[position].tolist())
+
+            if new_positions[position] == -1:
+                self.collisions.pop(record)
+            else:
+                self.collisions[record] = int(new_positions[position])
+
+    def get_keys(self, values):
+        """
+        returns the keys of records of symbol ids, the keys of all the records known becoming fingerprints
+        the first time a symbol id does not fit in the bits of its column
+        """
+        if self.bits is not None and (values.min() < 0 or values.max() >> self.bits):
+            self.bits = None
+            self.keys = KeyTable()
+
+            # the records known are distinct, the ones whose fingerprint is taken by a later record are collisions
+            fingerprints = get_fingerprints(self.values[0 : self.count])
+            self.keys.map_locations(fingerprints)
+
+            for position in np.flatnonzero(self.keys.lookup(fingerprints) != np.arange(0, self.count)).tolist():
+                self.collisions[tuple(self.values[position].tolist())] = position
+
+        if self.bits is None:
+            return get_fingerprints(values)
+
+        keys = values[:, 0].copy()
+
+        for position in range(1, values.shape[1]):
+            keys <<= self.bits
+            keys |= values[:, position]
+
+        return keys
+
+    def get_data_frame(self, start = 0, end = None):
+        """
+        returns a read-only data frame viewing the records from start to end, all the records by default
+        """
+        values = self.values[start : self.count if end is None else end]
+        values.flags.writeable = False
+        self.viewed = True
+
+        return pd.DataFrame(values, columns = self.columns, copy = False)
+
+    def __repr__(self):
+        return '%r' % (self.__dict__)
+
+class KeyTable(object):
+
+    def __init__(self, capacity = 1024):
+        """
+        hash table of 64-bit keys mapped to positions, read and updated with arrays of keys
+        the keys are kept in arrays with open addressing and linear probing, each probe being a step over all the keys still probing,
+        a removed key leaving a tombstone that lookups probe past, and the table doubles once its keys and tombstones fill half of it
+        """
+        self.keys = np.empty(capacity, dtype = np.int64)
+        self.positions = np.empty(capacity, dtype = np.int64)
+        self.states = np.zeros(capacity, dtype = np.int8)
+
+        # number of slots holding a key, and of slots holding a tombstone
+        self.count = 0
+        self.removed = 0
+
+    def lookup(self, keys):
+        """
+        returns the position of each key of an array of keys, or -1 for the keys not mapped
+        """
+        slots = self.find(keys)
+        positions = np.full(len(keys), -1, dtype = np.int64)
+        positions[slots >= 0] = self.positions[slots[slots >= 0]]
+
+        return positions
+
+    def find(self, keys):
+        """
+        returns the slot of each key of an array of keys, or -1 for the keys not mapped
+        """
+        slots = np.full(len(keys), -1, dtype = np.int64)
+        pending = np.arange(0, len(keys), dtype = np.int64)
+        probes = self.get_slots(keys)
+
+        # the keys still probing stop at their own key or at an empty slot
+        while len(pending):
+            states = self.states[probes]
+            found = (states == FULL) & (self.keys[probes] == keys[pending])
+            slots[pending[found]] = probes[found]
+
+            probing = ~found & (states != EMPTY)
+            pending = pending[probing]
+            probes = (probes[probing] + 1) & (len(self.keys) - 1)
+
+        return slots
+
+    def map_locations(self, keys):
+        """
+        maps each key of an array of keys to its position in the array, a key found several times to its last position
+        """
+        self.map_keys_to_values(keys, np.arange(0, len(keys), dtype = np.int64))
+
+    def map_keys_to_values(self, keys, values):
+        """
+        maps each key of an array of keys to the value at the same position, a key found several times to its last value
+        """
+        last = ~pd.Series(keys).duplicated(keep = 'last').values
+        keys = keys[last]
+        values = np.asarray(values, dtype = np.int64)[last]
+
+        slots = self.find(keys)
+        self.positions[slots[slots >= 0]] = values[slots >= 0]
+        self.insert(keys[slots < 0], values[slots < 0])
+
+    def insert(self, keys, values):
+        """
+        maps each key of an array of distinct keys which are not mapped yet to the value at the same position
+        """
+        if 2 * (self.count + self.removed + len(keys)) > len(self.keys):
+            self.resize(self.count + len(keys))
+
+        pending = np.arange(0, len(keys), dtype = np.int64)
+        probes = self.get_slots(keys)
+
+        # the keys still probing take a free slot, one key for each slot, and the others probe the next slots
+        while len(pending):
+            free = np.flatnonzero(self.states[probes] != FULL)
+            taken_slots, first = np.unique(probes[free], return_index = True)
+            taken = free[first]
+
+            self.removed -= int((self.states[taken_slots] == REMOVED).sum())
+            self.keys[taken_slots] = keys[pending[taken]]
+            self.positions[taken_slots] = values[pending[taken]]
+            self.states[taken_slots] = FULL
+            self.count += len(taken)
+
+            probing = np.ones(len(pending), dtype = bool)
+            probing[taken] = False
+            pending = pending[probing]
+            probes = (probes[probing] + 1) & (len(self.keys) - 1)
+
+    def remove(self, keys):
+        """
+        removes the keys of an array of keys which are mapped
+        """
+        slots = np.unique(self.find(keys))
+        slots = slots[slots >= 0]
+        self.states[slots] = REMOVED
+        self.count -= len(slots)
+        self.removed += len(slots)
+
+    def resize(self, count):
+        """
+        moves the keys to a table of at least four times count slots, without tombstones
+        """
+        full = self.states == FULL
+        keys, positions = self.keys[full], self.positions[full]
+        capacity = len(self.keys)
+
+        while capacity < 4 * count:
+            capacity *= 2
+
+        self.__init__(capacity)
+        self.insert(keys, positions)
+
+    def get_slots(self, keys):
+        """
+        returns the first slot probed for each key of an array of keys, from the high bits of a multiplicative hash of the key
+        """
+        bits = np.uint64(64 - (len(self.keys).bit_length() - 1))
+
+        return ((keys.view(np.uint64) * np.uint64(11400714819323198485)) >> bits).astype(np.int64)
+
+    def __len__(self):
+        return self.count
+
+    def __repr__(self):
+        return '%r' % (self.__dict__)
+
+def get_view(data_frame, positions = None, columns = None):
+    """
+    returns a data frame of the columns of a data frame at positions, all of them by default, renamed to columns,
+    sharing the buffers of the columns without copying them
+    the buffers are read-only through the view, so that writing to the view copies the columns written and leaves the data frame untouched
+    """
+    positions = range(0, len(data_frame.columns)) if positions is None else positions
+    columns = [data_frame.columns[position] for position in positions] if columns is None else columns
+
+    return get_columns_view([data_frame.iloc[:, position].values for position in positions], columns, len(data_frame))
+
+def get_columns_view(arrays, columns, row_count):
+    """
+    returns a data frame of the given columns, arrays of row_count values, sharing their buffers read-only like get_view
+    """
+    data = {}
+
+    for index, values in enumerate(arrays):
+        values = values.view()
+        values.flags.writeable = False
+        data[index] = values
+
+    view = pd.DataFrame(data, index = pd.RangeIndex(0, row_count), copy = False)
+    view.columns = columns
+
+    return view
+
+def get_views(DB):
+    """
+    returns a dictionary with a view of each data frame of a dictionary of data frames, like the relations of a database
+    """
+    return dict((relation, get_view(data_frame)) for relation, data_frame in DB.items())
+
+def get_values(data_frame):
+    """
+    returns the records of a data frame, or of an array, as an array of symbol ids
+    """
+    values = data_frame if isinstance(data_frame, np.ndarray) else data_frame.values
+
+    return values.astype(SYMBOL_DTYPE, copy = False)
+
+def get_fingerprints(values):
+    """
+    returns a 64-bit fingerprint of each record of symbol ids, mixing its columns one after another with a multiplicative hash
+    """
+    fingerprints = np.full(len(values), values.shape[1], dtype = np.uint64)
+
+    for position in range(0, values.shape[1]):
+        fingerprints ^= values[:, position].astype(np.uint64)
+        fingerprints *= np.uint64(11400714819323198485)
+        fingerprints ^= fingerprints >> np.uint64(29)
+
+    return fingerprints.view(np.int64)
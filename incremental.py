@@ -0,0 +1,511 @@
+import joins
+import planner
+import plans
+import strata
+import evaluation
+import factsets
+import numpy as np
+import pandas as pd
+from symbols import encode_records
+from elements import Rule, Predicate
+
+class IncrementalDatabase(object):
+
+    def __init__(self, rules, EDB, IDB, CDB, EDB_relations, IDB_relations, CDB_relations, join_backend = None, join_planner = None, derived = None):
+        """
+        database whose IDB relations are derived once by bottom-up evaluation,
+        then kept up to date as batches of facts are inserted into and deleted from its relations
+
+        derived holds the data frames of the IDB relations if they are already evaluated
+
+        insertions are propagated by semi-naive evaluation starting from the inserted facts as delta
+        deletions are propagated with the DRed algorithm: the facts with a derivation using a deleted fact are deleted,
+        then the deleted facts which still have a derivation are derived again and propagated as insertions
+        """
+        self.rules = rules
+        self.CDB = CDB
+        self.CDB_relations = CDB_relations
+        self.IDB_relations = IDB_relations
+        self.join_backend = joins.HashJoin() if join_backend is None else join_backend
+        self.join_planner = planner.JoinPlanner() if join_planner is None else join_planner
+        self.head_relations = set(rule.head.name for rule in rules)
+        self.strata = strata.get_strata(rules)
+
+        # current data frame of each relation: the given facts of relations not derived by rules, and all the facts of the others
+        self.relations = dict(EDB)
+
+        if derived is None:
+            derived = evaluation.bottom_up_evaluation(rules, EDB, IDB, CDB, EDB_relations, IDB_relations, CDB_relations, self.join_backend, self.join_planner)
+
+        self.relations.update(derived)
+
+        # fact sets of the records of the relations, which facts are added to and removed from in time proportional to the number of facts changed,
+        # the data frames of the relations viewing them
+        self.stores = {}
+
+        for relation, data_frame in self.relations.items():
+            self.stores[relation] = get_fact_set(data_frame.columns, data_frame)
+            self.relations[relation] = self.stores[relation].get_data_frame()
+
+        # facts given for the relations derived by rules, which are part of the relations whatever the rules derive
+        self.facts = dict((relation, get_fact_set(self.relations[relation].columns, IDB[relation])) for relation in IDB_relations if relation in self.head_relations)
+
+        # rule plans of the strata by varying relations, and plans deriving again the deleted facts by rule
+        self.rule_plans = {}
+        self.rederive_plans = {}
+
+        # scanned inputs of the fixed relations by relation and cache key, with the records changed since they were last updated,
+        # and relations changed since their statistics were updated
+        self.inputs = {}
+        self.changes = {}
+        self.changed = set(self.relations)
+
+        # the hash tables cached by the evaluation were built on other data frames than the inputs
+        self.join_backend.clear()
+
+    def update(self, inserts = {}, deletes = {}):
+        """
+        deletes and then inserts a batch of facts, given as dictionaries mapping a relation name to a list of records
+        with the structure (argument_1, argument_2,..., context) that is edge: [['a', 'b', 'none']], and updates the derived facts
+        returns dictionaries mapping each changed relation to a data frame of its inserted facts and of its deleted facts
+        """
+        deleted = self.delete(self.encode(deletes))
+        inserted = self.insert(self.encode(inserts))
+
+        return inserted, deleted
+
+    def encode(self, changes):
+        """
+        returns a dictionary of data frames of symbol ids from a dictionary of lists of records
+        """
+        encoded = {}
+
+        for relation, records in changes.items():
+            if not len(records):
+                continue
+
+            if relation in self.CDB_relations:
+                print('Contextual relations cannot be updated:', relation)
+                continue
+
+            data_frame = encode_records(pd.DataFrame(data = records, index = None, dtype = object))
+
+            if relation in self.relations and len(data_frame.columns) != len(self.relations[relation].columns):
+                print('Arity mismatch in the facts of ' + relation + ', expected', len(self.relations[relation].columns) - 1, 'arguments')
+                continue
+
+            encoded[relation] = data_frame
+
+        return encoded
+
+    def insert(self, inserts):
+        """
+        inserts facts into the relations and derives the new facts of the relations derived by rules, stratum by stratum
+        returns a dictionary of data frames of the facts inserted into each relation
+        """
+        inserted = {}
+
+        for relation, data_frame in inserts.items():
+            if relation in self.head_relations:
+                continue
+
+            if relation not in self.stores:
+                self.stores[relation] = factsets.FactSet(data_frame.columns)
+                self.rule_plans = {}
+                self.rederive_plans = {}
+
+            store = self.stores[relation]
+            start = len(store)
+
+            if store.add(data_frame):
+                inserted[relation] = store.get_data_frame(start).copy()
+                self.set_changed(relation, inserted = inserted[relation])
+
+        for stratum in self.strata:
+
+            # facts given for the relations of the stratum are new facts of these relations, unless they are already derived,
+            # and are appended to the relations from the start of the stratum on
+            starts = {}
+
+            for relation in stratum.relations:
+                store = self.stores[relation]
+                starts[relation] = len(store)
+
+                if relation in inserts:
+                    if relation not in self.facts:
+                        self.facts[relation] = factsets.FactSet(store.columns)
+
+                    start = len(self.facts[relation])
+                    self.facts[relation].add(inserts[relation])
+                    store.add(self.facts[relation].get_data_frame(start))
+
+            changed = dict((relation, inserted[relation]) for relation in get_body_relations(stratum.rules) if relation in inserted)
+
+            if not len(changed) and all(len(self.stores[relation]) == starts[relation] for relation in stratum.relations):
+                continue
+
+            for relation, rows in self.propagate(stratum, changed, starts).items():
+                if len(rows):
+                    inserted[relation] = rows
+
+        return inserted
+
+    def delete(self, deletes):
+        """
+        deletes facts from the relations and the facts of the relations derived by rules which are no longer derived, stratum by stratum
+        returns a dictionary of data frames of the facts deleted from each relation
+        """
+        deleted = {}
+
+        for relation, data_frame in deletes.items():
+            if relation in self.head_relations or relation not in self.stores:
+                continue
+
+            rows = self.stores[relation].remove(data_frame)
+
+            if len(rows):
+                self.set_changed(relation, deleted = rows)
+                deleted[relation] = rows
+
+        for stratum in self.strata:
+
+            # facts given for the relations of the stratum are deleted, and derived again if they still have a derivation
+            seeds = {}
+
+            for relation in stratum.relations:
+                seeds[relation] = self.relations[relation].iloc[0 : 0]
+
+                if relation in deletes and relation in self.facts:
+                    seeds[relation] = self.facts[relation].remove(deletes[relation])
+
+            changed = dict((relation, deleted[relation]) for relation in get_body_relations(stratum.rules) if relation in deleted)
+
+            if not len(changed) and not evaluation.get_count(seeds):
+                continue
+
+            overdeleted = self.overdelete(stratum, changed, seeds)
+            rederived = self.rederive(stratum, overdeleted)
+
+            for relation in stratum.relations:
+                rows = remove_rows(overdeleted[relation], rederived[relation])
+                if len(rows):
+                    deleted[relation] = rows
+
+        return deleted
+
+    def overdelete(self, stratum, changed, seeds):
+        """
+        deletes from the relations of a stratum the facts with a derivation using a deleted fact, starting from
+        the facts deleted from the relations read by the stratum, and the facts deleted from the relations of the stratum
+        returns a dictionary of data frames of the facts deleted from each relation of the stratum
+        """
+        varying = list(stratum.relations) + sorted(changed.keys())
+        rule_plans = self.compile(stratum.rules, varying, sorted(changed.keys()))
+
+        # the delta holds the facts deleted in the last iteration, and the old data frames the facts not deleted so far,
+        # so that each derivation using deleted facts is found in the iteration where the first of them is deleted,
+        # the old facts of the relations read by the stratum being their current facts, read as fixed inputs
+        old = {}
+        delta = dict(changed)
+        overdeleted = {}
+
+        for relation in stratum.relations:
+            delta[relation] = self.stores[relation].remove(seeds[relation])
+            old[relation] = self.stores[relation].get_data_frame()
+            overdeleted[relation] = [delta[relation]]
+
+        while evaluation.get_count(delta):
+            derived = self.execute(rule_plans, self.relations, old, delta)
+
+            for relation in changed.keys():
+                delta[relation] = delta[relation].iloc[0 : 0]
+
+            for relation in stratum.relations:
+                delta[relation] = self.stores[relation].remove(pd.concat(derived[relation], ignore_index = True))
+                old[relation] = self.stores[relation].get_data_frame()
+                overdeleted[relation].append(delta[relation])
+
+        for relation in stratum.relations:
+            overdeleted[relation] = pd.concat(overdeleted[relation], ignore_index = True)
+
+            if len(overdeleted[relation]):
+                self.set_changed(relation, deleted = overdeleted[relation])
+
+        return overdeleted
+
+    def rederive(self, stratum, overdeleted):
+        """
+        derives again the deleted facts of a stratum which still have a derivation from the remaining facts, or are given facts,
+        and adds them and their consequences back to the relations of the stratum
+        returns a dictionary of data frames of the facts added back to each relation of the stratum
+        """
+        # each rule is joined with the deleted facts of its head, so that only the derivations of the deleted facts are searched
+        body_relations = sorted(relation for relation in get_body_relations(stratum.rules) if relation in self.relations)
+        fixed = dict((relation, self.relations[relation]) for relation in body_relations)
+        self.refresh(body_relations)
+        rule_plans = []
+
+        for rule in stratum.rules:
+            relation = rule.head.name
+
+            if len(overdeleted[relation]):
+                fixed[get_deleted_name(relation)] = overdeleted[relation]
+                rule_plans.append(self.get_rederive_plan(rule, body_relations))
+
+        # the deleted facts are new on every deletion, their inputs, hash tables and statistics are built again
+        deleted_relations = [get_deleted_name(relation) for relation in stratum.relations if len(overdeleted[relation])]
+        self.join_backend.clear(set(('EDB', relation) for relation in deleted_relations))
+
+        for relation in deleted_relations:
+            self.inputs.pop(relation, None)
+            self.join_planner.statistics.update(('EDB', relation), fixed[relation])
+
+        self.set_fixed_inputs(rule_plans, fixed)
+        derived = self.execute(rule_plans, fixed, {}, {})
+        starts = {}
+
+        for relation in stratum.relations:
+            if relation in self.facts:
+                derived[relation].append(overdeleted[relation][self.facts[relation].get_positions(overdeleted[relation]) >= 0])
+
+            starts[relation] = len(self.stores[relation])
+
+            for data_frame in derived[relation]:
+                self.stores[relation].add(data_frame)
+
+        return self.propagate(stratum, {}, starts)
+
+    def propagate(self, stratum, changed, starts):
+        """
+        derives the new facts of the relations of a stratum by semi-naive evaluation, starting from the new facts
+        of the relations read by the stratum and the new facts of the stratum
+        the new facts of the stratum must already be appended to the fact sets of the relations, from the given start positions on
+        the old facts of the relations read by the stratum are their current facts, read as fixed inputs, whose derivations with the new facts
+        are derived again and found known
+        returns a dictionary of data frames of the new facts of each relation of the stratum
+        """
+        varying = list(stratum.relations) + sorted(changed.keys())
+        rule_plans = self.compile(stratum.rules, varying, sorted(changed.keys()))
+
+        old = {}
+        delta = dict(changed)
+        inserted = {}
+
+        for relation in stratum.relations:
+            old[relation] = self.stores[relation].get_data_frame(0, starts[relation])
+            delta[relation] = self.stores[relation].get_data_frame(starts[relation])
+
+        while evaluation.get_count(delta):
+            derived = self.execute(rule_plans, self.relations, old, delta)
+
+            for relation in changed.keys():
+                delta[relation] = delta[relation].iloc[0 : 0]
+
+            for relation in stratum.relations:
+                start = len(self.stores[relation])
+
+                for data_frame in derived[relation]:
+                    self.stores[relation].add(data_frame)
+
+                old[relation] = self.stores[relation].get_data_frame(0, start)
+                delta[relation] = self.stores[relation].get_data_frame(start)
+
+        # the new facts are copied, the records of the fact sets moving when facts are deleted
+        for relation in stratum.relations:
+            inserted[relation] = self.stores[relation].get_data_frame(starts[relation]).copy()
+
+            if len(inserted[relation]):
+                self.set_changed(relation, inserted = inserted[relation])
+
+        return inserted
+
+    def compile(self, rules, varying, fixed_old_relations):
+        """
+        returns the rule plans of the rules reading some of the varying relations, which are scanned as IDB old and delta relations,
+        except the old data frames of the fixed_old_relations, which are their current data frames scanned as fixed relations
+        the other relations are scanned as fixed relations
+        the rule plans are compiled once for the varying relations, which start with the relations of the stratum of the rules
+        """
+        fixed_relations = [relation for relation in self.relations.keys() if relation not in varying]
+
+        if tuple(varying) not in self.rule_plans:
+            rule_plans = []
+
+            for rule in rules:
+                if any(predicate.type != 'constraint' and predicate.name in varying for predicate in rule.body):
+                    rule_plans.append(plans.RulePlan(rule, fixed_relations, varying, self.CDB_relations, None, fixed_old_relations))
+
+            self.rule_plans[tuple(varying)] = rule_plans
+
+        self.refresh(fixed_relations + list(fixed_old_relations))
+        self.set_fixed_inputs(self.rule_plans[tuple(varying)], self.relations)
+
+        return self.rule_plans[tuple(varying)]
+
+    def get_rederive_plan(self, rule, body_relations):
+        """
+        returns the plan of a rule joined first with the deleted facts of its head, reading the relations of its body as fixed relations
+        """
+        if id(rule) not in self.rederive_plans:
+            relation = rule.head.name
+            deleted_rule = Rule(rule.head, [Predicate(get_deleted_name(relation), rule.head.arguments, rule.head.context)] + rule.body)
+            self.rederive_plans[id(rule)] = plans.RulePlan(deleted_rule, [get_deleted_name(relation)] + list(body_relations), [], self.CDB_relations)
+
+        return self.rederive_plans[id(rule)]
+
+    def set_fixed_inputs(self, rule_plans, fixed):
+        """
+        sets the scanned inputs of the fixed relations read by rule plans, scanning the data frames in fixed for the inputs not kept yet
+        the inputs are kept by cache key, shared by the scans of all the rule plans selecting the same records
+        """
+        for rule_plan in rule_plans:
+            for index, scan in enumerate(rule_plan.scans):
+                if scan.database == 'EDB' or scan.name in rule_plan.fixed_old_relations:
+                    cache_key = scan.get_cache_key('EDB')
+                    inputs = self.inputs.setdefault(scan.name, {})
+
+                    if cache_key not in inputs:
+                        inputs[cache_key] = FixedInput(scan, fixed[scan.name])
+
+                    rule_plan.fixed_inputs[index] = inputs[cache_key].data_frame
+
+    def refresh(self, relations):
+        """
+        applies the records inserted into and deleted from the given relations since they were last read as fixed relations
+        to their scanned inputs and to the hash tables of the inputs, and updates their statistics,
+        so that the cost of reading a changed relation grows with the records changed, not with the records of the relation
+        """
+        changed = self.changed.intersection(relations)
+
+        if not len(changed):
+            return
+
+        for relation in changed:
+            for inserted, deleted in self.changes.pop(relation, []):
+                for cache_key, fixed_input in self.inputs.get(relation, {}).items():
+                    written = fixed_input.insert(inserted) if inserted is not None else fixed_input.delete(deleted)
+                    self.join_backend.update(cache_key, fixed_input.data_frame, written, len(fixed_input.records))
+
+            self.join_planner.statistics.resize(('EDB', relation), self.relations[relation])
+
+        self.changed -= changed
+
+    def set_changed(self, relation, inserted = None, deleted = None):
+        """
+        views the current facts of a relation whose fact set changed, with the data frame of the facts inserted or deleted,
+        which are applied to its scanned inputs when the relation is next read as a fixed relation
+        """
+        self.relations[relation] = self.stores[relation].get_data_frame()
+        self.changed.add(relation)
+
+        if len(self.inputs.get(relation, {})):
+            self.changes.setdefault(relation, []).append((inserted, deleted))
+
+    def execute(self, rule_plans, fixed, old, delta):
+        """
+        executes rule plans once over the fixed relations and the old and delta data frames of the varying relations
+        returns a dictionary with a list of data frames of the facts derived for each relation
+        """
+        # the old data frames grow by the delta of each iteration, their distinct value counts are kept as estimates
+        for relation, data_frame in old.items():
+            self.join_planner.statistics.resize(('IDB_old', relation), data_frame)
+
+        for relation, data_frame in delta.items():
+            self.join_planner.statistics.update(('IDB_delta', relation), data_frame)
+
+        databases = {'EDB' : fixed, 'CDB' : self.CDB, 'IDB_old' : old, 'IDB_delta' : delta}
+        derived = dict((rule.head.name, [self.relations[rule.head.name].iloc[0 : 0]]) for rule in self.rules)
+
+        for rule_plan in rule_plans:
+            new_facts = rule_plan.execute(databases, self.join_backend, self.join_planner)
+
+            if new_facts is not None:
+                new_facts.columns = self.relations[rule_plan.head_name].columns
+                derived[rule_plan.head_name].append(new_facts)
+
+        return derived
+
+    def __repr__(self):
+        return '%r' % (self.__dict__)
+
+class FixedInput(object):
+
+    def __init__(self, scan, data_frame):
+        """
+        records of a fixed relation selected by a scan, kept with all their columns in a fact set, so that the records inserted into
+        and deleted from the relation are applied to them, and the data frame of the scan viewing their columns
+        the records are read without marking the fact set viewed, so that deleted records are filled in place,
+        the data frame of the scan being replaced after every change
+        """
+        self.scan = scan
+        self.records = factsets.FactSet(data_frame.columns, capacity = max(len(data_frame), 1024))
+        self.records.append(scan.select(data_frame))
+        self.data_frame = self.get_data_frame()
+
+    def insert(self, data_frame):
+        """
+        adds the records of a data frame selected by the scan, and returns the positions of the records written
+        """
+        start = len(self.records)
+        self.records.add(self.scan.select(data_frame))
+        self.data_frame = self.get_data_frame()
+
+        return np.arange(start, len(self.records), dtype = np.int64)
+
+    def delete(self, data_frame):
+        """
+        removes the records of a data frame, and returns the positions of the records written, the positions of the removed records
+        filled by the last records
+        """
+        positions = self.records.get_positions(data_frame)
+        positions = np.unique(positions[positions >= 0])
+        self.records.remove(data_frame)
+        self.data_frame = self.get_data_frame()
+
+        return positions[positions < len(self.records)]
+
+    def get_data_frame(self):
+        """
+        returns the data frame of the scan, viewing the columns of the records kept, or without columns and with at most one record
+        for a predicate without variables
+        """
+        values = self.records.values[0 : len(self.records)]
+
+        if not len(self.scan.columns):
+            return pd.DataFrame(index = range(0, min(len(values), 1)))
+
+        return factsets.get_columns_view([values[:, position] for position in self.scan.positions], self.scan.columns, len(values))
+
+    def __repr__(self):
+        return '%r' % (self.__dict__)
+
+def get_body_relations(rules):
+    """
+    returns the set of the relations read by the bodies of rules
+    """
+    return set(predicate.name for rule in rules for predicate in rule.body if predicate.type != 'constraint')
+
+def get_deleted_name(name):
+    return name + '.deleted'
+
+def get_fact_set(columns, data_frame):
+    """
+    returns a fact set of the given columns holding the records of a data frame
+    """
+    fact_set = factsets.FactSet(columns, capacity = max(len(data_frame), 1024))
+    fact_set.add(data_frame)
+
+    return fact_set
+
+def remove_rows(data_frame, rows):
+    """
+    returns the records of a data frame which are not among the records of rows, a data frame with the same columns
+    """
+    if not len(rows) or not len(data_frame):
+        return data_frame
+
+    removed = joins.HashIndex(rows, list(rows.columns)).probe(data_frame)[0]
+    mask = np.ones(len(data_frame), dtype = bool)
+    mask[removed] = False
+
+    return data_frame[mask].reset_index(drop = True)
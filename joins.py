@@ -0,0 +1,250 @@
+import numpy as np
+import pandas as pd
+
+# largest product of the key column ranges for which multi-column keys are packed into a single integer key
+MAX_PACKED_KEY = 2 ** 62
+
+class PandasJoin(object):
+    """
+    joins data frames with pandas merge
+    """
+
+    def join(self, left, right, on, cache_key = None, columns = None):
+        """
+        returns the inner join of two data frames on the columns in on, or their cross join if on is empty
+        the result has the columns of both data frames, with the columns in on appearing only once, or only the given columns if not None
+        """
+        if len(on):
+            joined = left.merge(right, on = on, how = 'inner')
+
+        # using a dummy column key to perform cross join, on copies so that the inputs are left untouched
+        else:
+            joined = left.assign(key = 0).merge(right.assign(key = 0), on = 'key', how = 'inner').drop(columns = ['key'])
+
+        return joined if columns is None or len(columns) == len(joined.columns) else joined[columns]
+
+    def clear(self, relations = None):
+        """
+        nothing is cached between joins
+        """
+        pass
+
+    def update(self, cache_key, data_frame, written, count):
+        """
+        nothing is cached between joins
+        """
+        pass
+
+class HashIndex(object):
+
+    def __init__(self, data_frame, on):
+        """
+        hash table over the join columns of a data frame, grouping the row positions of the data frame by key
+        """
+        self.data_frame = data_frame
+        self.on = on
+        columns = [data_frame[column].values for column in on]
+
+        # ranges of the key columns used to pack multi-column integer keys into a single integer key
+        self.packed = len(on) > 1 and all(column.dtype.kind in 'iu' and (len(column) == 0 or column.min() >= 0) for column in columns)
+        self.radixes = [int(column.max()) + 1 if len(column) else 1 for column in columns] if self.packed else []
+        self.packed = self.packed and np.prod([float(radix) for radix in self.radixes]) < MAX_PACKED_KEY
+
+        # group the rows by key: the hash table maps each distinct key to a group,
+        # and the rows of group g are order[starts[g] : starts[g] + counts[g]]
+        groups, keys = pd.factorize(self.get_keys(columns))
+        self.table = pd.Index(keys)
+        self.counts = np.bincount(groups, minlength = len(keys))
+        self.starts = np.cumsum(self.counts) - self.counts
+        self.order = np.argsort(groups, kind = 'stable')
+
+    def get_keys(self, columns):
+        """
+        returns one hashable key per row for the given key columns
+        """
+        if len(columns) == 1:
+            return columns[0]
+
+        if self.packed:
+            keys = np.zeros(len(columns[0]), dtype = np.int64)
+            for column, radix in zip(columns, self.radixes):
+                keys = keys * radix + column
+            return keys
+
+        return pd.MultiIndex.from_arrays(columns)
+
+    def probe(self, data_frame):
+        """
+        returns the row positions of the matching pairs of rows of a data frame and the indexed data frame
+        """
+        columns = [data_frame[column].values for column in self.on]
+
+        if len(columns) > 1 and self.packed:
+
+            # keys outside the ranges of the indexed columns cannot match, and would otherwise be packed wrongly
+            in_range = np.ones(len(data_frame), dtype = bool)
+            for column, radix in zip(columns, self.radixes):
+                in_range &= (column >= 0) & (column < radix)
+            columns = [np.where(in_range, column, 0) for column in columns]
+            groups = self.table.get_indexer(self.get_keys(columns))
+            groups[~in_range] = -1
+
+        else:
+            groups = self.table.get_indexer(self.get_keys(columns))
+
+        probe_rows = np.flatnonzero(groups >= 0)
+        groups = groups[probe_rows]
+        counts = self.counts[groups]
+        total = counts.sum()
+
+        # expand each matching probe row to all the rows of its group
+        offsets = np.arange(0, total) - np.repeat(np.cumsum(counts) - counts, counts)
+        indexed_rows = self.order[np.repeat(self.starts[groups], counts) + offsets]
+
+        return np.repeat(probe_rows, counts), indexed_rows
+
+class UpdatedIndex(object):
+
+    def __init__(self, index):
+        """
+        hash table of a data frame whose rows are overwritten, appended and removed from the end, like the records of a fact set:
+        the hash table it was built on, without the rows written or removed since, and a hash table of the rows written since,
+        so that an update costs time in the number of rows written, the whole hash table being built again
+        once the rows written or removed reach half of the rows it was built on
+        """
+        self.reset(index)
+
+    def reset(self, index):
+        self.base = index
+        self.on = index.on
+        self.data_frame = index.data_frame
+
+        # rows of the base hash table which were written or removed since it was built
+        self.stale = np.zeros(len(index.data_frame), dtype = bool)
+        self.stale_count = 0
+
+        # positions of the rows written since the base hash table was built, and their hash table
+        self.written = np.empty(0, dtype = np.int64)
+        self.delta = None
+
+    def update(self, data_frame, written, count):
+        """
+        updates the hash table for the current data frame, whose rows at the positions written changed or were appended,
+        and whose rows from count on were removed
+        """
+        base_rows = len(self.stale)
+        stale = np.concatenate([written[written < base_rows], np.arange(min(count, base_rows), base_rows, dtype = np.int64)])
+        self.stale_count += int((~self.stale[stale]).sum())
+        self.stale[stale] = True
+        self.written = np.union1d(self.written[self.written < count], written)
+        self.data_frame = data_frame
+
+        if 2 * (self.stale_count + len(self.written)) > max(base_rows, 1024):
+            self.reset(HashIndex(data_frame, self.on))
+            return
+
+        self.delta = HashIndex(pd.DataFrame(dict((column, data_frame[column].values[self.written]) for column in self.on), index = None, copy = False), self.on)
+
+    def probe(self, data_frame):
+        """
+        returns the row positions of the matching pairs of rows of a data frame and the indexed data frame, like HashIndex.probe
+        """
+        probe_rows, indexed_rows = self.base.probe(data_frame)
+        current = ~self.stale[indexed_rows]
+        probe_rows = probe_rows[current]
+        indexed_rows = indexed_rows[current]
+
+        if self.delta is None:
+            return probe_rows, indexed_rows
+
+        written_probe_rows, written_rows = self.delta.probe(data_frame)
+
+        return np.concatenate([probe_rows, written_probe_rows]), np.concatenate([indexed_rows, self.written[written_rows]])
+
+class HashJoin(object):
+    """
+    joins data frames with hash tables built on the join columns of the smaller input
+    hash tables built for inputs passed with a cache key are kept and reused by later joins with the same key,
+    the hash table of an input with a cache key being built even when it is the larger input, once, instead of scanning the input in every join
+    """
+
+    def __init__(self):
+        self.indexes = {}
+
+    def join(self, left, right, on, cache_key = None, columns = None):
+        """
+        returns the inner join of two data frames on the columns in on, or their cross join if on is empty
+        the result has the columns of both data frames, with the columns in on appearing only once, or only the given columns if not None,
+        the other columns not being taken from the inputs
+        """
+        if not len(on):
+            left_rows = np.repeat(np.arange(0, len(left)), len(right))
+            right_rows = np.tile(np.arange(0, len(right)), len(left))
+            return get_joined_data_frame(left, right, on, left_rows, right_rows, columns)
+
+        index_key = None if cache_key is None else (cache_key, tuple(on))
+
+        # probe the cached hash table of right, otherwise build the hash table of right if it is cached, or on the smaller input
+        if index_key in self.indexes:
+            left_rows, right_rows = self.indexes[index_key].probe(left)
+
+        elif index_key is not None or len(right) <= len(left):
+            index = HashIndex(right, on)
+            if index_key is not None:
+                self.indexes[index_key] = index
+            left_rows, right_rows = index.probe(left)
+
+        else:
+            right_rows, left_rows = HashIndex(left, on).probe(right)
+
+        return get_joined_data_frame(left, right, on, left_rows, right_rows, columns)
+
+    def clear(self, relations = None):
+        """
+        drops the cached hash tables, once the data frames they were built on have changed,
+        only the ones of the given relations, as (source, relation name), if relations is not None
+        """
+        if relations is None:
+            self.indexes = {}
+        else:
+            self.indexes = dict((key, index) for key, index in self.indexes.items() if key[0][0 : 2] not in relations)
+
+    def update(self, cache_key, data_frame, written, count):
+        """
+        updates the cached hash tables of the input with a cache key for its current data frame, whose rows at the positions written
+        changed or were appended, and whose rows from count on were removed, instead of building them again
+        """
+        for index_key, index in self.indexes.items():
+            if index_key[0] == cache_key:
+                if not isinstance(index, UpdatedIndex):
+                    index = self.indexes[index_key] = UpdatedIndex(index)
+
+                index.update(data_frame, written, count)
+
+def get_joined_data_frame(left, right, on, left_rows, right_rows, columns = None):
+    """
+    returns the data frame made of the given rows of left next to the given rows of right, without the columns of right in on,
+    and only the given columns if not None
+    """
+    data = {}
+    kept = columns
+    columns = []
+
+    for position, column in enumerate(left.columns):
+        if kept is None or column in kept:
+            data[len(data)] = left.iloc[:, position].values[left_rows]
+            columns.append(column)
+
+    for position, column in enumerate(right.columns):
+        if column not in on and (kept is None or column in kept):
+            data[len(data)] = right.iloc[:, position].values[right_rows]
+            columns.append(column)
+
+    # the columns taken from the inputs are new arrays, kept as they are instead of copied into a single block
+    joined = pd.DataFrame(data, index = pd.RangeIndex(0, len(left_rows)), copy = False)
+    joined.columns = columns
+
+    return joined
+
+# join backends selectable for the evaluation
+join_backends = {'hash' : HashJoin, 'pandas' : PandasJoin}
@@ -0,0 +1,44 @@
+import os
+import pandas as pd
+import reader
+
+def load_input(file_path):
+    """
+    reads an input relation file straight into a data frame of records with the structure
+    (argument_1, argument_2,..., context), the context of every loaded fact being none
+    the file format is chosen by the file extension: .csv, .tsv/.tab or .parquet
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+
+    if extension == '.parquet':
+        data_frame = pd.read_parquet(file_path)
+
+        # records with null values have no constant to intern, they are dropped instead of reading the nulls as strings
+        nulls = data_frame.isnull().any(axis = 1)
+
+        if nulls.any():
+            print('Skipping', int(nulls.sum()), 'records with null values in input file ' + file_path)
+            data_frame = data_frame[~nulls]
+
+        # the columns of numbers are typed by the file, their values being interned as numbers, and the other values as strings
+        data_frame = data_frame.reset_index(drop = True)
+
+        for column in data_frame.columns:
+            if data_frame[column].dtype.kind not in 'iuf':
+                data_frame[column] = data_frame[column].astype(str)
+
+    else:
+        separator = '\t' if extension in ['.tsv', '.tab'] else ','
+
+        data_frame = pd.read_csv(file_path, sep = separator, header = None, dtype = str, keep_default_na = False, skipinitialspace = True)
+
+        # the values written like the integer and float literals of a program are numbers, like the arguments of the facts of a program,
+        # and the other values are strings, even when they are written like numbers, like 07 or 1e3
+        for column in data_frame.columns:
+            data_frame[column] = data_frame[column].map(reader.get_constant)
+
+    # number the columns the same way as the data frames built from inline facts
+    data_frame.columns = range(0, len(data_frame.columns))
+    data_frame[len(data_frame.columns)] = 'none'
+
+    return data_frame
@@ -0,0 +1,140 @@
+from elements import Fact, Rule, Predicate
+
+def get_query_rule(query, number):
+    """
+    returns the rule deriving the answers to a query, named after the number of the query, with the query's variables as arguments
+    """
+    query.name = 'query.' + str(number)
+    query.variables = get_variables(query.predicates)
+
+    return Rule(Predicate(query.name, list(query.variables)), list(query.predicates))
+
+def rewrite_rules(rules, query_rules, head_relations):
+    """
+    returns the rules rewritten with magic sets for the bindings of the query rules, and the facts seeding the magic predicates
+    head_relations are the relations derived by the rules, whose facts must be copied in by rules of the form returned by get_copy_rules
+    """
+    rewriter = MagicSetsRewriter(rules, head_relations)
+
+    for query_rule in query_rules:
+        rewriter.rewrite_rule(query_rule, None)
+
+    # rewrite the rules of each adorned predicate reached from the queries
+    while len(rewriter.worklist):
+        name, adornment = rewriter.worklist.pop()
+        for rule in rules:
+            if rule.head.name == name:
+                rewriter.rewrite_rule(rule, adornment)
+
+    return rewriter.rules, rewriter.seeds
+
+class MagicSetsRewriter(object):
+
+    def __init__(self, rules, head_relations):
+        """
+        rewrites rules for adorned predicates, passing the bindings of the rule body predicates from left to right
+        an adornment has a letter for each argument and the context of a predicate: b for bound, f for free
+        """
+        self.head_relations = head_relations
+
+        # rewritten rules and magic rules, and the facts seeding the magic predicates
+        self.rules = []
+        self.seeds = []
+
+        # adorned predicates as (predicate name, adornment), and those whose rules are still to be rewritten
+        self.adorned = set()
+        self.worklist = []
+
+    def rewrite_rule(self, rule, adornment):
+        """
+        rewrites a rule for an adornment of its head, adding the rewritten rule and the magic rules for its body predicates
+        a rule with adornment None is a query rule, whose head is kept as it is
+        """
+        if adornment is None:
+            head = rule.head
+            body = []
+            bound = set()
+
+        else:
+            head_terms = rule.head.arguments + [rule.head.context]
+            bound_terms = [term for term, letter in zip(head_terms, adornment) if letter == 'b']
+            head = Predicate(get_adorned_name(rule.head.name, adornment), rule.head.arguments, rule.head.context)
+
+            # the magic predicate of the head holds the bindings the rule is needed for
+            body = [Predicate(get_magic_name(rule.head.name, adornment), bound_terms)]
+            bound = set(term for term in bound_terms if is_variable(term))
+
+        for element in rule.body:
+
+            if element.type == 'constraint':
+                body.append(element)
+                continue
+
+            if element.name in self.head_relations:
+                terms = element.arguments + [element.context]
+                element_adornment = ''.join('b' if (not is_variable(term)) or term in bound else 'f' for term in terms)
+                magic_head = Predicate(get_magic_name(element.name, element_adornment), [term for term, letter in zip(terms, element_adornment) if letter == 'b'])
+
+                # the bindings of the predicate come from the predicates before it, and the constraints on their variables
+                magic_body = [predicate for predicate in body if predicate.type != 'constraint' or set(get_variables([predicate])) <= bound]
+
+                # a magic rule whose body is only its head, like the magic rule of a recursive predicate called first with the bindings of the head,
+                # derives nothing and is not added
+                if not len(magic_body):
+                    if repr(magic_head) not in [repr(seed.predicate) for seed in self.seeds]:
+                        self.seeds.append(Fact(magic_head))
+                elif [repr(predicate) for predicate in magic_body] != [repr(magic_head)]:
+                    self.rules.append(Rule(magic_head, magic_body))
+
+                body.append(Predicate(get_adorned_name(element.name, element_adornment), element.arguments, element.context))
+
+                if (element.name, element_adornment) not in self.adorned:
+                    self.adorned.add((element.name, element_adornment))
+                    self.worklist.append((element.name, element_adornment))
+
+            else:
+                body.append(element)
+
+            bound |= set(get_variables([element]))
+
+        self.rules.append(Rule(head, body))
+
+def get_copy_rules(relation, arity):
+    """
+    returns the rules copying the facts of an IDB relation from its own EDB relation,
+    one for facts without a context and one for facts with a context
+    """
+    arguments = ['V' + str(position) for position in range(1, arity + 1)]
+
+    return [Rule(Predicate(relation, arguments), [Predicate(get_facts_name(relation), arguments)]),
+            Rule(Predicate(relation, arguments, 'C'), [Predicate(get_facts_name(relation), arguments, 'C')])]
+
+def get_variables(predicates):
+    """
+    returns the variables of a list of predicates and constraints, in the order they first appear
+    """
+    variables = []
+
+    for predicate in predicates:
+        if predicate.type == 'constraint':
+            terms = [predicate.term_x, predicate.term_y]
+        else:
+            terms = predicate.arguments + [predicate.context]
+
+        for term in terms:
+            if is_variable(term) and term not in variables:
+                variables.append(term)
+
+    return variables
+
+def get_adorned_name(name, adornment):
+    return name + '.' + adornment
+
+def get_magic_name(name, adornment):
+    return 'magic.' + name + '.' + adornment
+
+def get_facts_name(name):
+    return name + '.facts'
+
+def is_variable(term):
+    return isinstance(term, str) and term[0].isupper()
@@ -0,0 +1,545 @@
+import concurrent.futures
+import copy
+import os
+import pickle
+import numpy as np
+import pandas as pd
+from multiprocessing import shared_memory
+from symbols import symbol_table, SYMBOL_DTYPE
+
+class SharedRelations(object):
+
+    def __init__(self):
+        """
+        data frames of symbol ids published in shared memory segments, so that worker processes read them without copies
+        a fixed relation is published again only when its data frame changed, and the segment of its previous data frame is released,
+        the old and delta relations of a stratum are appended to growing segments, so that only the records of each delta are written
+        """
+        # published data frame and segment of each (database, relation name), with the descriptor sent to the workers
+        self.segments = {}
+
+        # growing segments of the old and delta records of each IDB relation, for each (position, shards) it is partitioned on
+        self.appended = {}
+
+    def publish(self, key, data_frame):
+        """
+        returns the descriptor of the segment holding a data frame: (segment name, number of records, number of columns, first record, end record)
+        the segment name is None for a data frame without records
+        """
+        if key in self.segments and self.segments[key][0] is data_frame:
+            return self.segments[key][2]
+
+        self.release(key)
+
+        segment = self.write(data_frame.values.astype(SYMBOL_DTYPE))
+        descriptor = (None if segment is None else segment.name, len(data_frame), len(data_frame.columns), 0, len(data_frame))
+        self.segments[key] = (data_frame, segment, descriptor)
+
+        return descriptor
+
+    def publish_partitioned(self, key, data_frame, position, shards):
+        """
+        returns the descriptors of the shards of a data frame hash-partitioned on the column at position
+        the records are written to a single segment ordered by shard, each shard being a range of records of the segment
+        """
+        key = key + (position, shards)
+
+        if key in self.segments and self.segments[key][0] is data_frame:
+            return self.segments[key][2]
+
+        self.release(key)
+
+        values = data_frame.values.astype(SYMBOL_DTYPE)
+        shard_numbers = get_shard_numbers(values[:, position], shards)
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(shard_numbers, minlength = shards))])
+
+        segment = self.write(values[np.argsort(shard_numbers, kind = 'stable')])
+        name = None if segment is None else segment.name
+        descriptors = [(name, len(values), values.shape[1], int(offsets[shard]), int(offsets[shard + 1])) for shard in range(0, shards)]
+        self.segments[key] = (data_frame, segment, descriptors)
+
+        return descriptors
+
+    def publish_appended(self, relation, old, delta, position = None, shards = 1):
+        """
+        returns the descriptors of the old and delta records of an IDB relation in each of its shards, hash-partitioned on the column at position,
+        as a dictionary with the keys IDB_old and IDB_delta of lists of descriptors, one per shard
+
+        the old records of an iteration are the old and delta records of the iteration before, so only the records not appended yet,
+        the delta records, are partitioned and appended to the growing segment of each shard
+        the records are written again only if the old records are fewer than the records appended, when the relation is evaluated again
+        """
+        key = (relation, position, shards)
+        appended = self.appended.get(key)
+
+        # the relation was already published in this iteration, for another scan
+        if appended is not None and appended.old_records == len(old) and appended.records == len(old) + len(delta):
+            return appended.get_descriptors()
+
+        if appended is not None and appended.records > len(old):
+            self.appended.pop(key).close()
+            appended = None
+
+        if appended is None:
+            appended = self.appended[key] = AppendedRelation(len(old.columns), position, shards)
+
+        appended.append(old.values[appended.records : len(old)].astype(SYMBOL_DTYPE))
+        appended.old_records = len(old)
+        appended.old_rows = list(appended.rows)
+        appended.append(delta.values.astype(SYMBOL_DTYPE))
+
+        return appended.get_descriptors()
+
+    def write(self, values):
+        """
+        returns a new shared memory segment holding an array of symbol ids, or None if the array is empty
+        """
+        if not values.size:
+            return None
+
+        segment = shared_memory.SharedMemory(create = True, size = values.nbytes)
+        np.ndarray(values.shape, dtype = SYMBOL_DTYPE, buffer = segment.buf)[:] = values
+
+        return segment
+
+    def release(self, key):
+        if key in self.segments:
+            segment = self.segments.pop(key)[1]
+            if segment is not None:
+                segment.close()
+                segment.unlink()
+
+    def release_appended(self, relations):
+        """
+        releases the growing segments of IDB relations, once their stratum is evaluated
+        """
+        for key in list(self.appended.keys()):
+            if key[0] in relations:
+                self.appended.pop(key).close()
+
+    def close(self):
+        for key in list(self.segments.keys()):
+            self.release(key)
+
+        self.release_appended(set(key[0] for key in self.appended.keys()))
+
+    def __repr__(self):
+        return '%r' % (self.__dict__)
+
+class AppendedRelation(object):
+
+    def __init__(self, columns, position, shards):
+        """
+        records of a relation appended to a growing shared memory segment per shard, hash-partitioned on the column at position
+        a segment full of records is replaced by a segment of twice its capacity, so that appending a record costs constant time on average
+        """
+        self.columns = columns
+        self.position = position
+        self.shards = shards
+        self.segments = [None] * shards
+        self.capacities = [0] * shards
+        self.rows = [0] * shards
+
+        # number of records of the relation appended, in all the shards
+        self.records = 0
+
+        # number of old records of the relation, and number of rows of each shard holding them, the records appended after them being the delta
+        self.old_records = 0
+        self.old_rows = [0] * shards
+
+    def append(self, values):
+        if not len(values):
+            return
+
+        self.records += len(values)
+
+        if self.shards == 1:
+            self.append_shard(0, values)
+            return
+
+        shard_numbers = get_shard_numbers(values[:, self.position], self.shards)
+
+        for shard in range(0, self.shards):
+            self.append_shard(shard, values[shard_numbers == shard])
+
+    def append_shard(self, shard, values):
+        rows = self.rows[shard]
+
+        if not len(values):
+            return
+
+        if rows + len(values) > self.capacities[shard]:
+            capacity = max(2 * self.capacities[shard], rows + len(values), 1024)
+            segment = shared_memory.SharedMemory(create = True, size = capacity * self.columns * np.dtype(SYMBOL_DTYPE).itemsize)
+
+            if rows:
+                np.ndarray((rows, self.columns), dtype = SYMBOL_DTYPE, buffer = segment.buf)[:] = self.get_values(shard)
+
+            self.release(shard)
+            self.segments[shard] = segment
+            self.capacities[shard] = capacity
+
+        self.get_values(shard, rows + len(values))[rows :] = values
+        self.rows[shard] = rows + len(values)
+
+    def get_values(self, shard, rows = None):
+        """
+        returns an array viewing the first rows of the segment of a shard, all the records appended by default
+        """
+        return np.ndarray((self.rows[shard] if rows is None else rows, self.columns), dtype = SYMBOL_DTYPE, buffer = self.segments[shard].buf)
+
+    def get_descriptors(self):
+        """
+        returns the descriptors of the old records of each shard, before the last records appended, and of the delta records, the last records appended,
+        as a dictionary with the keys IDB_old and IDB_delta of lists of descriptors, one per shard
+        """
+        names = [None if segment is None else segment.name for segment in self.segments]
+
+        return {'IDB_old' : [(names[shard], self.rows[shard], self.columns, 0, self.old_rows[shard]) for shard in range(0, self.shards)],
+                'IDB_delta' : [(names[shard], self.rows[shard], self.columns, self.old_rows[shard], self.rows[shard]) for shard in range(0, self.shards)]}
+
+    def release(self, shard):
+        if self.segments[shard] is not None:
+            self.segments[shard].close()
+            self.segments[shard].unlink()
+            self.segments[shard] = None
+
+    def close(self):
+        for shard in range(0, self.shards):
+            self.release(shard)
+
+    def __repr__(self):
+        return '%r' % (self.__dict__)
+
+class ParallelEvaluator(object):
+
+    def __init__(self, workers, join_backend_type, join_planner_type, partitions = 1):
+        """
+        evaluates the rules of an iteration in a pool of worker processes, each delta variant of a rule being a task of its own
+        the relations are shared with the workers through shared memory, and each worker keeps the plans of the rules it evaluated,
+        with its own join backend and join planner, so that hash tables of EDB and CDB relations are reused across iterations
+
+        with several partitions, each delta variant is split into a task per shard: the inputs holding the variable of the largest inputs
+        are hash-partitioned on it into shards, the other inputs are read whole by every shard,
+        so that a single large rule like a transitive closure is joined and deduplicated on all the workers
+        """
+        self.workers = workers
+        self.partitions = partitions
+        self.relations = SharedRelations()
+
+        # the workers intern the symbols of the parent when the pool starts, and the symbols interned after that are pickled to a segment
+        # once for each execution interning new symbols, the tasks only holding the descriptors of the segments, read once by each worker
+        self.symbol_count = len(symbol_table)
+        self.symbol_segments = []
+        self.symbol_descriptors = ()
+        self.pool = concurrent.futures.ProcessPoolExecutor(max_workers = workers, initializer = initialize_worker, initargs = (list(symbol_table.values), join_backend_type, join_planner_type))
+
+        # key of each rule plan, the plans are kept so that their ids are not reused, with the segment holding the pickled copy read by the workers
+        # the copy of a plan is written once, and each worker reads it the first time it evaluates the plan, the tasks only holding its key and segment
+        self.plan_keys = {}
+        self.plans = []
+
+    def execute(self, rule_plans, databases):
+        """
+        returns the facts derived by each rule plan from the relations in databases as a list of data frames or None,
+        like the execute method of the rule plans
+        """
+        symbols = self.share_symbols()
+        tasks = []
+        owners = []
+
+        for position, rule_plan in enumerate(rule_plans):
+            key = self.get_plan_key(rule_plan)
+            plan_descriptor = self.plans[key][2]
+
+            for variant, sources in enumerate(rule_plan.variants):
+                variable = get_partition_variable(rule_plan, sources, databases) if self.partitions > 1 else None
+
+                if variable is None:
+                    # descriptors of the whole relations read by the variant
+                    descriptors = {}
+
+                    for scan, source in zip(rule_plan.scans, sources):
+                        descriptors.setdefault(source, {})[scan.name] = self.publish(databases, source, scan.name)[0]
+
+                    tasks.append((key, plan_descriptor, variant, descriptors, None, symbols))
+                    owners.append(position)
+                    continue
+
+                # descriptors of the data frame of each scan in each shard, partitioned if the scan holds the variable
+                shards = [{} for shard in range(0, self.partitions)]
+
+                for index, (scan, source) in enumerate(zip(rule_plan.scans, sources)):
+                    if variable in scan.columns:
+                        shard_descriptors = self.publish(databases, source, scan.name, scan.positions[scan.columns.index(variable)], self.partitions)
+                    else:
+                        shard_descriptors = self.publish(databases, source, scan.name) * self.partitions
+
+                    for shard, descriptor in enumerate(shard_descriptors):
+                        shards[shard][(index, source)] = descriptor
+
+                for shard_descriptors in shards:
+                    if all(descriptor[3] < descriptor[4] for descriptor in shard_descriptors.values()):
+                        tasks.append((key, plan_descriptor, variant, None, shard_descriptors, symbols))
+                        owners.append(position)
+
+        results = [[] for rule_plan in rule_plans]
+
+        for position, values in zip(owners, self.pool.map(execute_task, tasks)):
+            if values is not None:
+                results[position].append(pd.DataFrame(values, index = None))
+
+        return [None if not len(facts) else facts[0] if len(facts) == 1 else pd.concat(facts, ignore_index = True) for facts in results]
+
+    def share_symbols(self):
+        """
+        returns the descriptors of the segments of the symbols interned after the pool started,
+        writing the symbols interned since the last execution to a segment of their own
+        """
+        if len(symbol_table) > self.symbol_count:
+            values = np.frombuffer(pickle.dumps(list(symbol_table.values[self.symbol_count : len(symbol_table)])), dtype = np.uint8)
+            segment = shared_memory.SharedMemory(create = True, size = len(values))
+            np.ndarray(values.shape, dtype = np.uint8, buffer = segment.buf)[:] = values
+
+            self.symbol_segments.append(segment)
+            self.symbol_descriptors += ((segment.name, len(values)),)
+            self.symbol_count = len(symbol_table)
+
+        return self.symbol_descriptors
+
+    def publish(self, databases, source, relation, position = None, shards = 1):
+        """
+        returns the descriptors of the shards of a relation of databases hash-partitioned on the column at position, or of the whole relation,
+        the old and delta relations being appended to growing segments, and the other relations published once
+        """
+        if source in ['IDB_old', 'IDB_delta']:
+            return self.relations.publish_appended(relation, databases['IDB_old'][relation], databases['IDB_delta'][relation], position, shards)[source]
+
+        if position is None:
+            return [self.relations.publish((source, relation), databases[source][relation])]
+
+        return self.relations.publish_partitioned((source, relation), databases[source][relation], position, shards)
+
+    def get_plan_key(self, rule_plan):
+        """
+        returns the key of a rule plan, writing the copy of the plan sent to the workers to a segment the first time
+        """
+        if id(rule_plan) not in self.plan_keys:
+            values = np.frombuffer(pickle.dumps(get_worker_plan(rule_plan)), dtype = np.uint8)
+            segment = shared_memory.SharedMemory(create = True, size = len(values))
+            np.ndarray(values.shape, dtype = np.uint8, buffer = segment.buf)[:] = values
+
+            self.plan_keys[id(rule_plan)] = len(self.plans)
+            self.plans.append((rule_plan, segment, (segment.name, len(values))))
+
+        return self.plan_keys[id(rule_plan)]
+
+    def release(self, relations):
+        """
+        releases the segments of the old and delta records of IDB relations, once their stratum is evaluated
+        """
+        self.relations.release_appended(relations)
+
+    def close(self):
+        self.pool.shutdown()
+        self.relations.close()
+
+        for rule_plan, segment, plan_descriptor in self.plans:
+            segment.close()
+            segment.unlink()
+
+        for segment in self.symbol_segments:
+            segment.close()
+            segment.unlink()
+
+    def __repr__(self):
+        return '%r' % (self.__dict__)
+
+# state of a worker process: its rule plans, join backend and join planner, the segments it attached,
+# and the segment of each fixed relation, EDB or CDB, read by its cached statistics, scans and hash tables
+worker = {}
+
+def get_worker_plan(rule_plan):
+    """
+    returns a copy of a rule plan to send to the workers, without the context indexes of its scans and the inputs it scanned,
+    which hold whole relations and are not needed to read the relations in shared memory
+    """
+    worker_plan = copy.copy(rule_plan)
+    worker_plan.scans = [copy.copy(scan) for scan in rule_plan.scans]
+    worker_plan.fixed_inputs = {}
+    worker_plan.join_steps = {}
+
+    for scan in worker_plan.scans:
+        scan.context_index = None
+
+    return worker_plan
+
+def initialize_worker(symbols, join_backend_type, join_planner_type):
+    """
+    interns the symbols of the parent process in the same order, so that symbol ids and ranks are the same in the worker
+    """
+    for symbol in symbols:
+        symbol_table.intern(symbol)
+
+    worker['plans'] = {}
+    worker['join_backend'] = join_backend_type()
+    worker['join_planner'] = join_planner_type()
+    worker['segments'] = {}
+    worker['fixed'] = {}
+    worker['symbol_segments'] = 0
+
+def execute_task(task):
+    """
+    evaluates a delta variant of a rule plan over the relations in shared memory, or over a shard of its inputs,
+    returns an array of symbol ids of the distinct derived facts, or None if no fact is derived
+    """
+    key, plan_descriptor, variant, descriptors, shard_descriptors, symbols = task
+
+    # the segments of the symbols interned by the parent since the last task of this worker
+    for symbol_descriptor in symbols[worker['symbol_segments'] :]:
+        for symbol in read_pickle(symbol_descriptor):
+            symbol_table.intern(symbol)
+
+    worker['symbol_segments'] = len(symbols)
+
+    if key not in worker['plans']:
+        worker['plans'][key] = read_pickle(plan_descriptor)
+
+    rule_plan = worker['plans'][key]
+
+    if shard_descriptors is not None:
+        return execute_shard(rule_plan, variant, shard_descriptors)
+
+    join_planner = worker['join_planner']
+    databases = {}
+    names = set()
+
+    for source, relations in descriptors.items():
+        databases[source] = {}
+
+        for relation, descriptor in relations.items():
+            databases[source][relation] = attach(descriptor)
+            names.add(descriptor[0])
+
+            # statistics of the old and delta relations change in every iteration, the ones of the fixed relations only with their segment
+            if not source.startswith('IDB'):
+                set_fixed_segment((source, relation), descriptor[0])
+
+            if source.startswith('IDB') or (source, relation) not in join_planner.statistics.relations:
+                join_planner.statistics.update((source, relation), databases[source][relation])
+
+    new_facts = rule_plan.execute(databases, worker['join_backend'], join_planner, [variant])
+
+    # the statistics of the old and delta relations are dropped so that their segments can be released
+    for statistics_key in list(join_planner.statistics.relations.keys()):
+        if statistics_key[0].startswith('IDB'):
+            join_planner.statistics.relations.pop(statistics_key)
+
+    databases = None
+    detach(names)
+
+    return None if new_facts is None else new_facts.drop_duplicates().values
+
+def execute_shard(rule_plan, variant, shard_descriptors):
+    """
+    evaluates a delta variant of a rule plan over a shard of its inputs, planning the joins with the statistics of the shard
+    """
+    join_planner = type(worker['join_planner'])()
+    frames = {}
+
+    for (index, source), descriptor in shard_descriptors.items():
+        frames[(index, source)] = attach(descriptor)
+        join_planner.statistics.update(rule_plan.scans[index].get_statistics_key(source), frames[(index, source)])
+
+    new_facts = rule_plan.execute({}, worker['join_backend'], join_planner, [variant], frames)
+
+    join_planner = None
+    frames = None
+    detach(set(descriptor[0] for descriptor in shard_descriptors.values()))
+
+    return None if new_facts is None else new_facts.drop_duplicates().values
+
+def read_pickle(descriptor):
+    """
+    returns the object pickled in a segment by the parent process, a rule plan or a list of symbols
+    """
+    name, size = descriptor
+    segment = shared_memory.SharedMemory(name = name)
+    value = pickle.loads(bytes(segment.buf[0 : size]))
+    segment.close()
+
+    return value
+
+def attach(descriptor):
+    """
+    returns the data frame of a relation published in shared memory, reading the segment in place
+    """
+    name, rows, columns, start, end = descriptor
+
+    if name is None:
+        return pd.DataFrame(np.empty((0, columns), dtype = SYMBOL_DTYPE), columns = range(0, columns))
+
+    if name not in worker['segments']:
+        # the workers share the resource tracker of the parent process, which owns the segment and unlinks it
+        worker['segments'][name] = shared_memory.SharedMemory(name = name)
+
+    values = np.ndarray((rows, columns), dtype = SYMBOL_DTYPE, buffer = worker['segments'][name].buf)[start : end]
+
+    return pd.DataFrame(values, columns = range(0, columns), copy = False)
+
+def set_fixed_segment(key, name):
+    """
+    records the segment a fixed relation is read from, dropping the statistics, scans and hash tables the worker cached for the relation
+    if they read another segment, so that the segment they read is closed once no data frame reads it
+    """
+    if key in worker['fixed'] and worker['fixed'][key] != name:
+        worker['join_planner'].statistics.relations.pop(key, None)
+        worker['join_backend'].clear(set([key]))
+
+        for rule_plan in worker['plans'].values():
+            for index, scan in enumerate(rule_plan.scans):
+                if (scan.database, scan.name) == key:
+                    rule_plan.fixed_inputs.pop(index, None)
+
+    worker['fixed'][key] = name
+
+def detach(names):
+    """
+    closes the segments not used by the last task, except the segments of the fixed relations, which the cached statistics, scans and hash tables read
+    the arrays reading a segment do not keep it open, so a segment is only closed once nothing cached reads it
+    """
+    kept = set(names) | set(worker['fixed'].values())
+
+    for name in list(worker['segments'].keys()):
+        if name not in kept:
+            worker['segments'].pop(name).close()
+
+def get_partition_variable(rule_plan, sources, databases):
+    """
+    returns the variable on which to partition the inputs of a delta variant of a rule plan: the variable held by the largest inputs,
+    or None if the rule body has no variable
+    """
+    sizes = {}
+
+    for scan, source in zip(rule_plan.scans, sources):
+        for column in scan.columns:
+            sizes[column] = sizes.get(column, 0) + len(databases[source][scan.name])
+
+    if not len(sizes):
+        return None
+
+    return max(sizes.keys(), key = lambda variable: sizes[variable])
+
+def get_shard_numbers(column, shards):
+    """
+    returns the shard of each symbol id of a column, from a multiplicative hash of the ids so that consecutive ids are spread over the shards
+    """
+    hashes = column.astype(np.uint64) * np.uint64(11400714819323198485)
+
+    return ((hashes >> np.uint64(32)) % np.uint64(shards)).astype(np.int64)
+
+def get_worker_count(workers):
+    """
+    returns the number of worker processes to use, all the cores if workers is 0
+    """
+    return (os.cpu_count() or 1) if workers == 0 else workers
@@ -0,0 +1,148 @@
+import pandas as pd
+
+class RelationStatistics(object):
+
+    def __init__(self, data_frame):
+        """
+        cardinality of a relation and the number of distinct values in its columns
+        distinct value counts are computed the first time they are needed
+        """
+        self.data_frame = data_frame
+        self.cardinality = len(data_frame)
+        self.distinct_counts = {}
+
+        # cardinality of the data frame the distinct value counts were counted for
+        self.counted = self.cardinality
+
+    def distinct(self, position):
+        """
+        returns the number of distinct values in the column at the given position
+        """
+        if position not in self.distinct_counts:
+            self.distinct_counts[position] = len(pd.unique(self.data_frame.iloc[:, position].values))
+
+        return self.distinct_counts[position]
+
+class Statistics(object):
+
+    def __init__(self):
+        """
+        statistics of relations keyed by (database, relation name), that is ('EDB', 'edge') or ('IDB_delta', 'path')
+        """
+        self.relations = {}
+
+    def update(self, key, data_frame):
+        """
+        replaces the statistics of a relation with the statistics of its current data frame
+        """
+        self.relations[key] = RelationStatistics(data_frame)
+
+    def resize(self, key, data_frame):
+        """
+        replaces the statistics of a relation changed by a few records, keeping its distinct value counts as estimates
+        while its cardinality stays within a factor 2 of the cardinality they were counted for
+        """
+        statistics = self.relations.get(key)
+        self.relations[key] = RelationStatistics(data_frame)
+
+        if statistics is not None and statistics.counted <= 2 * max(len(data_frame), 1) and len(data_frame) <= 2 * max(statistics.counted, 1):
+            self.relations[key].distinct_counts = statistics.distinct_counts
+            self.relations[key].counted = statistics.counted
+
+    def distinct(self, key, position, cardinality):
+        """
+        estimates the number of distinct values in a column of a relation after it was filtered down to cardinality records
+        """
+        if key not in self.relations:
+            return max(cardinality, 1)
+
+        return max(min(self.relations[key].distinct(position), cardinality), 1)
+
+class JoinPlanner(object):
+
+    def __init__(self, statistics = None):
+        """
+        orders the predicates of a rule body to avoid cross joins and keep the intermediate results small
+        using the cardinalities and distinct value counts of the relations
+        """
+        self.statistics = Statistics() if statistics is None else statistics
+
+    def order(self, inputs):
+        """
+        returns the positions of the inputs in the order they should be joined
+        each input is a tuple (column header, cardinality, statistics key, positions of the columns in the relation)
+
+        starting from the smallest input, the input joined next is the one with the smallest estimated join result
+        among the inputs sharing a variable with the inputs already joined, cross joins are taken only when no input shares a variable
+        """
+        remaining = list(range(0, len(inputs)))
+
+        # estimated number of distinct values of each variable of an input, and of the joined result
+        distinct_values = [self.get_distinct_values(join_input) for join_input in inputs]
+
+        first = min(remaining, key = lambda position: inputs[position][1])
+        remaining.remove(first)
+        order = [first]
+        cardinality = inputs[first][1]
+        joined_values = dict(distinct_values[first])
+
+        while len(remaining):
+            best = None
+            best_estimate = None
+
+            for position in remaining:
+                shared = [variable for variable in distinct_values[position] if variable in joined_values]
+
+                if not len(shared):
+                    continue
+
+                # each shared variable is assumed to keep one in max(distinct values) of the pairs of records
+                estimate = float(cardinality) * inputs[position][1]
+                for variable in shared:
+                    estimate /= max(joined_values[variable], distinct_values[position][variable])
+
+                if best is None or estimate < best_estimate:
+                    best = position
+                    best_estimate = estimate
+
+            # no remaining input shares a variable, the cross join with the smallest input is the cheapest
+            if best is None:
+                best = min(remaining, key = lambda position: inputs[position][1])
+                best_estimate = float(cardinality) * inputs[best][1]
+
+            remaining.remove(best)
+            order.append(best)
+            cardinality = max(best_estimate, 1)
+
+            for variable, count in distinct_values[best].items():
+                joined_values[variable] = min(joined_values.get(variable, count), count)
+
+            for variable in joined_values:
+                joined_values[variable] = min(joined_values[variable], cardinality)
+
+        return order
+
+    def get_distinct_values(self, join_input):
+        """
+        returns a dictionary with the estimated number of distinct values of each variable of an input
+        """
+        columns, cardinality, key, positions = join_input
+        distinct_values = {}
+
+        for column, position in zip(columns, positions):
+            if isinstance(column, str) and column[0].isupper():
+                count = self.statistics.distinct(key, position, cardinality)
+                distinct_values[column] = min(distinct_values.get(column, count), count)
+
+        return distinct_values
+
+class FixedPlanner(JoinPlanner):
+
+    def order(self, inputs):
+        """
+        returns the positions of the inputs in the order they appear in the rule body
+        """
+        return list(range(0, len(inputs)))
+
+# join planners selectable for the evaluation
+join_planners = {'cost' : JoinPlanner, 'fixed' : FixedPlanner}
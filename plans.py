@@ -0,0 +1,422 @@
+import itertools
+import time
+import numpy as np
+import pandas as pd
+import factsets
+from symbols import symbol_table, context_table, NONE, SYMBOL_DTYPE
+from elements import is_upper_case, theta_operations
+
+class Scan(object):
+
+    def __init__(self, predicate, database, context_index = None, constraints = [], variables = None):
+        """
+        scan of a rule body predicate over a relation of EDB, CDB or IDB
+
+        the records of the relation are selected for the constants in the predicate's arguments or context,
+        for repeated variables, for a not none context if the context is variable, and for the constraints on the predicate's variables only,
+        then the columns are named after the predicate's variables, each variable appearing once
+        with the context index of the relation, the records of a constant context or of constant attributes are read through the index
+        variables are the variables whose columns are kept, all of them by default, the others being projected out once the records are selected
+        """
+        self.name = predicate.name
+        self.database = database
+        self.context_index = context_index
+
+        # column header created from the predicate's arguments and context
+        self.header = predicate.arguments + [predicate.context]
+
+        # selections of the form (column position, symbol id) and (column position, column position)
+        self.constant_selections = []
+        self.variable_selections = []
+
+        # position of the first column of each variable
+        self.variable_positions = {}
+
+        # a constant context is matched by its members, through the id of its canonical name, as the contexts of the records are
+        for position, term in enumerate(self.header):
+            if not is_upper_case(term):
+                self.constant_selections.append((position, context_table.intern(term) if position == len(self.header) - 1 else symbol_table.intern(term)))
+            elif term in self.variable_positions:
+                self.variable_selections.append((self.variable_positions[term], position))
+            else:
+                self.variable_positions[term] = position
+
+        # if the context is variable, filter out none context
+        self.context_position = len(self.header) - 1 if is_upper_case(predicate.context) else None
+
+        # constraints of the form (variable, theta operator, variable/constant) on the predicate's variables
+        self.constraints = list(constraints)
+
+        # positions and names of the columns kept by the scan
+        self.columns = [term for term in self.variable_positions.keys() if variables is None or term in variables]
+        self.positions = [self.variable_positions[term] for term in self.columns]
+
+    def evaluate(self, data_frame):
+        """
+        returns the records of a relation's data frame selected and renamed by the scan
+        the data frame is not copied when nothing needs to be selected, the scan being a read-only view of its columns
+        """
+        if self.context_index is not None and len(self.constant_selections):
+            data_frame = self.context_index.select(data_frame, self.constant_selections)
+
+        values = [data_frame.iloc[:, position].values for position in range(0, len(self.header))]
+        mask = self.get_mask(values)
+        row_count = len(data_frame) if mask is None else int(mask.sum())
+
+        # a predicate without variables only tells whether the rule body can be satisfied,
+        # it is kept as a data frame without columns and with at most one record
+        if not len(self.columns):
+            return pd.DataFrame(index = range(0, min(row_count, 1)))
+
+        # without selections, the columns of the relation are renamed in a view sharing their buffers
+        if mask is None:
+            return factsets.get_columns_view([values[position] for position in self.positions], self.columns, row_count)
+
+        # the selected records are the only new columns, kept as they are instead of copied into a single block
+        scanned = pd.DataFrame(dict((index, values[position][mask]) for index, position in enumerate(self.positions)), index = None, copy = False)
+        scanned.columns = self.columns
+
+        return scanned
+
+    def select(self, data_frame):
+        """
+        returns the records of a relation's data frame selected by the scan, with all their columns, without reading the context index
+        """
+        mask = self.get_mask([data_frame.iloc[:, position].values for position in range(0, len(self.header))])
+
+        return data_frame if mask is None else data_frame[mask]
+
+    def get_mask(self, values):
+        """
+        returns a boolean mask of the records of the columns of a relation selected by the scan, or None if every record is selected
+        """
+        mask = None
+
+        for position, symbol_id in self.constant_selections:
+            mask = (values[position] == symbol_id) if mask is None else mask & (values[position] == symbol_id)
+
+        for position_x, position_y in self.variable_selections:
+            mask = (values[position_x] == values[position_y]) if mask is None else mask & (values[position_x] == values[position_y])
+
+        if self.context_position is not None:
+            mask = (values[self.context_position] != NONE) if mask is None else mask & (values[self.context_position] != NONE)
+
+        for constraint in self.constraints:
+            column_y = values[self.variable_positions[constraint[2]]] if is_upper_case(constraint[2]) else symbol_table.intern(constraint[2])
+            constraint_mask = compare(values[self.variable_positions[constraint[0]]], constraint[1], column_y)
+            mask = constraint_mask if mask is None else mask & constraint_mask
+
+        return mask
+
+    def get_cache_key(self, source):
+        """
+        returns the key of the hash tables of the scanned records, which starts with the source and name of the scanned relation
+        and tells the scans of the relation apart by their header, constraints and kept columns
+        """
+        return (source, self.name, tuple(self.header), tuple(self.constraints), tuple(self.columns))
+
+    def get_statistics_key(self, source):
+        """
+        returns the key of the statistics of the scanned relation
+        """
+        return (source, self.name)
+
+    def __repr__(self):
+        return '%r' % (self.__dict__)
+
+class RulePlan(object):
+
+    def __init__(self, rule, EDB_relations, IDB_relations, CDB_relations, CDB_indexes = None, fixed_old_relations = []):
+        """
+        execution plan of a rule, compiled once before the evaluation:
+        the scans of the rule body predicates, the semi-naive delta variants, the constraints and the projection on the rule head
+        CDB_indexes are the context indexes of the CDB relations, read by the scans of CDB predicates
+        fixed_old_relations are IDB relations whose old data frame is their EDB data frame, which does not change during the evaluation,
+        so that their old scans are read like the scans of EDB relations, with the inputs and hash tables kept across iterations
+        """
+        self.rule = rule
+        self.head_name = rule.head.name
+        self.scans = []
+
+        # projection on the rule head: each column of the head is either a variable or a constant symbol id
+        self.head_header = rule.head.arguments + [rule.head.context]
+        self.head_terms = [term if is_upper_case(term) else symbol_table.intern(term) for term in self.head_header[: -1]]
+        self.head_terms.append(rule.head.context if is_upper_case(rule.head.context) else context_table.intern(rule.head.context))
+        self.head_variables = set(get_variables(self.head_header))
+
+        # constraints as tuples of the form (variable, theta operator, variable/constant)
+        predicates = [predicate for predicate in rule.body if predicate.type != 'constraint']
+        constraints = [(predicate.term_x, predicate.theta, predicate.term_y) for predicate in rule.body if predicate.type == 'constraint']
+        predicate_variables = [set(get_variables(predicate.arguments + [predicate.context])) for predicate in predicates]
+
+        # a constraint on the variables of a single predicate is applied by the scan of the first such predicate,
+        # the other constraints are applied by the joins, as soon as their variables are bound
+        scan_constraints = [[] for predicate in predicates]
+        self.constraints = []
+
+        for constraint in constraints:
+            owners = [index for index, variables in enumerate(predicate_variables) if get_constraint_variables(constraint) <= variables]
+
+            if len(owners):
+                scan_constraints[owners[0]].append(constraint)
+            else:
+                self.constraints.append(constraint)
+
+        # each scan keeps the columns of the variables of the head, of the constraints applied by the joins, and of the other predicates
+        constraint_variables = set().union(*[get_constraint_variables(constraint) for constraint in self.constraints])
+
+        for index, predicate in enumerate(predicates):
+            variables = self.head_variables | constraint_variables
+            variables = variables.union(*[predicate_variables[other] for other in range(0, len(predicates)) if other != index])
+
+            if predicate.name in EDB_relations:
+                self.scans.append(Scan(predicate, 'EDB', None, scan_constraints[index], variables))
+            elif predicate.name in CDB_relations:
+                self.scans.append(Scan(predicate, 'CDB', None if CDB_indexes is None else CDB_indexes.get(predicate.name), scan_constraints[index], variables))
+            else:
+                self.scans.append(Scan(predicate, 'IDB', None, scan_constraints[index], variables))
+
+        self.IDB_scans = [index for index, scan in enumerate(self.scans) if scan.database == 'IDB']
+
+        # delta variants: for each combination of old and delta data frames of the IDB predicates,
+        # the source of each scan, that is EDB, CDB, IDB_old or IDB_delta
+        # a rule body without IDB predicates has a single variant
+        self.variants = []
+        combinations = get_combinations(self.IDB_scans) if len(self.IDB_scans) else [[]]
+
+        for combination in combinations:
+            sources = [scan.database for scan in self.scans]
+            for index, old_or_delta in zip(self.IDB_scans, combination):
+                sources[index] = 'IDB_delta' if old_or_delta else 'IDB_old'
+            self.variants.append(sources)
+
+        # steps of the joins of the scans in each order they are joined, built when first needed
+        self.join_steps = {}
+
+        # scanned EDB and CDB data frames, which do not change during the evaluation
+        self.fixed_inputs = {}
+        self.fixed_old_relations = set(fixed_old_relations)
+
+    def execute(self, databases, join_backend, join_planner, variants = None, frames = None, tracer = None):
+        """
+        returns the facts derived by the rule from the relations in databases, a dictionary with the keys EDB, CDB, IDB_old and IDB_delta
+        the returned data frame has the columns of the rule head, or is None if no fact is derived
+        variants are the positions of the delta variants to evaluate, all of them by default
+        frames are data frames read instead of the relations in databases, keyed by (scan position, source), like the shards of partitioned relations,
+        their scans and hash tables are not kept
+        the tracer, if any, records the rows of the inputs and joins of each variant
+        """
+        # scan each IDB predicate's old and delta data frames once for all the variants
+        scanned = {}
+
+        # stores records derived from each variant
+        variant_results = []
+
+        for sources in (self.variants if variants is None else [self.variants[position] for position in variants]):
+
+            # gather the data frames to join for the current variant as (data frame, cache key, statistics key, column positions)
+            inputs = []
+
+            for index, source in enumerate(sources):
+                scan = self.scans[index]
+
+                if source == 'IDB_old' and scan.name in self.fixed_old_relations:
+                    source = 'EDB'
+
+                if frames is not None:
+                    data_frame = scan.evaluate(frames[(index, source)])
+                    cache_key = None
+                elif source in ['EDB', 'CDB']:
+                    if index not in self.fixed_inputs:
+                        self.fixed_inputs[index] = scan.evaluate(databases[source][scan.name])
+                    data_frame = self.fixed_inputs[index]
+                    cache_key = scan.get_cache_key(source)
+                else:
+                    if (index, source) not in scanned:
+                        scanned[(index, source)] = scan.evaluate(databases[source][scan.name])
+                    data_frame = scanned[(index, source)]
+                    cache_key = None
+
+                inputs.append((data_frame, cache_key, scan.get_statistics_key(source), scan.positions))
+
+            # if an empty data frame in encountered in the variant, the result of the variant will also be empty
+            # hence, continue to check next variant
+            if any(len(variant_input[0]) == 0 for variant_input in inputs):
+                if tracer is not None:
+                    tracer.record_variant(self, sources, [len(variant_input[0]) for variant_input in inputs], None, [])
+                continue
+
+            variant_facts = self.join(inputs, join_backend, join_planner, sources, tracer)
+
+            # if at least one record is derived by the variant, accumulate the records for later operations
+            if len(variant_facts):
+                variant_results.append(variant_facts)
+
+        if not len(variant_results):
+            return None
+
+        new_facts = variant_results[0] if len(variant_results) == 1 else pd.concat(variant_results, ignore_index = True)
+
+        return self.project(new_facts)
+
+    def join(self, inputs, join_backend, join_planner, sources = None, tracer = None):
+        """
+        returns the join of the data frames of the inputs, in the order given by the join planner
+        the tracer, if any, records the rows of the inputs and the rows and time of the result of each join, with the sources of the variant
+        """
+        # order the data frames to join according to the current statistics of the relations
+        order = join_planner.order([(list(data_frame.columns), len(data_frame), statistics_key, positions) for data_frame, cache_key, statistics_key, positions in inputs])
+        join_steps, unbound_constraints = self.get_join_steps(order)
+        joined = inputs[order[0]][0]
+        steps = []
+
+        for position, join_columns, constraints, columns in join_steps:
+            data_frame, cache_key = inputs[position][0 : 2]
+
+            # find common arguments between the predicates by finding out common headings between the data frames
+            # perform an inner join on them if common arguments are found, or a cross join otherwise
+            # the EDB and CDB data frames do not change between iterations, so their hash tables can be reused
+            join_on = get_common_arguments(joined, data_frame)
+            left_rows = len(joined)
+            start = time.perf_counter() if tracer is not None else None
+            joined = join_backend.join(joined, data_frame, join_on, cache_key, join_columns)
+
+            # apply the constraints whose variables are bound by the join, then keep the columns still needed
+            if len(constraints) and len(joined):
+                mask = apply_constraint(joined, constraints[0])
+
+                for constraint in constraints[1 : len(constraints)]:
+                    mask &= apply_constraint(joined, constraint)
+
+                joined = factsets.get_columns_view([joined[column].values[mask] for column in columns], columns, int(mask.sum()))
+
+            if tracer is not None:
+                steps.append({'scan' : position, 'on' : list(join_on), 'left_rows' : left_rows, 'right_rows' : len(data_frame), 'rows' : len(joined), 'seconds' : time.perf_counter() - start})
+
+            if not len(joined):
+                break
+
+        # constraints on variables of no predicate, which cannot be satisfied
+        for constraint in unbound_constraints:
+            joined = joined[apply_constraint(joined, constraint)]
+
+        if tracer is not None:
+            tracer.record_variant(self, sources, [len(data_frame) for data_frame, cache_key, statistics_key, positions in inputs], order, steps)
+
+        return joined
+
+    def get_join_steps(self, order):
+        """
+        returns the steps joining the scans in the given order, and the constraints whose variables are bound by no scan
+        each step joins a scan after the first one, as a tuple (scan position, columns of the join, constraints, columns kept):
+        the constraints are the ones whose variables are bound once the scan is joined, and the columns kept are the ones
+        still needed by the head, by the constraints not applied yet and by the scans joined later
+        """
+        key = tuple(order)
+
+        if key not in self.join_steps:
+            columns = list(self.scans[order[0]].columns)
+            constraints = list(self.constraints)
+            steps = []
+
+            for step, position in enumerate(order[1 : len(order)], 1):
+                columns = columns + [column for column in self.scans[position].columns if column not in columns]
+                applied = [constraint for constraint in constraints if get_constraint_variables(constraint) <= set(columns)]
+                constraints = [constraint for constraint in constraints if constraint not in applied]
+
+                needed = self.head_variables.union(*[get_constraint_variables(constraint) for constraint in constraints])
+                needed = needed.union(*[self.scans[later].columns for later in order[step + 1 : len(order)]])
+
+                join_columns = [column for column in columns if column in needed or any(column in get_constraint_variables(constraint) for constraint in applied)]
+                columns = [column for column in columns if column in needed]
+                steps.append((position, join_columns, applied, columns))
+
+            self.join_steps[key] = (steps, constraints)
+
+        return self.join_steps[key]
+
+    def project(self, data_frame):
+        """
+        returns the records of a data frame projected on the columns of the rule head,
+        with a column of the constant's symbol id for each constant in the rule head
+        """
+        data = {}
+
+        for position, term in enumerate(self.head_terms):
+            if isinstance(term, str):
+                data[position] = data_frame[term].values
+            else:
+                data[position] = np.full(len(data_frame), term, dtype = SYMBOL_DTYPE)
+
+        return pd.DataFrame(data, index = None, copy = False)
+
+    def __repr__(self):
+        return '%r' % (self.__dict__)
+
+def apply_constraint(data_frame, constraint):
+    """
+    returns a boolean mask of the records of a data frame satisfying a constraint of the form (variable, theta operator, variable/constant)
+    """
+    column_x = data_frame[constraint[0]].values
+
+    # comparison operation between two variables
+    # applied on columns with the column headings which correspond to these variables
+    if is_upper_case(constraint[2]):
+        column_y = data_frame[constraint[2]].values
+
+    # comparison operation between a variables and a constant
+    # applied on the column with the column heading corresponding to the variable
+    else:
+        column_y = symbol_table.intern(constraint[2])
+
+    return compare(column_x, constraint[1], column_y)
+
+def compare(column_x, theta, column_y):
+    """
+    returns a boolean mask of the symbol ids of column_x satisfying the comparison with column_y, a column or a symbol id
+    numbers are compared by value, as int64 or float64, and strings lexicographically, every number being lower than every string
+    """
+    return symbol_table.compare(column_x, theta_operations[theta], column_y)
+
+def get_constraint_variables(constraint):
+    """
+    returns the set of the variables of a constraint of the form (variable, theta operator, variable/constant)
+    """
+    return set(term for term in [constraint[0], constraint[2]] if is_upper_case(term))
+
+def get_variables(columns):
+    """
+    returns a list of all the variables (column names starting with upper case letters)
+    """
+    return [argument for argument in columns if is_upper_case(argument)]
+
+def get_common_arguments(table_1, table_2):
+    """
+    returns a list of all the common columns between the two tables
+    """
+    columns_2 = set(table_2.columns)
+    return [column for column in table_1.columns if column in columns_2]
+
+def get_combinations(predicates):
+    """
+    returns a list of all the ways of selecting n elements from two lists of length n
+    where the element at index i can be selected from either list 1 or list 2
+    for example, for a list of length 3 passed as an argument to the function, the combinations generated will be
+    [[1, 0, 0], [0, 1, 0], [0, 0, 1], [1, 1, 0], [1, 0, 1], [0, 1, 1], [1, 1, 1]]
+    where 0 indicates a selection from list 1 and 1 indicates a selection from list 2
+    """
+    predicate_count = len(predicates)
+    predicate_indices = range(0, predicate_count)
+    subsets = []
+
+    for subset_size in range(1, predicate_count + 1):
+        for subset in itertools.combinations(predicate_indices, subset_size):
+            subsets.append(subset)
+
+    predicate_combinations = []
+
+    for set in subsets:
+        predicate_combination = [1 if index in set else 0 for index in range(0, predicate_count)]
+        predicate_combinations.append(predicate_combination)
+
+    return predicate_combinations
@@ -0,0 +1,177 @@
+import json
+import os
+import time
+import tracemalloc
+
+class Tracer(object):
+    """
+    hooks called by the bottom-up evaluation when a tracer is given, doing nothing
+    the evaluation only calls them if a tracer is given, so that they cost nothing otherwise
+    """
+
+    def start_rule(self, rule_plan, databases):
+        """
+        called before a rule plan is executed over the relations in databases
+        """
+        pass
+
+    def record_variant(self, rule_plan, sources, input_rows, order, joins):
+        """
+        called for each delta variant of a rule plan, with the sources of its scans, the number of records of each scanned input,
+        the order in which the scans are joined, and each join step as a dictionary with the rows of its inputs and of its result and its time in seconds,
+        the order being None and without join steps if an input is empty
+        """
+        pass
+
+    def end_rule(self, rule_plan, seconds, derived_rows):
+        """
+        called after a rule plan is executed, with the number of records it derived, before removing duplicates
+        """
+        pass
+
+    def record_dedup(self, relation, rule_plan, rows_before, rows_after):
+        """
+        called when the facts derived by a rule plan, or by all the rules of a single pass, are added to a relation,
+        with the number of records derived and the number of them which were new facts, once their duplicates and the facts known are removed
+        """
+        pass
+
+    def record_iteration(self, relations, iteration, seconds, new_facts):
+        """
+        called after each iteration of a stratum, with the number of facts derived in the iteration which were not known
+        """
+        pass
+
+class Profiler(Tracer):
+
+    def __init__(self, memory = True):
+        """
+        tracer recording, for each iteration of each stratum and each rule evaluated in it: the wall time, the records of the old and delta
+        relations it read, the rows of the inputs and results of its joins, the rows derived before and after removing duplicates,
+        and with memory, the change and the peak of the memory allocated while it ran, traced by tracemalloc
+
+        the rules are only recorded one by one when they are evaluated in the main process, not by the workers of a parallel evaluation
+        """
+        self.memory = memory
+        self.start = time.perf_counter()
+        self.iterations = []
+
+        # rules of the iteration being evaluated, and the rule being executed
+        self.rules = []
+        self.rule = None
+
+        # number of each iteration of each stratum, keyed by its relations, as a stratum evaluated by context partitions restarts its iterations
+        self.iteration_numbers = {}
+
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def start_rule(self, rule_plan, databases):
+        inputs = {}
+
+        for scan in rule_plan.scans:
+            if scan.database == 'IDB':
+                inputs[scan.name] = {'old_rows' : len(databases['IDB_old'][scan.name]) if 'IDB_old' in databases else None,
+                                     'delta_rows' : len(databases['IDB_delta'][scan.name]) if 'IDB_delta' in databases else None}
+
+        self.rule = {'rule' : get_rule_text(rule_plan.rule), 'head' : rule_plan.head_name, 'start' : time.perf_counter() - self.start, 'inputs' : inputs, 'variants' : [], 'dedup' : []}
+
+        if self.memory:
+            tracemalloc.reset_peak()
+            self.rule['memory_before'] = tracemalloc.get_traced_memory()[0]
+
+    def record_variant(self, rule_plan, sources, input_rows, order, joins):
+        if self.rule is not None:
+            self.rule['variants'].append({'sources' : list(sources), 'input_rows' : list(input_rows), 'order' : order, 'joins' : joins})
+
+    def end_rule(self, rule_plan, seconds, derived_rows):
+        rule = self.rule
+        rule['seconds'] = seconds
+        rule['derived_rows'] = derived_rows
+
+        if self.memory:
+            # the peak is the highest memory allocated while the rule ran, over the memory allocated when it started
+            current, peak = tracemalloc.get_traced_memory()
+            memory_before = rule.pop('memory_before')
+            rule['memory_delta_bytes'] = current - memory_before
+            rule['memory_peak_bytes'] = peak - memory_before
+
+        self.rules.append(rule)
+        self.rule = None
+
+    def record_dedup(self, relation, rule_plan, rows_before, rows_after):
+        dedup = {'relation' : relation, 'rows_before' : rows_before, 'rows_after' : rows_after}
+
+        if rule_plan is not None and len(self.rules) and self.rules[-1]['head'] == relation:
+            self.rules[-1]['dedup'].append(dedup)
+        else:
+            self.rules.append({'relation_dedup' : dedup})
+
+    def record_iteration(self, relations, iteration, seconds, new_facts):
+        key = tuple(relations)
+        self.iteration_numbers[key] = self.iteration_numbers.get(key, 0) + 1
+
+        self.iterations.append({'relations' : list(relations), 'iteration' : iteration, 'sequence' : self.iteration_numbers[key],
+                                'start' : time.perf_counter() - self.start - seconds, 'seconds' : seconds, 'new_facts' : new_facts,
+                                'rules' : [rule for rule in self.rules if 'rule' in rule],
+                                'dedup' : [rule['relation_dedup'] for rule in self.rules if 'relation_dedup' in rule]})
+        self.rules = []
+
+    def get_profile(self):
+        """
+        returns the profile as a dictionary for JSON, with the times in seconds from the creation of the profiler
+        """
+        return {'iterations' : self.iterations,
+                'total_seconds' : sum(iteration['seconds'] for iteration in self.iterations)}
+
+    def get_trace_events(self):
+        """
+        returns the profile in the Chrome trace event format, read by chrome://tracing and Perfetto:
+        a complete event for each iteration and each rule within it, with the times in microseconds
+        """
+        events = []
+
+        for iteration in self.iterations:
+            name = '+'.join(iteration['relations']) + ' iteration ' + str(iteration['iteration'])
+            events.append({'name' : name, 'cat' : 'iteration', 'ph' : 'X', 'pid' : os.getpid(), 'tid' : 1,
+                           'ts' : iteration['start'] * 1e6, 'dur' : iteration['seconds'] * 1e6,
+                           'args' : {'new_facts' : iteration['new_facts'], 'dedup' : iteration['dedup']}})
+
+            for rule in iteration['rules']:
+                arguments = dict((key, value) for key, value in rule.items() if key not in ['rule', 'start', 'seconds'])
+                events.append({'name' : rule['rule'], 'cat' : 'rule', 'ph' : 'X', 'pid' : os.getpid(), 'tid' : 1,
+                               'ts' : rule['start'] * 1e6, 'dur' : rule['seconds'] * 1e6, 'args' : arguments})
+
+        return {'traceEvents' : events, 'displayTimeUnit' : 'ms'}
+
+    def write_profile(self, file_path):
+        with open(file_path, 'w') as file:
+            json.dump(self.get_profile(), file, indent = 2)
+
+    def write_trace(self, file_path):
+        with open(file_path, 'w') as file:
+            json.dump(self.get_trace_events(), file)
+
+    def close(self):
+        if self.memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def __repr__(self):
+        return '%r' % (self.__dict__)
+
+def get_predicate_text(predicate):
+    """
+    returns the text of a predicate or constraint as written in a program
+    """
+    if predicate.type == 'constraint':
+        return '%s %s %s' % (predicate.term_x, predicate.theta, predicate.term_y)
+
+    text = '%s(%s)' % (predicate.name, ', '.join(str(argument) for argument in predicate.arguments))
+
+    return text if predicate.context == 'none' else text + '@' + predicate.context
+
+def get_rule_text(rule):
+    """
+    returns the text of a rule as written in a program, with its body in the order it is evaluated
+    """
+    return get_predicate_text(rule.head) + ' :- ' + ', '.join(get_predicate_text(predicate) for predicate in rule.body) + '.'
@@ -0,0 +1,141 @@
+import re
+import tokenizer
+from elements import FactBlock, get_context_name
+
+# number of bytes of lines read from a program file at a time
+CHUNK_SIZE = 1 << 20
+
+# a ground fact as the tokenizer reads it: a predicate name, constant arguments, names or numbers, and an optional constant context, single or composite like c1+c2
+NAME = r'[a-z0-9_][A-Za-z0-9_]*'
+CONSTANT = r'(?:' + tokenizer.FLOAT + r'|' + tokenizer.INTEGER + r'|' + NAME + r')'
+
+# arguments read as numbers, like the INTEGER and FLOAT tokens
+NUMBER = re.compile(tokenizer.FLOAT + r'|' + tokenizer.INTEGER)
+FACT = r'(' + NAME + r')[ \t]*\([ \t]*(' + CONSTANT + r'(?:[ \t]*,[ \t]*' + CONSTANT + r')*)[ \t]*\)(?:[ \t]*@[ \t]*(' + NAME + r'(?:[ \t]*\+[ \t]*' + NAME + r')*))?[ \t]*\.'
+
+# lines holding a single ground fact, or several of them, with an optional comment
+FACT_LINE = re.compile(r'[ \t]*' + FACT + r'[ \t]*(?:%.*)?\s*')
+FACTS_LINE = re.compile(r'[ \t]*(?:' + FACT + r'[ \t]*)+(?:%.*)?\s*')
+FACT_PATTERN = re.compile(FACT)
+
+# input declarations may end without a period
+INPUT_LINE = re.compile(r'\.input[ \t]+' + NAME + r'[ \t]+"[^"\n]*"')
+
+class FactReader(object):
+
+    def __init__(self):
+        """
+        reads a program line by line, storing the lines of ground facts column by column in a fact block per predicate
+        and keeping the other lines, the contexts, rules, queries and input declarations, for the grammar
+
+        a line is read as facts only if it starts a statement, so that lines continuing a rule or a context are left to the grammar
+        fact lines are kept as empty lines, so that the grammar reports errors at the lines of the program
+        """
+        self.blocks = {}
+        self.lines = []
+
+        # number of fact lines since the last line kept
+        self.fact_lines = 0
+
+        # whether the lines kept so far end with a complete statement
+        self.complete = True
+
+        # whether any statement is kept for the grammar
+        self.statements = False
+
+    def read_file(self, file):
+        """
+        reads the lines of a program file in chunks, so that only the facts read so far are held in memory, in their columns
+        """
+        while True:
+            lines = file.readlines(CHUNK_SIZE)
+
+            if not len(lines):
+                break
+
+            self.read_lines(lines)
+
+    def read_lines(self, lines):
+        for line in lines:
+            if self.complete and self.read_facts(line):
+                self.fact_lines += 1
+                continue
+
+            if self.fact_lines:
+                self.lines.append('\n' * self.fact_lines)
+                self.fact_lines = 0
+
+            self.lines.append(line)
+
+            # comments are stripped to find where the statement ends, except on lines with strings that may hold %
+            code = (line if '"' in line else line.split('%', 1)[0]).strip()
+
+            if len(code):
+                self.statements = True
+                self.complete = code[-1] in '.?' or INPUT_LINE.fullmatch(code) is not None
+
+    def read_facts(self, line):
+        """
+        adds the facts of a line to the fact blocks if the line only holds ground facts, and returns whether it did
+        facts whose number of arguments differs from the facts of their predicate already read are left to the grammar
+        """
+        match = FACT_LINE.fullmatch(line)
+
+        if match is not None:
+            facts = [match.groups()]
+        elif FACTS_LINE.fullmatch(line) is not None:
+            facts = [fact.groups() for fact in FACT_PATTERN.finditer(line)]
+        else:
+            return False
+
+        records = []
+
+        for name, arguments, context in facts:
+            record = [get_constant(argument.strip()) for argument in arguments.split(',')]
+            arity = len(record)
+
+            if name in self.blocks and self.blocks[name].arity != arity:
+                return False
+
+            if any(other_name == name and len(other_record) != arity + 1 for other_name, other_record in records):
+                return False
+
+            if context is None:
+                context = 'none'
+            elif '+' in context:
+                context = get_context_name(member.strip() for member in context.split('+'))
+
+            record.append(context)
+            records.append((name, record))
+
+        for name, record in records:
+            if name not in self.blocks:
+                self.blocks[name] = FactBlock(name, len(record) - 1)
+
+            self.blocks[name].add(record)
+
+        return True
+
+    def get_text(self):
+        """
+        returns the text of the lines kept for the grammar, or None if they hold no statement
+        """
+        if not self.statements:
+            return None
+
+        return ''.join(self.lines)
+
+    def get_blocks(self):
+        return list(self.blocks.values())
+
+    def __repr__(self):
+        return '%r' % (self.__dict__)
+
+def get_constant(text):
+    """
+    returns the constant of an argument of a fact, the int or float of an integer or float literal, or else the name itself
+    """
+    if NUMBER.fullmatch(text) is None:
+        return text
+
+    return float(text) if '.' in text else int(text)
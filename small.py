@@ -0,0 +1,610 @@
+import itertools
+import operator
+import strata
+from elements import is_upper_case, get_context_name, get_symbol_key, theta_operations
+
+# largest number of facts and context records of a program evaluated over records of python values,
+# and largest number of records of its relations, beyond which the program is left to the engine, whose numpy columns are faster
+MAX_FACTS = 1000
+MAX_RECORDS = 20000
+
+class SmallProgram(object):
+
+    def __init__(self, program):
+        """
+        relations of a small parsed program as lists of records of symbol ids, tuples of python integers, built like the data frames of a database:
+        the facts in EDB, the attributes of the contexts in CDB, and a list for each rule head and each predicate without facts in IDB,
+        with the rule bodies reordered like the database reorders them
+
+        a small program is evaluated without importing numpy and pandas, whose import takes longer than evaluating the program,
+        with the plans, join orders and hash joins of the bottom-up evaluation, so that the facts are derived in the same order
+        supported is set to False for the programs the engine evaluates otherwise: programs with queries or input files,
+        more than MAX_FACTS facts, relations used with several arities, or constraints on variables bound by no predicate
+        """
+        self.supported = True
+
+        # symbol values and the id of each symbol key, the ids being dense like the ids of the symbol table
+        self.values = []
+        self.ids = {}
+        self.none = self.intern('none')
+
+        self.EDB = {}
+        self.IDB = {}
+        self.CDB = {}
+        self.EDB_relations = []
+        self.IDB_relations = []
+        self.CDB_relations = []
+        self.rules = []
+
+        self.load(program)
+
+    def intern(self, value):
+        """
+        returns the id of a symbol, adding it if it is not already there, ints and floats being distinct symbols like in the symbol table
+        """
+        key = get_symbol_key(value)
+        symbol_id = self.ids.get(key)
+
+        if symbol_id is None:
+            symbol_id = len(self.values)
+            self.ids[key] = symbol_id
+            self.values.append(value)
+
+        return symbol_id
+
+    def intern_context(self, context):
+        """
+        returns the id of the canonical name of a context name
+        """
+        return self.intern(get_context_name(context.split('+')) if isinstance(context, str) and context != 'none' else context)
+
+    def load(self, program):
+        """
+        gathers the records of the relations of the program statements, in the order the database gathers them
+        """
+        EDB_records = {}
+        EDB_blocks = {}
+        CDB_records = {}
+        arities = {}
+        fact_count = 0
+
+        for element in program:
+            if element.type == 'context':
+                for predicate in element.contextual_predicates:
+                    self.supported = self.supported and len(set(isinstance(argument, list) for argument in predicate.arguments)) == 1
+                    records = [argument + [predicate.context] if isinstance(argument, list) else [argument, predicate.context] for argument in predicate.arguments]
+
+                    if predicate.name not in self.CDB_relations:
+                        self.CDB_relations.append(predicate.name)
+
+                    CDB_records.setdefault(predicate.name, []).extend(records)
+                    fact_count += len(records)
+
+            elif element.type == 'fact':
+                if element.predicate.name not in self.EDB_relations:
+                    self.EDB_relations.append(element.predicate.name)
+
+                EDB_records.setdefault(element.predicate.name, []).append(element.predicate.arguments + [element.predicate.context])
+                fact_count += 1
+
+            elif element.type == 'fact_block':
+                if element.name not in self.EDB_relations:
+                    self.EDB_relations.append(element.name)
+
+                EDB_blocks.setdefault(element.name, []).append(element)
+                fact_count += len(element)
+
+            elif element.type == 'rule':
+                self.rules.append(element)
+
+                if element.head.name not in self.IDB_relations:
+                    self.IDB[element.head.name] = []
+                    self.IDB_relations.append(element.head.name)
+
+                for predicate in element.body:
+                    if predicate.type != 'constraint' and not (predicate.name in self.CDB_relations or predicate.name in self.EDB_relations or predicate.name in self.IDB_relations):
+                        self.IDB[predicate.name] = []
+                        self.IDB_relations.append(predicate.name)
+
+            else:
+                self.supported = False
+
+        if fact_count > MAX_FACTS or not self.supported:
+            self.supported = False
+            return
+
+        # the records of the fact blocks of a relation come before the records of its facts, like in the EDB data frames
+        for relation in self.EDB_relations:
+            records = [record for block in EDB_blocks.get(relation, []) for record in zip(*[[block.symbols[code] for code in block.codes[column]] for column in range(0, block.arity + 1)])]
+            self.EDB[relation] = [self.encode(record) for record in records + EDB_records.get(relation, [])]
+
+        for relation in self.CDB_relations:
+            self.CDB[relation] = [self.encode(record) for record in CDB_records[relation]]
+
+        # every relation has a single arity, and is not both a relation of the contexts and of facts or rules
+        for relation, records in list(self.EDB.items()) + list(self.CDB.items()):
+            for record in records:
+                self.supported = self.supported and arities.setdefault(relation, len(record)) == len(record)
+
+        self.supported = self.supported and not set(self.CDB_relations) & (set(self.EDB_relations) | set(self.IDB_relations))
+
+        for rule in self.rules:
+            for predicate in [rule.head] + [predicate for predicate in rule.body if predicate.type != 'constraint']:
+                self.supported = self.supported and arities.setdefault(predicate.name, len(predicate.arguments) + 1) == len(predicate.arguments) + 1
+
+            variables = set(argument for predicate in rule.body if predicate.type != 'constraint' for argument in predicate.arguments + [predicate.context])
+            self.supported = self.supported and all(term in variables for predicate in rule.body if predicate.type == 'constraint' for term in [predicate.term_x, predicate.term_y] if is_upper_case(term))
+
+        if not self.supported:
+            return
+
+        # a predicate with facts which is the head of a rule is an IDB relation starting with its facts
+        for relation in list(self.EDB_relations):
+            if relation in self.IDB_relations:
+                self.IDB[relation] = self.EDB.pop(relation)
+                self.EDB_relations.remove(relation)
+
+        # rule bodies in the order: IDB predicates, CDB predicates, EDB predicates, constraints, without changing the rules of the program
+        order = lambda predicate: 3 if predicate.type == 'constraint' else 0 if predicate.name in self.IDB_relations else 1 if predicate.name in self.CDB_relations else 2
+        self.rules = [type(rule)(rule.head, sorted(rule.body, key = order)) for rule in self.rules]
+
+    def encode(self, record):
+        """
+        returns the tuple of the symbol ids of a record of values, its context being named canonically
+        """
+        return tuple([self.intern(value) for value in record[0 : -1]] + [self.intern_context(record[-1])])
+
+    def compare(self, id_x, theta, id_y):
+        """
+        returns whether two symbols satisfy a comparison like the symbol table compares them: two ints as int64, the other numbers as float64,
+        strings by their values, and every number being lower than every string
+        """
+        operation = theta_operations[theta]
+        value_x, value_y = self.values[id_x], self.values[id_y]
+
+        if isinstance(value_x, str) or isinstance(value_y, str):
+            if isinstance(value_x, str) and isinstance(value_y, str):
+                return operation(id_x, id_y) if operation in [operator.eq, operator.ne] else operation(value_x, value_y)
+
+            return operation(isinstance(value_x, str), isinstance(value_y, str))
+
+        if is_integer(value_x) and is_integer(value_y):
+            return operation(value_x, value_y)
+
+        return operation(float(value_x), float(value_y))
+
+    def evaluate(self, join_order = 'cost'):
+        """
+        returns a dictionary with the records of the values of the IDB relations derived by semi-naive bottom-up evaluation,
+        in the order the engine derives them, or None if the relations grow beyond MAX_RECORDS records
+        """
+        planner = Planner(join_order == 'fixed')
+        fixed = dict(self.EDB)
+        fixed_relations = list(self.EDB_relations)
+        head_relations = [rule.head.name for rule in self.rules]
+
+        for relation in self.IDB_relations:
+            if relation not in head_relations:
+                fixed[relation] = self.IDB[relation]
+                fixed_relations.append(relation)
+
+        for relation in fixed_relations:
+            planner.update(('EDB', relation), fixed[relation])
+
+        for relation in self.CDB_relations:
+            planner.update(('CDB', relation), self.CDB[relation])
+
+        for stratum in strata.get_strata(self.rules):
+            rule_plans = [RulePlan(rule, fixed_relations, self.CDB_relations, self) for rule in stratum.rules]
+            stratum_IDB = self.evaluate_stratum(rule_plans, fixed, dict((relation, self.IDB[relation]) for relation in stratum.relations), stratum.recursive, planner)
+
+            if stratum_IDB is None:
+                return None
+
+            for relation in stratum.relations:
+                fixed[relation] = stratum_IDB[relation]
+                fixed_relations.append(relation)
+                planner.update(('EDB', relation), fixed[relation])
+
+        return dict((relation, [tuple(self.values[symbol_id] for symbol_id in record) for record in fixed[relation]]) for relation in self.IDB_relations)
+
+    def evaluate_stratum(self, rule_plans, EDB, IDB, recursive, planner):
+        """
+        evaluates the rules of a stratum like evaluation.evaluate_stratum, in a single pass if the stratum is not recursive,
+        and returns its IDB relations, or None if they grow beyond MAX_RECORDS records
+        """
+        fact_sets = dict((relation, FactSet()) for relation in IDB.keys())
+
+        for relation in IDB.keys():
+            fact_sets[relation].add(IDB[relation])
+
+        delta_starts = dict((relation, 0) for relation in IDB.keys())
+        first_iteration = True
+
+        while(True):
+            delta_ends = dict((relation, len(fact_sets[relation].records)) for relation in IDB.keys())
+            IDB_old = dict((relation, fact_sets[relation].records[0 : delta_starts[relation]]) for relation in IDB.keys())
+            IDB_delta = dict((relation, fact_sets[relation].records[delta_starts[relation] : delta_ends[relation]]) for relation in IDB.keys())
+
+            if recursive:
+                for relation in IDB.keys():
+                    planner.update(('IDB_old', relation), IDB_old[relation])
+                    planner.update(('IDB_delta', relation), IDB_delta[relation])
+
+            databases = {'EDB' : EDB, 'CDB' : self.CDB, 'IDB_old' : IDB_old, 'IDB_delta' : IDB_delta}
+
+            for rule_plan in rule_plans:
+                if first_iteration or len(rule_plan.IDB_scans):
+                    fact_sets[rule_plan.head_name].add(rule_plan.execute(databases, planner))
+
+            first_iteration = False
+            delta_starts = delta_ends
+
+            if sum(len(fact_set.records) for fact_set in fact_sets.values()) > MAX_RECORDS:
+                return None
+
+            if not recursive or sum(len(fact_sets[relation].records) - delta_starts[relation] for relation in IDB.keys()) == 0:
+                break
+
+        return dict((relation, fact_set.records) for relation, fact_set in fact_sets.items())
+
+    def __repr__(self):
+        return '%r' % (self.__dict__)
+
+class FactSet(object):
+
+    def __init__(self):
+        """
+        records of a relation in the order they were added, each once
+        """
+        self.records = []
+        self.known = set()
+
+    def add(self, records):
+        """
+        appends the records which are not known yet, each once
+        """
+        for record in records:
+            if record not in self.known:
+                self.known.add(record)
+                self.records.append(record)
+
+class Scan(object):
+
+    def __init__(self, predicate, database, constraints, variables, program):
+        """
+        scan of a rule body predicate over the records of a relation, selecting and projecting them like plans.Scan
+        """
+        self.name = predicate.name
+        self.database = database
+        self.program = program
+        self.header = predicate.arguments + [predicate.context]
+        self.constant_selections = []
+        self.variable_selections = []
+        self.variable_positions = {}
+
+        for position, term in enumerate(self.header):
+            if not is_upper_case(term):
+                self.constant_selections.append((position, program.intern_context(term) if position == len(self.header) - 1 else program.intern(term)))
+            elif term in self.variable_positions:
+                self.variable_selections.append((self.variable_positions[term], position))
+            else:
+                self.variable_positions[term] = position
+
+        self.context_position = len(self.header) - 1 if is_upper_case(predicate.context) else None
+        self.constraints = list(constraints)
+        self.columns = [term for term in self.variable_positions.keys() if term in variables]
+        self.positions = [self.variable_positions[term] for term in self.columns]
+
+    def evaluate(self, records):
+        """
+        returns the records of a relation selected by the scan, with the columns of the scan
+        """
+        selected = [record for record in records if self.is_selected(record)]
+
+        if not len(self.columns):
+            return selected[0 : 1] and [()]
+
+        return [tuple(record[position] for position in self.positions) for record in selected]
+
+    def is_selected(self, record):
+        """
+        returns whether a record of the relation is selected by the scan
+        """
+        if any(record[position] != symbol_id for position, symbol_id in self.constant_selections):
+            return False
+
+        if any(record[position_x] != record[position_y] for position_x, position_y in self.variable_selections):
+            return False
+
+        if self.context_position is not None and record[self.context_position] == self.program.none:
+            return False
+
+        for term_x, theta, term_y in self.constraints:
+            id_y = record[self.variable_positions[term_y]] if is_upper_case(term_y) else self.program.intern(term_y)
+
+            if not self.program.compare(record[self.variable_positions[term_x]], theta, id_y):
+                return False
+
+        return True
+
+class RulePlan(object):
+
+    def __init__(self, rule, EDB_relations, CDB_relations, program):
+        """
+        execution plan of a rule over records, with the scans, delta variants, constraints and head projection of plans.RulePlan
+        """
+        self.head_name = rule.head.name
+        self.program = program
+        self.head_terms = [term if is_upper_case(term) else program.intern(term) for term in rule.head.arguments]
+        self.head_terms.append(rule.head.context if is_upper_case(rule.head.context) else program.intern_context(rule.head.context))
+        self.head_variables = set(term for term in rule.head.arguments + [rule.head.context] if is_upper_case(term))
+
+        predicates = [predicate for predicate in rule.body if predicate.type != 'constraint']
+        constraints = [(predicate.term_x, predicate.theta, predicate.term_y) for predicate in rule.body if predicate.type == 'constraint']
+        predicate_variables = [set(term for term in predicate.arguments + [predicate.context] if is_upper_case(term)) for predicate in predicates]
+
+        # a constraint on the variables of a single predicate is applied by the scan of the first such predicate, the others by the joins
+        scan_constraints = [[] for predicate in predicates]
+        self.constraints = []
+
+        for constraint in constraints:
+            owners = [index for index, variables in enumerate(predicate_variables) if get_constraint_variables(constraint) <= variables]
+
+            if len(owners):
+                scan_constraints[owners[0]].append(constraint)
+            else:
+                self.constraints.append(constraint)
+
+        constraint_variables = set().union(*[get_constraint_variables(constraint) for constraint in self.constraints])
+        self.scans = []
+
+        for index, predicate in enumerate(predicates):
+            variables = (self.head_variables | constraint_variables).union(*[predicate_variables[other] for other in range(0, len(predicates)) if other != index])
+            database = 'EDB' if predicate.name in EDB_relations else 'CDB' if predicate.name in CDB_relations else 'IDB'
+            self.scans.append(Scan(predicate, database, scan_constraints[index], variables, program))
+
+        self.IDB_scans = [index for index, scan in enumerate(self.scans) if scan.database == 'IDB']
+
+        # delta variants in the order of plans.get_combinations, a body without IDB predicates having a single variant
+        self.variants = [[scan.database for scan in self.scans]]
+
+        if len(self.IDB_scans):
+            self.variants = []
+
+            for size in range(1, len(self.IDB_scans) + 1):
+                for subset in itertools.combinations(self.IDB_scans, size):
+                    self.variants.append([('IDB_delta' if index in subset else 'IDB_old') if scan.database == 'IDB' else scan.database for index, scan in enumerate(self.scans)])
+
+        self.fixed_inputs = {}
+
+    def execute(self, databases, planner):
+        """
+        returns the records derived by the rule from the records of the relations in databases
+        """
+        scanned = {}
+        results = []
+
+        for sources in self.variants:
+            inputs = []
+
+            for index, source in enumerate(sources):
+                scan = self.scans[index]
+
+                # the hash tables of the EDB and CDB inputs are kept by the hash join, and always built on them
+                if source in ['EDB', 'CDB']:
+                    if index not in self.fixed_inputs:
+                        self.fixed_inputs[index] = scan.evaluate(databases[source][scan.name])
+                    inputs.append((self.fixed_inputs[index], True, (source, scan.name), scan))
+                else:
+                    if (index, source) not in scanned:
+                        scanned[(index, source)] = scan.evaluate(databases[source][scan.name])
+                    inputs.append((scanned[(index, source)], False, (source, scan.name), scan))
+
+            if any(len(records) == 0 for records, cached, key, scan in inputs):
+                continue
+
+            results.extend(self.join(inputs, planner))
+
+        return results
+
+    def join(self, inputs, planner):
+        """
+        returns the projection on the rule head of the join of the inputs, in the order given by the planner, like plans.RulePlan.join
+        """
+        order = planner.order([(scan.columns, len(records), key, scan.positions) for records, cached, key, scan in inputs])
+        columns = list(self.scans[order[0]].columns)
+        joined = inputs[order[0]][0]
+        constraints = list(self.constraints)
+
+        for step, position in enumerate(order[1 : len(order)], 1):
+            records, cached, key, scan = inputs[position]
+            all_columns = columns + [column for column in scan.columns if column not in columns]
+            applied = [constraint for constraint in constraints if get_constraint_variables(constraint) <= set(all_columns)]
+            constraints = [constraint for constraint in constraints if constraint not in applied]
+
+            needed = self.head_variables.union(*[get_constraint_variables(constraint) for constraint in constraints])
+            needed = needed.union(*[self.scans[later].columns for later in order[step + 1 : len(order)]])
+            join_columns = [column for column in all_columns if column in needed or any(column in get_constraint_variables(constraint) for constraint in applied)]
+            kept_columns = [column for column in all_columns if column in needed]
+
+            joined, columns = hash_join(joined, columns, records, scan.columns, cached, join_columns)
+
+            if len(applied) and len(joined):
+                positions = dict((column, index) for index, column in enumerate(columns))
+                joined = [record for record in joined if all(self.satisfies(record, positions, constraint) for constraint in applied)]
+                joined = [tuple(record[positions[column]] for column in kept_columns) for record in joined]
+                columns = kept_columns
+
+            if not len(joined):
+                break
+
+        positions = dict((column, index) for index, column in enumerate(columns))
+
+        return [tuple(record[positions[term]] if isinstance(term, str) else term for term in self.head_terms) for record in joined]
+
+    def satisfies(self, record, positions, constraint):
+        """
+        returns whether a joined record satisfies a constraint of the form (variable, theta operator, variable/constant)
+        """
+        term_x, theta, term_y = constraint
+        id_y = record[positions[term_y]] if is_upper_case(term_y) else self.program.intern(term_y)
+
+        return self.program.compare(record[positions[term_x]], theta, id_y)
+
+class Planner(object):
+
+    def __init__(self, fixed = False):
+        """
+        join planner over records, ordering the inputs like planner.JoinPlanner with the distinct value counts of the relations,
+        or in the order of the rule body if fixed, like planner.FixedPlanner
+        """
+        self.fixed = fixed
+        self.relations = {}
+
+    def update(self, key, records):
+        """
+        replaces the statistics of a relation with the ones of its current records
+        """
+        self.relations[key] = (records, {})
+
+    def distinct(self, key, position, cardinality):
+        """
+        estimates the number of distinct values in a column of a relation after it was filtered down to cardinality records
+        """
+        if key not in self.relations:
+            return max(cardinality, 1)
+
+        records, distinct_counts = self.relations[key]
+
+        if position not in distinct_counts:
+            distinct_counts[position] = len(set(record[position] for record in records))
+
+        return max(min(distinct_counts[position], cardinality), 1)
+
+    def order(self, inputs):
+        """
+        returns the positions of the inputs in the order they should be joined, each input being a tuple
+        (columns, cardinality, statistics key, positions of the columns in the relation)
+        """
+        if self.fixed:
+            return list(range(0, len(inputs)))
+
+        remaining = list(range(0, len(inputs)))
+        distinct_values = [self.get_distinct_values(join_input) for join_input in inputs]
+
+        first = min(remaining, key = lambda position: inputs[position][1])
+        remaining.remove(first)
+        order = [first]
+        cardinality = inputs[first][1]
+        joined_values = dict(distinct_values[first])
+
+        while len(remaining):
+            best = None
+            best_estimate = None
+
+            for position in remaining:
+                shared = [variable for variable in distinct_values[position] if variable in joined_values]
+
+                if not len(shared):
+                    continue
+
+                estimate = float(cardinality) * inputs[position][1]
+                for variable in shared:
+                    estimate /= max(joined_values[variable], distinct_values[position][variable])
+
+                if best is None or estimate < best_estimate:
+                    best = position
+                    best_estimate = estimate
+
+            if best is None:
+                best = min(remaining, key = lambda position: inputs[position][1])
+                best_estimate = float(cardinality) * inputs[best][1]
+
+            remaining.remove(best)
+            order.append(best)
+            cardinality = max(best_estimate, 1)
+
+            for variable, count in distinct_values[best].items():
+                joined_values[variable] = min(joined_values.get(variable, count), count)
+
+            for variable in joined_values:
+                joined_values[variable] = min(joined_values[variable], cardinality)
+
+        return order
+
+    def get_distinct_values(self, join_input):
+        """
+        returns a dictionary with the estimated number of distinct values of each variable of an input
+        """
+        columns, cardinality, key, positions = join_input
+        distinct_values = {}
+
+        for column, position in zip(columns, positions):
+            if is_upper_case(column):
+                count = self.distinct(key, position, cardinality)
+                distinct_values[column] = min(distinct_values.get(column, count), count)
+
+        return distinct_values
+
+def hash_join(left, left_columns, right, right_columns, cached, columns):
+    """
+    returns the join of two lists of records on their common columns, or their cross join, with its columns, like joins.HashJoin:
+    the hash table is built on right if its hash table is cached or if it is the smaller input, otherwise on left,
+    the pairs of records being in the order of the records probing the hash table, then of the records of each key
+    only the given columns are kept, the columns of right in the join appearing once
+    """
+    on = [column for column in left_columns if column in right_columns]
+    left_positions = [position for position, column in enumerate(left_columns) if column in columns]
+    right_positions = [position for position, column in enumerate(right_columns) if column not in on and column in columns]
+    joined_columns = [left_columns[position] for position in left_positions] + [right_columns[position] for position in right_positions]
+
+    if not len(on):
+        pairs = [(left_record, right_record) for left_record in left for right_record in right]
+
+    elif cached or len(right) <= len(left):
+        table = get_hash_table(right, [right_columns.index(column) for column in on])
+        key_positions = [left_columns.index(column) for column in on]
+        pairs = [(left_record, right_record) for left_record in left for right_record in table.get(tuple(left_record[position] for position in key_positions), [])]
+
+    else:
+        table = get_hash_table(left, [left_columns.index(column) for column in on])
+        key_positions = [right_columns.index(column) for column in on]
+        pairs = [(left_record, right_record) for right_record in right for left_record in table.get(tuple(right_record[position] for position in key_positions), [])]
+
+    return [tuple([left_record[position] for position in left_positions] + [right_record[position] for position in right_positions]) for left_record, right_record in pairs], joined_columns
+
+def get_hash_table(records, positions):
+    """
+    returns a dictionary mapping the key of each record at the given positions to the list of its records, in their order
+    """
+    table = {}
+
+    for record in records:
+        table.setdefault(tuple(record[position] for position in positions), []).append(record)
+
+    return table
+
+def get_constraint_variables(constraint):
+    """
+    returns the set of the variables of a constraint of the form (variable, theta operator, variable/constant)
+    """
+    return set(term for term in [constraint[0], constraint[2]] if is_upper_case(term))
+
+def is_integer(value):
+    """
+    returns whether a number is compared as int64 by the symbol table
+    """
+    return isinstance(value, int) and -2 ** 63 <= value < 2 ** 63
+
+def evaluate(program, join_order = 'cost'):
+    """
+    returns a dictionary with the records of the values of the IDB relations of a small parsed program, derived in the order of the engine,
+    or None if the program is not small or not supported, and is left to the engine
+    """
+    small_program = SmallProgram(program)
+
+    if not small_program.supported:
+        return None
+
+    return small_program.evaluate(join_order)
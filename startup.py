@@ -0,0 +1,58 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# cold start budget in milliseconds for a full run of a small program without cache, on top of the start up of the interpreter:
+# importing contelog, parsing the program and evaluating it, without importing pandas and numpy
+BUDGET = 75
+
+# directory of the contelog modules, the measured code is run from there
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+def measure(code, runs):
+    """
+    returns the median wall time in milliseconds of running python code in fresh interpreters
+    """
+    times = []
+
+    for run in range(0, runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-W', 'ignore', '-c', code], cwd = DIRECTORY, stdout = subprocess.DEVNULL, check = True)
+        times.append((time.perf_counter() - start) * 1000)
+
+    return statistics.median(times)
+
+def main(arguments = None):
+
+    parser = argparse.ArgumentParser(description = 'Measures the cold start of contelog against its budget')
+    parser.add_argument('file', nargs = '?', default = os.path.join('Test Cases', 'test_1.clg'), help = 'Contelog program file')
+    parser.add_argument('--runs', type = int, default = 5, help = 'number of runs of each measurement, the median is reported')
+    parser.add_argument('--budget', type = float, default = BUDGET, help = 'budget in milliseconds for a full run of the program without cache')
+    args = parser.parse_args(arguments)
+
+    file_path = os.path.abspath(args.file)
+
+    # run everything once so that the parser tables and the compiled modules are written before measuring
+    measure('import contelog; contelog.main([%r, "--no-cache"])' % file_path, 1)
+
+    interpreter = measure('pass', args.runs)
+    parse = measure('import contelog; contelog.parse_program(open(%r).read())' % file_path, args.runs)
+    libraries = measure('import engine', args.runs)
+    run = measure('import contelog; contelog.main([%r, "--no-cache"])' % file_path, args.runs)
+
+    print('interpreter start up:               %8.1f ms' % interpreter)
+    print('import contelog and parse program:  %8.1f ms' % (parse - interpreter))
+    print('import evaluation libraries:        %8.1f ms' % (libraries - interpreter))
+    print('full run without cache:             %8.1f ms (budget %.1f ms)' % (run - interpreter, args.budget))
+
+    if run - interpreter > args.budget:
+        print('Cold start over budget')
+        return 1
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
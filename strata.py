@@ -0,0 +1,107 @@
+class Stratum(object):
+
+    def __init__(self, relations, rules, recursive):
+        """
+        strongly connected component of the predicate dependency graph:
+        the IDB relations of the component, the rules deriving them, and whether the rules are recursive
+        """
+        self.relations = relations
+        self.rules = rules
+        self.recursive = recursive
+
+    def __repr__(self):
+        return '%r' % (self.__dict__)
+
+def get_dependency_graph(rules):
+    """
+    returns the predicate dependency graph of the rules as a dictionary
+    with an edge from each rule head predicate to each predicate in the rule body that is the head of some rule
+    """
+    graph = {}
+
+    for rule in rules:
+        graph.setdefault(rule.head.name, [])
+
+    for rule in rules:
+        for predicate in rule.body:
+            if predicate.type != 'constraint' and predicate.name in graph and predicate.name not in graph[rule.head.name]:
+                graph[rule.head.name].append(predicate.name)
+
+    return graph
+
+def get_components(graph):
+    """
+    returns the strongly connected components of a graph, using Tarjan's algorithm without recursion
+    a component is returned only after all the components it has edges to, that is in topological order of dependencies
+    """
+    index = {}
+    low_link = {}
+    stack = []
+    on_stack = set()
+    components = []
+
+    for root in graph:
+        if root in index:
+            continue
+
+        # each frame of the depth-first search is a node with the position of its next edge to visit
+        search = [(root, 0)]
+        index[root] = low_link[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+
+        while len(search):
+            node, position = search.pop()
+
+            if position < len(graph[node]):
+                search.append((node, position + 1))
+                successor = graph[node][position]
+
+                if successor not in index:
+                    index[successor] = low_link[successor] = len(index)
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    search.append((successor, 0))
+
+                elif successor in on_stack:
+                    low_link[node] = min(low_link[node], index[successor])
+
+                continue
+
+            # all edges of the node are visited, pass its low link up to its parent in the search
+            if len(search):
+                parent = search[-1][0]
+                low_link[parent] = min(low_link[parent], low_link[node])
+
+            # the node is the root of a component, pop the component off the stack
+            if low_link[node] == index[node]:
+                component = []
+
+                while True:
+                    member = stack.pop()
+                    on_stack.remove(member)
+                    component.append(member)
+                    if member == node:
+                        break
+
+                components.append(component)
+
+    return components
+
+def get_strata(rules):
+    """
+    returns the strata of the rules in the order they have to be evaluated,
+    each stratum being a strongly connected component of the predicate dependency graph
+    """
+    graph = get_dependency_graph(rules)
+    strata = []
+
+    for component in get_components(graph):
+        component_rules = [rule for rule in rules if rule.head.name in component]
+
+        # a component is recursive if it has more than one predicate, or a predicate depending on itself
+        recursive = len(component) > 1 or component[0] in graph[component[0]]
+
+        strata.append(Stratum(sorted(component, key = list(graph.keys()).index), component_rules, recursive))
+
+    return strata
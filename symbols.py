@@ -0,0 +1,326 @@
+import math
+import operator
+import numpy as np
+import pandas as pd
+from elements import get_symbol_key, get_context_name
+
+# data type of the symbol ids stored in the data frames of the relations/predicates
+SYMBOL_DTYPE = np.int64
+
+# kinds of the symbols
+STRING = 0
+INT = 1
+FLOAT = 2
+KINDS = [STRING, INT, FLOAT]
+
+class SymbolTable(object):
+
+    def __init__(self):
+        """
+        interns every constant, context name and the none marker to a dense integer id
+        ids are given out in the order the symbols are first seen, starting from 0
+
+        the kind of each symbol and the value of each number are also kept in typed arrays indexed by id, so that numbers are compared as int64
+        or float64, the arrays being extended with the symbols interned since they were last read, like the object array of the symbol values
+        """
+        self.ids = {}
+        self.values = []
+
+        # object array of the symbol values, kind of each symbol, and int64 and float64 value of each number, indexed by id,
+        # of a capacity doubling as they grow, the first count symbols being held
+        self.value_array = np.empty(0, dtype = object)
+        self.kind_array = np.empty(0, dtype = np.int8)
+        self.integer_array = np.empty(0, dtype = np.int64)
+        self.float_array = np.empty(0, dtype = np.float64)
+        self.count = 0
+
+    def intern(self, value):
+        """
+        returns the id of a symbol, adding it to the table if it is not already there
+        symbols are strings, or ints and floats for the numbers of a program, strings being kept as strings even when they are written like numbers
+        an int and a float are distinct symbols even when they are equal, like 1 and 1.0, and so are 0.0 and -0.0
+        """
+        key = get_symbol_key(value)
+        symbol_id = self.ids.get(key)
+
+        if symbol_id is None:
+            symbol_id = len(self.values)
+            self.ids[key] = symbol_id
+            self.values.append(value)
+
+        return symbol_id
+
+    def intern_array(self, values):
+        """
+        returns an array with the ids of all the symbols in an array of values
+        each distinct value is interned only once
+        """
+        values = np.asarray(values, dtype = object)
+        codes, uniques = pd.factorize(values)
+
+        # values hashed alike but distinct symbols, like 1 and 1.0, or 0.0 and -0.0, are told apart by their kinds and signs
+        if any(not isinstance(value, str) for value in uniques):
+            kinds = np.fromiter((get_kind(value) + (len(KINDS) if isinstance(value, float) and math.copysign(1.0, value) < 0 else 0) for value in values), dtype = np.int64, count = len(values))
+            codes, uniques = pd.factorize(codes * 2 * len(KINDS) + kinds)
+            uniques = values[np.unique(codes, return_index = True)[1]]
+
+        ids = np.array([self.intern(value) for value in uniques], dtype = SYMBOL_DTYPE)
+
+        return ids[codes]
+
+    def decode(self, symbol_id):
+        """
+        returns the value of the symbol with the given id
+        """
+        return self.values[symbol_id]
+
+    def decode_array(self, ids):
+        """
+        returns an object array with the values of the symbols in an array of ids
+        """
+        return self.get_arrays()[0][ids]
+
+    def get_arrays(self):
+        """
+        returns the object array of the symbol values, the array of the kinds of the symbols,
+        and the int64 and float64 arrays of the values of the numbers, indexed by id
+        only the symbols interned since the arrays were last read are added to them
+        """
+        if self.count < len(self.values):
+            if len(self.values) > len(self.value_array):
+                capacity = max(2 * len(self.value_array), len(self.values), 1024)
+                self.value_array = np.resize(self.value_array, capacity)
+                self.kind_array = np.resize(self.kind_array, capacity)
+                self.integer_array = np.resize(self.integer_array, capacity)
+                self.float_array = np.resize(self.float_array, capacity)
+
+            values = self.values[self.count :]
+            end = len(self.values)
+
+            # ints beyond int64 are compared as float64
+            kinds = [FLOAT if kind == INT and not -2 ** 63 <= value < 2 ** 63 else kind for value, kind in zip(values, map(get_kind, values))]
+
+            self.value_array[self.count : end] = values
+            self.kind_array[self.count : end] = kinds
+            self.integer_array[self.count : end] = [value if kind == INT else 0 for value, kind in zip(values, kinds)]
+            self.float_array[self.count : end] = [np.nan if kind == STRING else float(value) for value, kind in zip(values, kinds)]
+            self.count = end
+
+        return self.value_array, self.kind_array, self.integer_array, self.float_array
+
+    def compare(self, ids_x, operation, ids_y):
+        """
+        returns a boolean mask of the symbols of an array of ids satisfying a comparison operation with the symbols of another array of ids or of an id:
+        numbers are compared by value, two ints as int64 and the other numbers as float64, strings lexicographically,
+        and every number is lower than every string
+        """
+        values, kinds, integers, floats = self.get_arrays()
+        ids_x, ids_y = np.broadcast_arrays(np.asarray(ids_x, dtype = SYMBOL_DTYPE), np.asarray(ids_y, dtype = SYMBOL_DTYPE))
+        kinds_x, kinds_y = kinds[ids_x], kinds[ids_y]
+
+        # a number and a string are compared by their kinds, a number being lower
+        strings_x, strings_y = kinds_x == STRING, kinds_y == STRING
+        mask = np.asarray(operation(strings_x, strings_y), dtype = bool)
+
+        integer_pairs = np.flatnonzero((kinds_x == INT) & (kinds_y == INT))
+        mask[integer_pairs] = operation(integers[ids_x[integer_pairs]], integers[ids_y[integer_pairs]])
+
+        float_pairs = np.flatnonzero(~strings_x & ~strings_y & ((kinds_x == FLOAT) | (kinds_y == FLOAT)))
+        mask[float_pairs] = operation(floats[ids_x[float_pairs]], floats[ids_y[float_pairs]])
+
+        # strings are equal when their ids are, and are ordered by their values
+        string_pairs = np.flatnonzero(strings_x & strings_y)
+
+        if operation in [operator.eq, operator.ne]:
+            mask[string_pairs] = operation(ids_x[string_pairs], ids_y[string_pairs])
+        elif len(string_pairs):
+            mask[string_pairs] = operation(values[ids_x[string_pairs]], values[ids_y[string_pairs]]).astype(bool)
+
+        return mask
+
+    def __len__(self):
+        return len(self.values)
+
+class ContextTable(object):
+
+    def __init__(self, symbol_table):
+        """
+        structure of the contexts of a symbol table: a context, single like c1 or composite like c1+c2, is kept in the records as a single symbol id,
+        and the table maps each context id to the sorted tuple of the ids of its member contexts, to the id of its canonical name, and to a bitset
+        over the member contexts, so that membership and subset tests between the contexts of columns are integer and bit operations,
+        the name of a context being split once per distinct context id instead of once per record
+        """
+        self.symbol_table = symbol_table
+
+        # sorted tuple of the member ids of each context id, and position of the bit of each member context
+        self.members = {}
+        self.bits = {}
+
+        # sorted array of the context ids known to the table, the id of the canonical name of each, and their bitsets as rows of 64 bit words
+        self.context_ids = np.empty(0, dtype = SYMBOL_DTYPE)
+        self.canonical_ids = np.empty(0, dtype = SYMBOL_DTYPE)
+        self.bitsets = np.zeros((0, 1), dtype = np.uint64)
+
+    def intern(self, name):
+        """
+        returns the id of the canonical name of a context given by its name, c2+c1 and c1+c2+c1 being the context c1+c2
+        """
+        return int(self.get_canonical_ids([self.symbol_table.intern(name)])[0])
+
+    def get_members(self, context_id):
+        """
+        returns the sorted tuple of the ids of the member contexts of a context, a single context being its only member
+        """
+        self.add([context_id])
+
+        return self.members[context_id]
+
+    def add(self, context_ids):
+        """
+        adds the contexts of an array of context ids not already known to the table, splitting the name of each new context once
+        the none marker has no member, and a number is a single context
+        """
+        new_ids = np.setdiff1d(np.asarray(context_ids, dtype = SYMBOL_DTYPE), self.context_ids)
+
+        if not len(new_ids):
+            return
+
+        canonical_ids = []
+
+        for context_id in new_ids.tolist():
+            name = self.symbol_table.decode(context_id)
+
+            if context_id == NONE:
+                members, canonical_id = (), NONE
+            elif not isinstance(name, str):
+                members, canonical_id = (context_id,), context_id
+            else:
+                names = name.split('+')
+                members = tuple(sorted(set(self.symbol_table.intern(member) for member in names)))
+                canonical_id = self.symbol_table.intern(get_context_name(names))
+
+            self.members[context_id] = members
+            canonical_ids.append(canonical_id)
+
+            for member in members:
+                self.bits.setdefault(member, len(self.bits))
+
+        # the new rows are appended, the bitsets being widened with the words of the new members, then all the rows are sorted by id
+        bitsets = np.zeros((len(self.context_ids) + len(new_ids), max((len(self.bits) + 63) // 64, 1)), dtype = np.uint64)
+        bitsets[: len(self.context_ids), : self.bitsets.shape[1]] = self.bitsets
+
+        for row, context_id in enumerate(new_ids.tolist(), len(self.context_ids)):
+            for member in self.members[context_id]:
+                bit = self.bits[member]
+                bitsets[row, bit // 64] |= np.uint64(1) << np.uint64(bit % 64)
+
+        context_ids = np.concatenate([self.context_ids, new_ids])
+        order = np.argsort(context_ids, kind = 'stable')
+
+        self.context_ids = context_ids[order]
+        self.canonical_ids = np.concatenate([self.canonical_ids, np.array(canonical_ids, dtype = SYMBOL_DTYPE)])[order]
+        self.bitsets = bitsets[order]
+
+    def get_rows(self, context_ids):
+        """
+        returns the rows of the table of an array of context ids, adding the contexts not already known to the table
+        """
+        context_ids = np.asarray(context_ids, dtype = SYMBOL_DTYPE)
+        self.add(np.unique(context_ids))
+
+        return np.searchsorted(self.context_ids, context_ids)
+
+    def get_canonical_ids(self, context_ids):
+        """
+        returns the ids of the canonical names of the contexts of an array of context ids, the contexts with the same members having the same id
+        """
+        rows = self.get_rows(context_ids)
+
+        return self.canonical_ids[rows]
+
+    def get_bitsets(self, context_ids):
+        """
+        returns the bitsets of the member contexts of an array of context ids, as a matrix with a row of 64 bit words per id
+        """
+        rows = self.get_rows(context_ids)
+
+        return self.bitsets[rows]
+
+    def contains(self, context_ids, member):
+        """
+        returns whether each context of an array of context ids has the context member, the id of a single context, as a member
+        """
+        self.add([member])
+        bit = self.bits.get(member)
+
+        if bit is None:
+            return np.zeros(len(context_ids), dtype = bool)
+
+        words = self.get_bitsets(context_ids)[:, bit // 64]
+
+        return (words & (np.uint64(1) << np.uint64(bit % 64))) != 0
+
+    def is_subset(self, context_ids_x, context_ids_y):
+        """
+        returns whether the members of each context of an array of context ids are members of the context at the same position of another array
+        """
+        bitsets_x = self.get_bitsets(context_ids_x)
+        bitsets_y = self.get_bitsets(context_ids_y)
+
+        return ((bitsets_x & ~bitsets_y) == 0).all(axis = 1)
+
+    def __repr__(self):
+        return '%r' % (self.__dict__)
+
+def encode_data_frame(data_frame):
+    """
+    returns a copy of a data frame of symbol values with every column encoded to symbol ids
+    """
+    encoded = pd.DataFrame(index = data_frame.index)
+
+    for position in range(0, len(data_frame.columns)):
+        encoded[position] = symbol_table.intern_array(data_frame.iloc[:, position].values)
+
+    encoded.columns = data_frame.columns
+
+    return encoded
+
+def encode_records(data_frame):
+    """
+    returns a copy of a data frame of records of symbol values encoded to symbol ids, the contexts of the last column
+    being mapped to the ids of their canonical names, so that the records of contexts with the same members have the same context
+    """
+    encoded = encode_data_frame(data_frame)
+
+    if len(encoded.columns):
+        encoded.isetitem(len(encoded.columns) - 1, context_table.get_canonical_ids(encoded.iloc[:, -1].values))
+
+    return encoded
+
+def decode_data_frame(data_frame):
+    """
+    returns a copy of a data frame of symbol ids with every column decoded to symbol values,
+    the columns holding only integers or only numbers having the int64 or float64 data type
+    """
+    return pd.DataFrame(symbol_table.decode_array(data_frame.values.astype(SYMBOL_DTYPE)), index = data_frame.index, columns = data_frame.columns).infer_objects()
+
+def get_kind(value):
+    """
+    returns the kind of a symbol: STRING, INT or FLOAT
+    """
+    return STRING if isinstance(value, str) else FLOAT if isinstance(value, float) else INT
+
+def empty_data_frame(columns):
+    """
+    returns an empty data frame with symbol id columns
+    """
+    return pd.DataFrame(np.empty((0, len(columns)), dtype = SYMBOL_DTYPE), columns = columns)
+
+# global symbol table shared by all the relations/predicates
+symbol_table = SymbolTable()
+
+# id of the marker used as the context of facts without a context
+NONE = symbol_table.intern('none')
+
+# member contexts of the contexts of the global symbol table
+context_table = ContextTable(symbol_table)
@@ -0,0 +1,22 @@
+import os
+import sys
+
+# the modules of the engine are at the root of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# programs of the test cases of the repository
+TEST_CASES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Test Cases')
+
+def get_rows(data_frame):
+    """
+    returns the set of the rows of a data frame as tuples
+    """
+    return set(data_frame.itertuples(index = False, name = None))
+
+def get_facts(relations):
+    """
+    returns the set of the decoded facts of each relation of a dictionary of data frames of symbol ids
+    """
+    from symbols import decode_data_frame
+
+    return dict((relation, get_rows(decode_data_frame(data_frame))) for relation, data_frame in relations.items())
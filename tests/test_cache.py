@@ -0,0 +1,75 @@
+import os
+import engine
+import profiler
+from conftest import get_facts
+
+RULES = """
+path(X, Y) :- edge(X, Y).
+path(X, Z) :- path(X, Y), edge(Y, Z).
+flies(X) :- bird(X), X != pingu.
+"""
+
+FACTS = """
+edge(a, b).
+edge(b, c).
+bird(tweety).
+bird(pingu).
+"""
+
+class StratumRecorder(profiler.Tracer):
+    """
+    tracer recording the relations of the strata evaluated, the strata read from the cache having no iteration
+    """
+
+    def __init__(self):
+        self.relations = set()
+
+    def record_iteration(self, relations, iteration, seconds, new_facts):
+        self.relations.update(relations)
+
+def evaluate(program, directory):
+    """
+    returns the set of the decoded facts of each IDB relation of the program evaluated with the cache in directory,
+    and the relations of the strata which were evaluated instead of read from the cache
+    """
+    recorder = StratumRecorder()
+    facts = get_facts(engine.Engine(program, cache_directory = str(directory), tracer = recorder).evaluate())
+
+    return facts, recorder.relations
+
+def get_full_facts(program):
+    return get_facts(engine.Engine(program).evaluate())
+
+def test_unchanged_program_is_read_from_the_cache(tmp_path):
+    facts, evaluated = evaluate(RULES + FACTS, tmp_path)
+    assert evaluated == set(['path', 'flies'])
+    assert len(os.listdir(str(tmp_path))) == 2
+
+    cached_facts, evaluated = evaluate(RULES + FACTS, tmp_path)
+    assert evaluated == set()
+    assert cached_facts == facts == get_full_facts(RULES + FACTS)
+
+def test_only_the_strata_reading_a_changed_fact_are_evaluated(tmp_path):
+    evaluate(RULES + FACTS, tmp_path)
+
+    program = RULES + FACTS + 'edge(c, d).\n'
+    facts, evaluated = evaluate(program, tmp_path)
+
+    assert evaluated == set(['path'])
+    assert facts == get_full_facts(program)
+    assert ('a', 'd', 'none') in facts['path']
+
+def test_only_the_strata_of_a_changed_rule_are_evaluated(tmp_path):
+    evaluate(RULES + FACTS, tmp_path)
+
+    # renaming the variables of a rule does not change its stratum
+    program = RULES.replace('flies(X) :- bird(X), X != pingu.', 'flies(Y) :- bird(Y), Y != pingu.') + FACTS
+    facts, evaluated = evaluate(program, tmp_path)
+    assert evaluated == set()
+
+    program = RULES.replace('X != pingu', 'X != tweety') + FACTS
+    facts, evaluated = evaluate(program, tmp_path)
+
+    assert evaluated == set(['flies'])
+    assert facts == get_full_facts(program)
+    assert facts['flies'] == set([('pingu', 'none')])
@@ -0,0 +1,83 @@
+import os
+import numpy as np
+import pytest
+import contexts
+import engine
+from symbols import symbol_table, context_table, decode_data_frame
+from conftest import get_facts, get_rows, TEST_CASES
+
+def test_composite_contexts_are_named_with_their_members_sorted():
+    facts = get_facts(engine.Engine("""
+    p(a)@c2+c1.
+    p(b)@c1.
+    p(c)@c1+c2+c1.
+    q(X)@c1+c2 :- p(X)@c1+c2.
+    r(X) :- p(X)@c1.
+    t(X)@C :- p(X)@C.
+    """).evaluate())
+
+    # the members of a composite context are sorted and distinct, and a composite context only matches the same composite context
+    assert facts['q'] == set([('a', 'c1+c2'), ('c', 'c1+c2')])
+    assert facts['r'] == set([('b', 'none')])
+    assert facts['t'] == set([('a', 'c1+c2'), ('b', 'c1'), ('c', 'c1+c2')])
+
+def test_contexts_updated_with_their_members_in_any_order_are_canonical():
+    contelog_engine = engine.Engine("""
+    p(a)@c1+c2.
+    q(X)@c1+c2 :- p(X)@c1+c2.
+    t(X)@C :- p(X)@C.
+    """)
+    contelog_engine.evaluate()
+    contelog_engine.update(inserts = {'p' : [['b', 'c2+c1'], ['c', 'c1+c2+c1']]})
+    facts = get_facts(contelog_engine.relations)
+
+    assert facts['q'] == set([('a', 'c1+c2'), ('b', 'c1+c2'), ('c', 'c1+c2')])
+    assert facts['t'] == facts['q']
+
+def test_context_membership_and_subsets_are_read_from_the_member_bitsets():
+    names = ['c1', 'c2+c1', 'c3', 'none', 'c1+c2+c3']
+    context_ids = np.array([symbol_table.intern(name) for name in names])
+
+    assert context_table.get_members(symbol_table.intern('c2+c1')) == tuple(sorted([symbol_table.intern('c1'), symbol_table.intern('c2')]))
+    assert context_table.get_canonical_ids(context_ids).tolist() == [context_table.intern(name) for name in ['c1', 'c1+c2', 'c3', 'none', 'c1+c2+c3']]
+    assert context_table.contains(context_ids, symbol_table.intern('c1')).tolist() == [True, True, False, False, True]
+    assert context_table.is_subset(context_ids, np.full(len(names), symbol_table.intern('c1+c2'))).tolist() == [True, True, False, True, False]
+
+CONTEXT_PROGRAM = """
+c1 = {zone:[north], link:[[a, b], [b, c]]}.
+c2 = {zone:[south], link:[[b, d]]}.
+c3 = {zone:[north], link:[[c, a], [a, d]]}.
+site(a). site(b). site(c).
+reach(X, Y)@C :- link(X, Y)@C.
+reach(X, Z)@C :- reach(X, Y)@C, link(Y, Z)@C.
+north(X)@C :- reach(X, Y)@C, zone(north)@C, site(Y).
+any(X) :- north(X)@C.
+"""
+
+@pytest.mark.parametrize('partitions', [2, 3])
+@pytest.mark.parametrize('text', [open(os.path.join(TEST_CASES, name)).read() for name in sorted(os.listdir(TEST_CASES)) if name.endswith('.clg')] + [CONTEXT_PROGRAM])
+def test_context_partitioned_evaluation_gives_the_facts_of_the_default_engine(text, partitions):
+    assert get_facts(engine.Engine(text, context_partitions = partitions).evaluate()) == get_facts(engine.Engine(text).evaluate())
+
+def test_context_local_strata_are_evaluated_for_each_partition(monkeypatch):
+    partitioned = []
+    evaluate = contexts.context_partitioned_evaluation
+
+    monkeypatch.setattr(contexts, 'context_partitioned_evaluation', lambda rule_plans, *arguments, **options: partitioned.append(sorted(set(rule_plan.head_name for rule_plan in rule_plans))) or evaluate(rule_plans, *arguments, **options))
+    facts = get_facts(engine.Engine(CONTEXT_PROGRAM, context_partitions = 2).evaluate())
+
+    # any reads the facts of every context, its stratum is not context local
+    assert partitioned == [['reach'], ['north']]
+    assert facts['any'] == set([('a', 'none'), ('b', 'none'), ('c', 'none')])
+
+def test_context_index_reads_the_records_of_a_context_or_of_attributes():
+    CDB = engine.Engine(CONTEXT_PROGRAM).database.CDB
+    index = contexts.ContextIndex(CDB['link'])
+    c1, c3 = symbol_table.intern('c1'), symbol_table.intern('c3')
+
+    assert sorted(index.get_contexts()) == sorted([c1, symbol_table.intern('c2'), c3])
+    assert index.get_context_positions([c3, c1]).tolist() == [0, 1, 3, 4]
+    assert index.get_attribute_positions([symbol_table.intern('a'), symbol_table.intern('b')]).tolist() == [0]
+
+    selected = index.select(CDB['link'], [(2, c3)])
+    assert get_rows(decode_data_frame(selected)) == set([('c', 'a', 'c3'), ('a', 'd', 'c3')])
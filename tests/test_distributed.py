@@ -0,0 +1,53 @@
+import os
+import pytest
+import distributed
+import engine
+import joins
+import planner
+from conftest import get_facts, get_rows, TEST_CASES
+
+# multi-stratum recursive program with contexts, constants and constraints, whose facts are spread over the partitions of the workers
+PROGRAM = """
+c1 = {loc : [a], w : [[a, 1], [b, 2.5]]}.
+c2 = {loc : [b], w : [[b, b], [1, 1]]}.
+""" + ''.join('edge(n%d, n%d).\n' % (node, (node * 7 + 3) % 40) for node in range(0, 40)) + """
+edge(a, b)@c1.
+edge(b, n1)@c2.
+path(X, Y) :- edge(X, Y).
+path(X, Z) :- path(X, Y), edge(Y, Z).
+cycle(X) :- path(X, X).
+far(X, Y)@C :- edge(X, Y)@C, loc(X)@C.
+far(X, Z)@C :- far(X, Y)@C, path(Y, Z).
+heavy(X, V) :- w(X, V)@C, V > 1.
+"""
+
+@pytest.mark.parametrize('file_name', sorted(name for name in os.listdir(TEST_CASES) if name.endswith('.clg')))
+def test_test_cases_give_the_facts_of_the_single_process_evaluation(file_name):
+    file_path = os.path.join(TEST_CASES, file_name)
+
+    assert get_facts(engine.Engine.from_file(file_path, distributed = 2).evaluate()) == get_facts(engine.Engine.from_file(file_path).evaluate())
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_partitioned_relations_give_the_facts_of_the_single_process_evaluation(workers):
+    expected = get_facts(engine.Engine(PROGRAM).evaluate())
+
+    assert get_facts(engine.Engine(PROGRAM, distributed = workers).evaluate()) == expected
+    assert len(expected['path']) > 40
+
+def test_queries_give_the_answers_of_the_single_process_evaluation():
+    for query in ['path(n0, X)?', 'far(X, Y)?', 'cycle(X)?']:
+        assert get_rows(engine.Engine(PROGRAM, distributed = 2).query(query)) == get_rows(engine.Engine(PROGRAM).query(query))
+
+def test_coordinator_is_reused_across_evaluations():
+    program_engine = engine.Engine(PROGRAM)
+    database = program_engine.database
+    expected = get_facts(program_engine.evaluate())
+    coordinator = distributed.Coordinator(2, joins.HashJoin, planner.JoinPlanner)
+
+    try:
+        for evaluation in range(0, 2):
+            IDB = distributed.distributed_evaluation(database.rules, database.EDB, database.IDB, database.CDB, database.EDB_relations, database.IDB_relations, database.CDB_relations, 2, coordinator = coordinator)
+            assert get_facts(IDB) == expected
+
+    finally:
+        coordinator.close()
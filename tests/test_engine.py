@@ -0,0 +1,65 @@
+import pytest
+import contelog
+import engine
+from conftest import get_facts
+
+PROGRAM = """
+c1 = {zone:[north]}.
+edge(a, b).
+edge(b, c).
+edge(c, d).
+path(X, Y) :- edge(X, Y).
+path(X, Z) :- path(X, Y), edge(Y, Z).
+"""
+
+def test_a_parsed_program_is_loaded_once_and_evaluated_again_on_every_call():
+    contelog_engine = engine.Engine(contelog.parse_program(PROGRAM))
+    database = contelog_engine.database
+
+    first = get_facts(contelog_engine.evaluate())
+    second = get_facts(contelog_engine.evaluate())
+
+    assert contelog_engine.database is database
+    assert first == second
+    assert len(first['path']) == 6
+
+@pytest.mark.parametrize('magic_sets', [True, False])
+def test_queries_return_a_column_for_each_variable(magic_sets):
+    contelog_engine = engine.Engine(PROGRAM, magic_sets = magic_sets)
+    answers = contelog_engine.query('path(a, X), path(X, Y)?')
+
+    assert list(answers.columns) == ['X', 'Y']
+    assert set(contelog_engine.rows('path(a, X), path(X, Y)?')) == set([('b', 'c'), ('b', 'd'), ('c', 'd')])
+    assert set(contelog_engine.rows('path(X, d), X != a?')) == set([('b',), ('c',)])
+
+def test_relations_and_facts_of_each_database():
+    contelog_engine = engine.Engine(PROGRAM)
+
+    assert set(contelog_engine.facts('edge')) == set([('a', 'b', 'none'), ('b', 'c', 'none'), ('c', 'd', 'none')])
+    assert set(contelog_engine.facts('zone')) == set([('north', 'c1')])
+    assert len(contelog_engine.relation('path', decode = False)) == 6
+
+    with pytest.raises(KeyError):
+        contelog_engine.relation('unknown')
+
+    with pytest.raises(ValueError):
+        contelog_engine.query('path(a, X)? path(b, X)?')
+
+def test_updates_change_the_answers_of_the_next_queries():
+    contelog_engine = engine.Engine(PROGRAM)
+    contelog_engine.evaluate()
+
+    inserted, deleted = contelog_engine.update(inserts = {'edge' : [['d', 'e', 'none']]}, deletes = {'edge' : [['a', 'b', 'none']]})
+
+    assert len(inserted['edge']) == len(deleted['edge']) == 1
+    assert len(inserted['path']) == len(deleted['path']) == 3
+
+    assert set(contelog_engine.rows('path(X, e)?')) == set([('b',), ('c',), ('d',)])
+    assert not len(contelog_engine.query('path(a, X)?'))
+
+def test_input_files_are_read_relative_to_the_program_file(tmp_path):
+    (tmp_path / 'edges.csv').write_text('a,b\nb,c\n')
+    program_file = tmp_path / 'program.clg'
+    program_file.write_text('.input edge "edges.csv"\npath(X, Y) :- edge(X, Y).\npath(X, Z) :- path(X, Y), edge(Y, Z).\n')
+
+    assert set(engine.Engine.from_file(str(program_file)).facts('path')) == set([('a', 'b', 'none'), ('b', 'c', 'none'), ('a', 'c', 'none')])
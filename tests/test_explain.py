@@ -0,0 +1,57 @@
+import re
+import contelog
+import engine
+
+PROGRAM = """
+edge(a, b).
+edge(b, c).
+edge(c, d).
+path(X, Y) :- edge(X, Y).
+path(X, Z) :- path(X, Y), edge(Y, Z), X != c.
+far(X) :- path(X, d), path(a, X).
+"""
+
+def get_lines(text, pattern):
+    """
+    returns the lines of a text matching a pattern, without their indentation
+    """
+    return [line.strip() for line in text.splitlines() if re.match(pattern, line.strip())]
+
+def test_explain_prints_the_plan_of_each_rule_without_evaluating_the_program():
+    contelog_engine = engine.Engine(PROGRAM)
+    text = contelog_engine.explain()
+
+    assert contelog_engine.relations is None
+    assert get_lines(text, 'stratum') == ['stratum 1: path (semi-naive evaluation)', 'stratum 2: far (single pass)']
+    assert get_lines(text, 'rule') == ['rule path(X, Y) :- edge(X, Y).', 'rule path(X, Z) :- path(X, Y), edge(Y, Z), X != c.', 'rule far(X) :- path(X, d), path(a, X).']
+
+    # a scan for each predicate of the bodies, with the constraint on a single predicate pushed into its scan
+    assert len(get_lines(text, r'scan \d+: ')) == 5
+    assert 'filter X != c' in get_lines(text, 'filter')
+    assert get_lines(text, 'project') == ['project path(X, Y, none)', 'project path(X, Z, none)', 'project far(X, none)']
+
+    # the recursive rule has a delta variant, each variant has a join order
+    assert len(get_lines(text, r'variant \d+: ')) == len(get_lines(text, 'join order: ')) == 3
+    assert 'actual:' not in text
+
+def test_explain_analyze_annotates_the_plans_with_rows_and_times():
+    contelog_engine = engine.Engine(PROGRAM)
+    text = contelog_engine.explain(True)
+
+    assert len(contelog_engine.relations['path']) == 6
+    assert [line.split(',')[0] for line in get_lines(text, 'actual: ') if 'iterations' in line] == ['actual: 4 iterations', 'actual: 1 iterations']
+    assert len(get_lines(text, r'actual: executed \d+ times, [0-9.]+ ms, \d+ rows derived')) == 3
+    assert len(get_lines(text, r'hash join scan \d+ on [A-Z, ]+: \d+ x \d+ rows -> \d+ rows, [0-9.]+ ms')) >= 2
+    assert re.fullmatch(r'total: [0-9.]+ ms', text.splitlines()[-1])
+
+def test_queries_are_explained_with_the_rules_rewritten_with_magic_sets(tmp_path, capsys):
+    program_file = tmp_path / 'program.clg'
+    program_file.write_text(PROGRAM + 'path(b, X)?\n')
+
+    contelog.main([str(program_file), '--explain'])
+    text = capsys.readouterr().out
+
+    assert get_lines(text, 'query') == ['query query.1(X) :- path(b, X).']
+    assert get_lines(text, 'stratum')[0] == 'stratum 1: path.bfb (semi-naive evaluation)'
+    assert text == engine.Engine.from_file(str(program_file)).explain()
+    assert engine.Engine(PROGRAM, engine = 'topdown').explain().startswith('top-down evaluation')
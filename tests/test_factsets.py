@@ -0,0 +1,154 @@
+import numpy as np
+import pandas as pd
+import engine
+import factsets
+
+def get_records(fact_set):
+    return set(map(tuple, fact_set.get_data_frame().values.tolist()))
+
+def check_against_sets(fact_set, batches, removals):
+    """
+    adds and removes batches of records in a fact set and in a set of tuples, and checks that they hold the same records
+    """
+    expected = set()
+
+    for batch, removal in zip(batches, removals):
+        added = fact_set.add(pd.DataFrame(batch))
+        records = set(map(tuple, batch.tolist()))
+        assert added == len(records - expected)
+        expected |= records
+
+        removed = fact_set.remove(pd.DataFrame(removal))
+        records = set(map(tuple, removal.tolist()))
+        assert set(map(tuple, removed.values.tolist())) == records & expected
+        expected -= records
+
+        assert len(fact_set) == len(expected)
+        assert get_records(fact_set) == expected
+        assert (fact_set.get_positions(pd.DataFrame(batch)) >= 0).tolist() == [tuple(record) in expected for record in batch.tolist()]
+
+def get_batches(high, seed = 0):
+    generator = np.random.default_rng(seed)
+    batches = [generator.integers(0, high, size = (200, 3)) for batch in range(0, 20)]
+    removals = [generator.integers(0, high, size = (50, 3)) for batch in range(0, 20)]
+
+    # records added before are also removed
+    for batch, removal in zip(batches[0 : -1], removals[1 :]):
+        removal[0 : 25] = batch[0 : 25]
+
+    return batches, removals
+
+def test_packed_keys():
+    check_against_sets(factsets.FactSet(range(0, 3)), *get_batches(8))
+
+def test_fingerprint_keys():
+    check_against_sets(factsets.FactSet(range(0, 3)), *get_batches(2 ** 40))
+
+def test_fingerprint_collisions_keep_distinct_facts(monkeypatch):
+    # fingerprints of 4 values, so that most distinct records collide
+    monkeypatch.setattr(factsets, 'get_fingerprints', lambda values: values.sum(axis = 1) % 4)
+    fact_set = factsets.FactSet(range(0, 3))
+    fact_set.bits = None
+    check_against_sets(fact_set, *get_batches(6))
+
+def test_switch_to_fingerprints_with_collisions(monkeypatch):
+    monkeypatch.setattr(factsets, 'get_fingerprints', lambda values: values.sum(axis = 1) % 4)
+    batches, removals = get_batches(6)
+    batches[10] = batches[10] + 2 ** 40
+    check_against_sets(factsets.FactSet(range(0, 3)), batches, removals)
+
+def test_append_distinct_records_with_collisions(monkeypatch):
+    monkeypatch.setattr(factsets, 'get_fingerprints', lambda values: values.sum(axis = 1) % 4)
+    fact_set = factsets.FactSet(range(0, 2))
+    fact_set.bits = None
+    fact_set.append(pd.DataFrame([[0, 1], [1, 0], [2, 2]]))
+
+    assert fact_set.add(pd.DataFrame([[0, 1], [1, 0], [3, 1], [2, 2]])) == 1
+    assert get_records(fact_set) == set([(0, 1), (1, 0), (2, 2), (3, 1)])
+
+def test_views_keep_their_records_when_facts_are_removed():
+    fact_set = factsets.FactSet(range(0, 2))
+    fact_set.add(pd.DataFrame([[0, 1], [1, 2], [2, 3], [3, 4]]))
+    view = fact_set.get_data_frame()
+    old = fact_set.get_data_frame(0, 2)
+
+    fact_set.remove(pd.DataFrame([[0, 1]]))
+
+    assert view.values.tolist() == [[0, 1], [1, 2], [2, 3], [3, 4]]
+    assert old.values.tolist() == [[0, 1], [1, 2]]
+    assert get_records(fact_set) == set([(1, 2), (2, 3), (3, 4)])
+
+    # without views returned, the records move in place
+    fact_set = factsets.FactSet(range(0, 2))
+    fact_set.add(pd.DataFrame([[0, 1], [1, 2], [2, 3]]))
+    values = fact_set.values
+    fact_set.remove(pd.DataFrame([[0, 1]]))
+
+    assert fact_set.values is values
+    assert get_records(fact_set) == set([(1, 2), (2, 3)])
+
+def test_key_table_against_a_dictionary():
+    generator = np.random.default_rng(0)
+    key_table = factsets.KeyTable()
+    expected = {}
+
+    # keys of a small range, mapped and removed over and over, so that the keys probe past each other and past tombstones,
+    # and keys spread over 64 bits
+    for batch in range(0, 50):
+        keys = generator.integers(0, 3000, size = 500) if batch % 2 else generator.integers(-2 ** 63, 2 ** 63 - 1, size = 500, dtype = np.int64)
+        values = generator.integers(0, 10 ** 6, size = 500)
+        key_table.map_keys_to_values(keys, values)
+        expected.update(zip(keys.tolist(), values.tolist()))
+
+        removed = np.concatenate([generator.integers(0, 3000, size = 200), keys[0 : 50]])
+        key_table.remove(removed)
+
+        for key in removed.tolist():
+            expected.pop(key, None)
+
+        probes = np.concatenate([keys, removed, generator.integers(0, 3000, size = 200)])
+        assert key_table.lookup(probes).tolist() == [expected.get(key, -1) for key in probes.tolist()]
+        assert len(key_table) == len(expected)
+
+    # the table only holds a slot for each key, and tombstones, under half of its slots
+    assert 2 * (key_table.count + key_table.removed) <= len(key_table.keys)
+
+def test_views_share_the_buffers_of_their_data_frames_read_only():
+    data_frame = pd.DataFrame({0 : np.arange(0, 5), 1 : np.arange(5, 10)})
+    view = factsets.get_view(data_frame, [1, 0], ['Y', 'X'])
+
+    assert list(view.columns) == ['Y', 'X']
+    assert np.shares_memory(view['Y'].values, data_frame[1].values)
+    assert not view['Y'].values.flags.writeable
+
+    # writing to the view replaces the column of the view only
+    view['Y'] = 0
+    assert data_frame[1].tolist() == [5, 6, 7, 8, 9]
+
+def test_appended_facts_leave_the_records_known_in_place():
+    fact_set = factsets.FactSet(range(0, 2))
+    fact_set.add(pd.DataFrame([[0, 1], [1, 2]]))
+    old = fact_set.get_data_frame()
+
+    fact_set.add(pd.DataFrame([[1, 2], [2, 3]]))
+    delta = fact_set.get_data_frame(2)
+
+    assert np.shares_memory(old[0].values, fact_set.values) and np.shares_memory(delta[0].values, fact_set.values)
+    assert old.values.tolist() == [[0, 1], [1, 2]] and delta.values.tolist() == [[2, 3]]
+
+def test_evaluation_reads_the_relations_of_the_database_without_copying_or_changing_them():
+    contelog_engine = engine.Engine("""
+    edge(a, b).
+    edge(b, c).
+    path(X, Y) :- edge(X, Y).
+    path(X, Z) :- path(X, Y), edge(Y, Z).
+    """)
+    edges = contelog_engine.database.EDB['edge']
+    values = edges.values.copy()
+
+    contelog_engine.evaluate()
+    contelog_engine.evaluate()
+
+    assert (edges.values == values).all()
+    assert len(contelog_engine.relations['path']) == 3
+    assert np.shares_memory(contelog_engine.relations['edge'][0].values, edges[0].values)
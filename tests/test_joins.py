@@ -0,0 +1,56 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import engine
+import joins
+from conftest import get_facts, get_rows, TEST_CASES
+
+def get_data_frame(random, columns, rows, values):
+    """
+    returns a data frame of random symbol ids with the given columns
+    """
+    return pd.DataFrame(dict((column, random.integers(0, values, rows)) for column in columns))
+
+@pytest.mark.parametrize('left_columns, right_columns', [(['X', 'Y'], ['Y', 'Z']), (['X', 'Y', 'Z'], ['Z', 'X']), (['X'], ['Y']), (['X', 'Y'], ['X', 'Y'])])
+@pytest.mark.parametrize('sizes', [(50, 7), (7, 50), (0, 10)])
+def test_hash_join_gives_the_rows_of_pandas_merge(left_columns, right_columns, sizes):
+    random = np.random.default_rng(len(left_columns) * 100 + sizes[0])
+    left = get_data_frame(random, left_columns, sizes[0], 6)
+    right = get_data_frame(random, right_columns, sizes[1], 6)
+    on = [column for column in left_columns if column in right_columns]
+
+    expected = joins.PandasJoin().join(left, right, on)
+    joined = joins.HashJoin().join(left, right, on)
+
+    assert list(joined.columns) == list(expected.columns)
+    assert sorted(get_rows(joined)) == sorted(get_rows(expected))
+
+    # only the given columns are kept
+    columns = [left_columns[0]] + [column for column in right_columns if column not in on]
+    assert sorted(get_rows(joins.HashJoin().join(left, right, on, None, columns))) == sorted(get_rows(expected[columns]))
+
+def test_hash_tables_with_a_cache_key_are_reused_until_cleared():
+    random = np.random.default_rng(0)
+    backend = joins.HashJoin()
+    right = get_data_frame(random, ['Y', 'Z'], 100, 10)
+    cache_key = ('EDB', 'edge')
+
+    for size in [5, 500]:
+        left = get_data_frame(random, ['X', 'Y'], size, 10)
+        joined = backend.join(left, right, ['Y'], cache_key)
+        assert sorted(get_rows(joined)) == sorted(get_rows(left.merge(right, on = ['Y'])))
+
+    assert list(backend.indexes.keys()) == [(cache_key, ('Y',))]
+
+    backend.clear([('EDB', 'path')])
+    assert len(backend.indexes) == 1
+
+    backend.clear([('EDB', 'edge')])
+    assert not len(backend.indexes)
+
+@pytest.mark.parametrize('name', sorted(name for name in os.listdir(TEST_CASES) if name.endswith('.clg')))
+def test_join_backends_derive_the_same_facts(name):
+    program = open(os.path.join(TEST_CASES, name)).read()
+
+    assert get_facts(engine.Engine(program, join = 'hash').evaluate()) == get_facts(engine.Engine(program, join = 'pandas').evaluate())
@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+import engine
+from conftest import get_facts
+
+PROGRAM = """
+.input m "m.%s"
+big(X, V) :- m(X, V), V > 9.
+one(V) :- m(1, V).
+"""
+
+def evaluate(directory, extension):
+    """
+    returns the set of the decoded facts of each IDB relation of the program reading m from the input file with the given extension
+    """
+    program_file = directory / ('program_' + extension + '.clg')
+    program_file.write_text(PROGRAM % extension)
+
+    return get_facts(engine.Engine.from_file(str(program_file)).evaluate())
+
+def test_csv_values_written_like_numbers_are_numbers(tmp_path):
+    (tmp_path / 'm.csv').write_text('1,10\n2,9\n3,100\n')
+
+    assert evaluate(tmp_path, 'csv') == {'big' : set([(1, 10, 'none'), (3, 100, 'none')]), 'one' : set([(10, 'none')])}
+
+def test_csv_and_parquet_inputs_give_the_same_facts(tmp_path):
+    pytest.importorskip('pyarrow')
+    (tmp_path / 'm.csv').write_text('1,10\n2,9\n3,100\n07,1e3\n')
+    pd.DataFrame({'x' : [1, 2, 3], 'v' : [10, 9, 100]}).to_parquet(str(tmp_path / 'm.parquet'))
+
+    csv_facts = evaluate(tmp_path, 'csv')
+    parquet_facts = evaluate(tmp_path, 'parquet')
+
+    # 07 and 1e3 are names, which are greater than every number
+    assert csv_facts['big'] - parquet_facts['big'] == set([('07', '1e3', 'none')])
+    csv_facts['big'].discard(('07', '1e3', 'none'))
+    assert csv_facts == parquet_facts
+
+def test_input_files_give_the_same_facts_as_inline_facts(tmp_path):
+    (tmp_path / 'edge.tsv').write_text('b\tc\nc\td\n')
+    (tmp_path / 'inline.clg').write_text('edge(a, b).\nedge(b, c).\nedge(c, d).\npath(X, Y) :- edge(X, Y).\npath(X, Z) :- path(X, Y), edge(Y, Z).\n')
+    (tmp_path / 'input.clg').write_text('.input edge "edge.tsv"\nedge(a, b).\npath(X, Y) :- edge(X, Y).\npath(X, Z) :- path(X, Y), edge(Y, Z).\n')
+
+    # the inline facts of a predicate read from a file are kept along with the facts of the file
+    inline = engine.Engine.from_file(str(tmp_path / 'inline.clg'))
+    loaded = engine.Engine.from_file(str(tmp_path / 'input.clg'))
+
+    assert set(loaded.facts('edge')) == set(inline.facts('edge'))
+    assert set(loaded.facts('path')) == set(inline.facts('path'))
+    assert len(set(loaded.facts('path'))) == 6
@@ -0,0 +1,67 @@
+import pytest
+import engine
+import magic
+import profiler
+from conftest import get_rows
+from elements import Predicate
+
+PROGRAM = """
+cw = {from : [west], to : [left]}.
+ce = {from : [east], to : [right]}.
+
+edge(a, b).
+edge(b, c).
+edge(c, d).
+edge(d, b).
+edge(x, y).
+edge(y, z).
+per(1, east).
+per(2, west).
+
+path(X, Y) :- edge(X, Y).
+path(X, Z) :- path(X, Y), edge(Y, Z).
+same(X, Y) :- path(X, Z), path(Y, Z), X != Y.
+per(X, Y)@C :- per(X, Y), from(Y)@C.
+lib(X, Y)@C :- per(X, Z)@C, to(Y)@C.
+near(X, Y) :- lib(X, Y)@cw.
+"""
+
+class FactCounter(profiler.Tracer):
+    """
+    tracer counting the new facts added to each relation
+    """
+
+    def __init__(self):
+        self.new_facts = {}
+
+    def record_dedup(self, relation, rule_plan, rows_before, rows_after):
+        self.new_facts[relation] = self.new_facts.get(relation, 0) + rows_after
+
+@pytest.mark.parametrize('query', ['path(a, X)?', 'path(X, b)?', 'path(x, z)?', 'path(a, y)?', 'same(a, X)?', 'same(X, Y), X != a?', 'near(X, left)?', 'lib(2, Y)?'])
+def test_magic_sets_give_the_answers_of_the_full_evaluation(query):
+    magic_answers = engine.Engine(PROGRAM).query(query)
+    full_answers = engine.Engine(PROGRAM, magic_sets = False).query(query)
+
+    assert list(magic_answers.columns) == list(full_answers.columns)
+    assert get_rows(magic_answers) == get_rows(full_answers)
+
+def test_magic_sets_only_derive_the_facts_relevant_to_the_query():
+    counter = FactCounter()
+    answers = engine.Engine(PROGRAM, tracer = counter).query('path(x, X)?')
+
+    assert get_rows(answers) == set([('y',), ('z',)])
+
+    # only the 2 paths from x are derived, not the 15 paths of the whole graph
+    path_facts = sum(count for relation, count in counter.new_facts.items() if relation.startswith('path'))
+    assert path_facts == 2
+    assert 'same' not in counter.new_facts
+
+def test_magic_rules_whose_body_is_their_head_are_not_added():
+    program_engine = engine.Engine(PROGRAM)
+    query_rule = magic.get_query_rule(program_engine.parse_query('path(a, X)?'), 1)
+    rules, seeds = magic.rewrite_rules(program_engine.database.rules, [query_rule], set(rule.head.name for rule in program_engine.database.rules))
+
+    # the left recursive rule of path calls path first with the bindings of its head, whose magic rule would only copy its head
+    assert not any(len(rule.body) == 1 and repr(rule.body[0]) == repr(rule.head) for rule in rules)
+    assert [repr(seed.predicate) for seed in seeds] == [repr(Predicate('magic.path.bfb', ['a', 'none']))]
+    assert len([rule for rule in rules if rule.head.name.startswith('magic.')]) == 0
@@ -0,0 +1,142 @@
+import concurrent.futures
+import numpy as np
+import pandas as pd
+import engine
+import factsets
+import joins
+import parallel
+import planner
+from symbols import symbol_table
+from conftest import get_facts
+
+# multi-stratum program with CDB relations read through variable contexts, whose strata read fixed relations in several iterations
+CDB_PROGRAM = """
+c1 = {loc : [c], w : [[c, 1], [c, 2.5], [9, 1]]}.
+c2 = {loc : [c], w : [[c, c], [1, 1]]}.
+c3 = {loc : [9], w : [[b, b]]}.
+e(c, c)@c2.
+e(2, 1)@c3.
+e(c, 1)@c2.
+e(2, 2).
+e(2, b).
+f(c, 1).
+f(a, 9).
+f(10, c)@c2.
+f(2, 9).
+f(c, 1)@c3.
+f(1, 9).
+g(a).
+g(10)@c2.
+p(9, b)@c1.
+p(c, 2.5).
+r(W, Y) :- p(Y, Z), e(W, Z).
+p(W, X)@c2 :- f(X, X), g(W).
+p(W, W)@C :- w(W, X)@C, q(Z), loc(W)@C.
+q(Y)@C :- loc(Y)@C, p(Y, W).
+r(X, Y)@C :- e(10, Y), loc(X)@C, C >= 2.5.
+q(W) :- e(W, Z), g(Y)@c2, Y = 1.
+"""
+
+def test_workers_read_cdb_relations_across_strata():
+    expected = get_facts(engine.Engine(CDB_PROGRAM).evaluate())
+
+    assert get_facts(engine.Engine(CDB_PROGRAM, workers = 2).evaluate()) == expected
+    assert get_facts(engine.Engine(CDB_PROGRAM, workers = 2, partitions = 2).evaluate()) == expected
+
+def read_shards(descriptors):
+    """
+    returns the set of the records of the descriptors of shards published in shared memory
+    """
+    records = set()
+
+    for name, rows, columns, start, end in descriptors:
+        if name is not None:
+            segment = parallel.shared_memory.SharedMemory(name = name)
+            records |= set(map(tuple, np.ndarray((rows, columns), dtype = np.int64, buffer = segment.buf)[start : end].tolist()))
+            segment.close()
+
+    return records
+
+def test_unchanged_inputs_are_not_republished(monkeypatch):
+    written = []
+    write = parallel.SharedRelations.write
+    monkeypatch.setattr(parallel.SharedRelations, 'write', lambda self, values: written.append(len(values)) or write(self, values))
+    appended = []
+    append = parallel.AppendedRelation.append
+    monkeypatch.setattr(parallel.AppendedRelation, 'append', lambda self, values: appended.append(len(values)) or append(self, values))
+
+    relations = parallel.SharedRelations()
+    fact_set = factsets.FactSet(range(0, 2))
+    fixed = pd.DataFrame([[1, 2], [3, 4]])
+
+    try:
+        for shards in [1, 3]:
+            # the old records of each iteration are the old and delta records of the iteration before
+            delta_start = 0
+
+            for batch in [[[1, 2], [2, 3], [3, 4]], [[4, 5], [5, 6]], [[6, 7]]]:
+                fact_set.append(pd.DataFrame(batch))
+                old = fact_set.get_data_frame(0, delta_start)
+                delta = fact_set.get_data_frame(delta_start, len(fact_set))
+                appended.clear()
+
+                descriptors = relations.publish_appended('p', old, delta, 0 if shards > 1 else None, shards)
+
+                # other scans of the relation in the same iteration read the same records
+                assert relations.publish_appended('p', old, delta, 0 if shards > 1 else None, shards) == descriptors
+                assert sum(appended) == len(batch)
+                assert read_shards(descriptors['IDB_old']) == set(map(tuple, old.values.tolist()))
+                assert read_shards(descriptors['IDB_delta']) == set(map(tuple, batch))
+
+                assert relations.publish(('EDB', 'e'), fixed) == relations.publish(('EDB', 'e'), fixed)
+                assert written == [2]
+                delta_start = len(fact_set)
+
+            fact_set = factsets.FactSet(range(0, 2))
+
+    finally:
+        relations.close()
+
+def test_workers_append_only_the_deltas(monkeypatch):
+    # transitive closure of a chain, whose old records grow in every iteration
+    program = ''.join('e(%d, %d).\n' % (node, node + 1) for node in range(0, 30)) + 'p(X, Y) :- e(X, Y).\np(X, Y) :- p(X, Z), e(Z, Y).\n'
+    expected = get_facts(engine.Engine(program).evaluate())
+
+    appended = []
+    append = parallel.AppendedRelation.append
+    monkeypatch.setattr(parallel.AppendedRelation, 'append', lambda self, values: appended.append(len(values)) or append(self, values))
+
+    assert get_facts(engine.Engine(program, workers = 2, partitions = 2).evaluate()) == expected
+
+    # each fact of p is appended once to the shards of p partitioned on its column read by the recursive rule
+    assert sum(appended) == len(expected['p'])
+
+def test_symbols_are_shared_once_and_tasks_hold_their_own_descriptors(monkeypatch):
+    program = ''.join('e(%d, %d).\nf(%d, %d).\n' % (node, node + 1, node, node + 2) for node in range(0, 10)) + 'p(X, Y) :- e(X, Y).\np(X, Y) :- p(X, Z), f(Z, Y).\nq(X) :- e(X, Y), f(Y, Z).\n'
+    expected = get_facts(engine.Engine(program).evaluate())
+
+    tasks = []
+    map_tasks = concurrent.futures.ProcessPoolExecutor.map
+    monkeypatch.setattr(concurrent.futures.ProcessPoolExecutor, 'map', lambda self, function, values: tasks.extend(values) or map_tasks(self, function, tasks[-len(values) :]))
+
+    assert get_facts(engine.Engine(program, workers = 2).evaluate()) == expected
+
+    # each task only holds the relations read by its own variant, no rule reading both e and p
+    assert len(set(id(task[3]) for task in tasks)) == len(tasks)
+    assert not any(set(['e', 'p']) <= set(relation for relations in task[3].values() for relation in relations) for task in tasks)
+
+    evaluator = parallel.ParallelEvaluator(2, joins.HashJoin, planner.JoinPlanner)
+
+    try:
+        assert evaluator.share_symbols() == ()
+
+        # the symbols interned after the pool started are written to a segment once, read by the workers from the descriptors of the tasks
+        symbol_table.intern('symbol interned after the pool started')
+        descriptors = evaluator.share_symbols()
+
+        assert len(descriptors) == 1
+        assert evaluator.share_symbols() == descriptors
+        assert parallel.read_pickle(descriptors[0]) == ['symbol interned after the pool started']
+
+    finally:
+        evaluator.close()
@@ -0,0 +1,47 @@
+import os
+import pandas as pd
+import pytest
+import engine
+import planner
+from conftest import get_facts, TEST_CASES
+
+def get_input(statistics, key, data_frame, columns):
+    """
+    returns the planner input of a data frame whose statistics are kept under key
+    """
+    statistics.update(key, data_frame)
+
+    return (columns, len(data_frame), key, list(range(0, len(columns))))
+
+def test_joins_start_from_the_smallest_input_and_avoid_cross_joins():
+    join_planner = planner.JoinPlanner()
+    statistics = join_planner.statistics
+
+    big = get_input(statistics, ('EDB', 'big'), pd.DataFrame({0 : range(0, 1000), 1 : [row % 2 for row in range(0, 1000)]}), ['X', 'Y'])
+    other = get_input(statistics, ('EDB', 'other'), pd.DataFrame({0 : range(0, 50), 1 : range(0, 50)}), ['Z', 'W'])
+    small = get_input(statistics, ('EDB', 'small'), pd.DataFrame({0 : range(0, 10), 1 : range(0, 10)}), ['Y', 'Z'])
+
+    # the smallest input comes first, then the inputs sharing its variables, the smallest estimated join first
+    assert join_planner.order([big, other, small]) == [2, 1, 0]
+
+    # an input sharing no variable is joined last, by a cross join
+    unrelated = get_input(statistics, ('EDB', 'unrelated'), pd.DataFrame({0 : range(0, 20)}), ['V'])
+    assert join_planner.order([big, unrelated, small]) == [2, 0, 1]
+
+def test_distinct_values_follow_the_statistics_of_the_relations():
+    join_planner = planner.JoinPlanner()
+    skewed = get_input(join_planner.statistics, ('EDB', 'skewed'), pd.DataFrame({0 : [1] * 100, 1 : range(0, 100)}), ['X', 'Y'])
+
+    assert join_planner.get_distinct_values(skewed) == {'X' : 1, 'Y' : 100}
+
+    # the counts of a relation without statistics are estimated from the cardinality
+    assert join_planner.get_distinct_values((['X', 'Y'], 7, ('IDB_delta', 'unknown'), [0, 1])) == {'X' : 7, 'Y' : 7}
+
+def test_fixed_planner_keeps_the_order_of_the_rule_body():
+    assert planner.FixedPlanner().order([(['X'], 100, None, [0]), (['Y'], 1, None, [0]), (['X', 'Y'], 10, None, [0, 1])]) == [0, 1, 2]
+
+@pytest.mark.parametrize('name', sorted(name for name in os.listdir(TEST_CASES) if name.endswith('.clg')))
+def test_join_orders_derive_the_same_facts(name):
+    program = open(os.path.join(TEST_CASES, name)).read()
+
+    assert get_facts(engine.Engine(program, join_order = 'cost').evaluate()) == get_facts(engine.Engine(program, join_order = 'fixed').evaluate())
@@ -0,0 +1,72 @@
+import engine
+import plans
+from conftest import get_facts
+
+PROGRAM = """
+edge(1, 2).
+edge(2, 3).
+edge(3, 4).
+edge(4, 5).
+path(X, Y) :- edge(X, Y).
+path(X, Z) :- path(X, Y), path(Y, Z).
+"""
+
+def test_delta_variants_read_the_delta_of_at_least_one_IDB_predicate():
+    contelog_engine = engine.Engine(PROGRAM)
+    rule = contelog_engine.database.rules[1]
+    rule_plan = plans.RulePlan(rule, ['edge'], ['path'], [])
+
+    assert rule_plan.IDB_scans == [0, 1]
+    assert rule_plan.variants == [['IDB_delta', 'IDB_old'], ['IDB_old', 'IDB_delta'], ['IDB_delta', 'IDB_delta']]
+    assert plans.get_combinations([0, 1, 2]) == [[1, 0, 0], [0, 1, 0], [0, 0, 1], [1, 1, 0], [1, 0, 1], [0, 1, 1], [1, 1, 1]]
+
+def test_rules_are_compiled_once_for_all_the_iterations(monkeypatch):
+    compiled = []
+    executed = []
+    initialize = plans.RulePlan.__init__
+    execute = plans.RulePlan.execute
+
+    monkeypatch.setattr(plans.RulePlan, '__init__', lambda self, rule, *arguments, **options: compiled.append(rule.head.name) or initialize(self, rule, *arguments, **options))
+    monkeypatch.setattr(plans.RulePlan, 'execute', lambda self, *arguments, **options: executed.append(self) or execute(self, *arguments, **options))
+
+    facts = get_facts(engine.Engine(PROGRAM).evaluate())
+
+    assert facts['path'] == set((x, y, 'none') for x in range(1, 5) for y in range(x + 1, 6))
+
+    # the recursive rule is executed in several iterations with the plan compiled once, its join steps being kept by join order
+    assert compiled == ['path', 'path']
+    assert len(executed) > len(set(executed)) == 2
+    assert all(len(rule_plan.join_steps) >= 1 for rule_plan in executed if len(rule_plan.IDB_scans))
+
+PUSHDOWN_PROGRAM = """
+m(a, 1, x).
+m(b, 5, y).
+m(c, 12, c).
+m(d, 20, d).
+n(1, 2).
+n(5, 30).
+n(20, 21).
+big(X) :- m(X, V, W), V > 4, n(V, U), U > V, U != 30.
+same(X, V) :- m(X, V, X).
+"""
+
+def test_selections_projections_and_constraints_are_pushed_into_the_scans():
+    rules = engine.Engine(PUSHDOWN_PROGRAM).database.rules
+    rule_plan = plans.RulePlan(rules[0], ['m', 'n'], ['big'], [])
+    m_scan, n_scan = rule_plan.scans
+
+    # the constraints on the variables of a single predicate are applied by its scan, the others by the joins,
+    # and the columns of the variables needed by no other predicate, constraint or the head are projected out
+    assert m_scan.constraints == [('V', '>', 4)]
+    assert n_scan.constraints == [('U', '>', 'V'), ('U', '!=', 30)]
+    assert rule_plan.constraints == []
+    assert m_scan.columns == ['X', 'V'] and n_scan.columns == ['V']
+
+    same_plan = plans.RulePlan(rules[1], ['m'], ['same'], [])
+    assert same_plan.scans[0].variable_selections == [(0, 2)]
+
+def test_pushed_down_plans_derive_the_facts_of_the_rules():
+    facts = get_facts(engine.Engine(PUSHDOWN_PROGRAM).evaluate())
+
+    assert facts['big'] == set([('d', 'none')])
+    assert facts['same'] == set([('c', 12, 'none'), ('d', 20, 'none')])
@@ -0,0 +1,65 @@
+import json
+import pytest
+import contelog
+import engine
+import profiler
+
+PROGRAM = """
+edge(a, b).
+edge(b, c).
+edge(c, d).
+path(X, Y) :- edge(X, Y).
+path(X, Z) :- path(X, Y), edge(Y, Z).
+"""
+
+def run(directory, *options):
+    """
+    runs the program from the command line with the given options
+    """
+    program_file = directory / 'program.clg'
+    program_file.write_text(PROGRAM)
+    contelog.main([str(program_file)] + list(options))
+
+def test_profile_records_each_iteration_and_rule(tmp_path, capsys):
+    run(tmp_path, '--profile', str(tmp_path / 'profile.json'))
+    profile = json.loads((tmp_path / 'profile.json').read_text())
+    iterations = [iteration for iteration in profile['iterations'] if iteration['relations'] == ['path']]
+
+    # the paths of length 1, 2 and 3 are found in an iteration each, the last iteration finding no new facts
+    assert [iteration['new_facts'] for iteration in iterations] == [3, 2, 1, 0]
+    assert profile['total_seconds'] == pytest.approx(sum(iteration['seconds'] for iteration in profile['iterations']))
+
+    for iteration in iterations:
+        for rule in iteration['rules']:
+            assert rule['head'] == 'path'
+            assert set(['rule', 'start', 'seconds', 'inputs', 'variants', 'derived_rows', 'dedup', 'memory_delta_bytes', 'memory_peak_bytes']) <= set(rule.keys())
+
+            for variant in rule['variants']:
+                assert len(variant['sources']) == len(variant['input_rows'])
+
+    assert sum(rule['derived_rows'] for iteration in iterations for rule in iteration['rules']) >= 6
+
+def test_trace_has_an_event_for_each_iteration_and_rule(tmp_path, capsys):
+    run(tmp_path, '--trace', str(tmp_path / 'trace.json'))
+    trace = json.loads((tmp_path / 'trace.json').read_text())
+    events = trace['traceEvents']
+
+    assert trace['displayTimeUnit'] == 'ms'
+    assert set(event['cat'] for event in events) == set(['iteration', 'rule'])
+
+    for event in events:
+        assert event['ph'] == 'X'
+        assert event['dur'] >= 0
+        assert set(['name', 'pid', 'tid', 'ts', 'args']) <= set(event.keys())
+
+    iterations = [event for event in events if event['cat'] == 'iteration']
+    assert all('new_facts' in event['args'] for event in iterations)
+
+def test_profile_is_rejected_with_distributed_workers(tmp_path, capsys):
+    with pytest.raises(SystemExit):
+        run(tmp_path, '--distributed', '2', '--profile', str(tmp_path / 'profile.json'))
+
+    assert '--distributed' in capsys.readouterr().err
+
+    with pytest.raises(ValueError):
+        engine.Engine(PROGRAM, distributed = 2, tracer = profiler.Tracer())
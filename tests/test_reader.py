@@ -0,0 +1,69 @@
+import contelog
+import contelog_parser
+import engine
+import reader
+
+FACTS = """
+% facts read by the fact reader
+edge(a, b).
+edge(b , c) .   % comment
+edge(c, 1). edge(1, 2.5).  edge(-3, -0.75).
+value(07, 1e3, 1.5e3, -0).
+value(x_1, 0, -0.0, 2).
+colour(red)@c1.
+colour(blue) @ c2 + c1.
+colour(green)@c3+c1+c3.
+"""
+
+def get_records(statements):
+    """
+    returns the records of the facts of the statements of a program, grouped by predicate, with the reprs of their constants
+    """
+    records = {}
+
+    for statement in statements:
+        if statement.type == 'fact':
+            records.setdefault(statement.predicate.name, []).append(tuple(repr(value) for value in statement.predicate.arguments + [statement.predicate.context]))
+        elif statement.type == 'fact_block':
+            for row in zip(*[statement.codes[column] for column in range(0, statement.arity + 1)]):
+                records.setdefault(statement.name, []).append(tuple(repr(statement.symbols[code]) for code in row))
+
+    return records
+
+def test_fact_reader_reads_the_facts_of_the_grammar():
+    fact_reader = reader.FactReader()
+    fact_reader.read_lines(FACTS.splitlines(True))
+
+    # every line of facts is read into the fact blocks, no statement is left to the grammar
+    assert fact_reader.get_text() is None
+    assert get_records(fact_reader.get_blocks()) == get_records(contelog_parser.parser.parse(FACTS))
+
+def test_lines_of_other_statements_are_left_to_the_grammar():
+    text = """c4 = {zone:[north],
+    kind:[k]}.""" + FACTS + """edge(d).
+path(X, Y) :- edge(X, Y),
+    edge(Y, Z).
+edge(d, e).
+path(a, X)?
+"""
+    fact_reader = reader.FactReader()
+    fact_reader.read_lines(text.splitlines(True))
+    statements = contelog.parse_statements(fact_reader)
+    expected = get_records(contelog_parser.parser.parse(FACTS))
+
+    # a fact whose number of arguments differs from the facts of its predicate read before is left to the grammar,
+    # and a line of facts is read as facts after a rule
+    expected['edge'] += [("'d'", "'e'", "'none'"), ("'d'", "'none'")]
+
+    assert get_records(statements) == expected
+    assert [statement.type for statement in statements if statement.type not in ['fact', 'fact_block']] == ['context', 'rule', 'query']
+
+    # the lines read as facts are kept as empty lines, so that the grammar reports the lines of the program
+    assert fact_reader.get_text().count('\n') == text.count('\n')
+
+def test_relations_loaded_from_the_fact_blocks_are_the_relations_of_the_parsed_facts():
+    read = engine.Engine(FACTS)
+    parsed = engine.Engine(contelog.reorder_program(contelog_parser.parser.parse(FACTS)))
+
+    for relation in ['edge', 'value', 'colour']:
+        assert [tuple(map(repr, record)) for record in read.facts(relation)] == [tuple(map(repr, record)) for record in parsed.facts(relation)]
@@ -0,0 +1,69 @@
+import os
+import subprocess
+import sys
+import pytest
+import contelog
+import engine
+import joins
+import planner
+import small
+from symbols import symbol_table
+from conftest import TEST_CASES
+
+PROGRAM = """
+c1 = {ec:[[2,3]], f:[a]}.
+c2 = {ec:[[2,4],[4,5]], f:[b]}.
+e(1, 2). e(2, 3). e(4, 4). e(3, 1.0). e(5, x).
+p(X, Y)@C :- e(X, Z), ec(Z, Y)@C.
+p(X, Y)@C :- ec(X, Z)@C, ec(Z, Y)@W.
+q(X)@C :- p(X, Y)@C, f(a)@C.
+r(X, Y) :- p(X, Y)@c2, e(X, Z), Z < Y.
+path(X, Y) :- e(X, Y).
+path(X, Z) :- path(X, Y), e(Y, Z).
+s(X, Y) :- path(X, Y), path(Y, X), X != Y.
+t(X) :- path(X, Y), Y >= 2.
+"""
+
+def get_records(IDB):
+    """
+    returns the records of the values of the relations of an engine, in their order, numbers of different types told apart by their reprs
+    """
+    return dict((relation, [tuple(map(repr, record)) for record in symbol_table.decode_array(data_frame.values)]) for relation, data_frame in IDB.items())
+
+@pytest.mark.parametrize('join_order', ['cost', 'fixed'])
+@pytest.mark.parametrize('text', [open(os.path.join(TEST_CASES, name)).read() for name in sorted(os.listdir(TEST_CASES)) if name.endswith('.clg')] + [PROGRAM])
+def test_small_programs_derive_the_facts_of_the_engine_in_the_same_order(text, join_order):
+    results = small.evaluate(contelog.parse_program(text), join_order)
+    expected = get_records(engine.Engine(text, join_order = join_order).evaluate())
+
+    assert list(results.keys()) == list(expected.keys())
+    assert dict((relation, [tuple(map(repr, record)) for record in records]) for relation, records in results.items()) == expected
+
+def test_programs_the_small_evaluation_does_not_follow_are_left_to_the_engine(monkeypatch):
+    assert small.evaluate(contelog.parse_program('e(1, 2).\np(X) :- e(X, Y).\np(X)?')) is None
+    assert small.evaluate(contelog.parse_program('e(1, 2).\ne(1).\np(X) :- e(X, Y).')) is None
+    assert small.evaluate(contelog.parse_program(''.join('e(%d, %d).\n' % (i, i + 1) for i in range(0, small.MAX_FACTS + 1)) + 'p(X) :- e(X, Y).')) is None
+
+    # the relations growing beyond MAX_RECORDS records are evaluated by the engine
+    monkeypatch.setattr(small, 'MAX_RECORDS', 10)
+    assert small.evaluate(contelog.parse_program(''.join('e(%d, %d).\n' % (i, i + 1) for i in range(0, 10)) + 'p(X, Y) :- e(X, Y).\np(X, Z) :- p(X, Y), e(Y, Z).')) is None
+
+def test_small_run_prints_the_facts_of_the_engine(tmp_path, capsys):
+    program_file = tmp_path / 'program.clg'
+    program_file.write_text(PROGRAM)
+
+    contelog.main([str(program_file)])
+    printed = capsys.readouterr().out
+
+    contelog.print_results(engine.Engine(PROGRAM).evaluate(), [])
+    assert printed == capsys.readouterr().out
+
+def test_small_run_does_not_import_pandas():
+    code = 'import sys, contelog; contelog.main([%r]); print("pandas" in sys.modules, "numpy" in sys.modules)' % os.path.join(TEST_CASES, 'test_1.clg')
+    output = subprocess.run([sys.executable, '-c', code], cwd = os.path.dirname(TEST_CASES), capture_output = True, text = True, check = True).stdout
+
+    assert output.splitlines()[-1] == 'False False'
+
+def test_command_line_choices_are_the_join_backends_and_planners():
+    assert contelog.JOIN_BACKENDS == sorted(joins.join_backends.keys())
+    assert contelog.JOIN_PLANNERS == sorted(planner.join_planners.keys())
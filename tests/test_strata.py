@@ -0,0 +1,38 @@
+import engine
+import evaluation
+import strata
+from conftest import get_facts
+
+PROGRAM = """
+edge(a, b).
+edge(b, c).
+edge(c, a).
+edge(c, d).
+reach(X, Y) :- edge(X, Y).
+reach(X, Z) :- reach(X, Y), edge(Y, Z).
+even(X, Y) :- edge(X, Y), edge(Y, Z), odd(Z, Y).
+odd(X, Y) :- edge(X, Y).
+odd(X, Z) :- even(X, Y), edge(Y, Z).
+top(X) :- reach(X, d), odd(X, Y).
+"""
+
+def test_strata_are_the_components_of_the_dependency_graph_in_topological_order():
+    rules = engine.Engine(PROGRAM).database.rules
+    components = [(stratum.relations, stratum.recursive) for stratum in strata.get_strata(rules)]
+
+    assert components == [(['reach'], True), (['even', 'odd'], True), (['top'], False)]
+
+    # each component comes after the components it depends on
+    assert strata.get_components({'a' : ['b'], 'b' : ['c'], 'c' : ['b'], 'd' : []}) == [['c', 'b'], ['a'], ['d']]
+
+def test_each_stratum_reaches_its_fixpoint_before_the_next_one(monkeypatch):
+    evaluated = []
+    evaluate_stratum = evaluation.evaluate_stratum
+
+    monkeypatch.setattr(evaluation, 'evaluate_stratum', lambda rule_plans, *arguments, **options: evaluated.append(sorted(set(rule_plan.head_name for rule_plan in rule_plans))) or evaluate_stratum(rule_plans, *arguments, **options))
+
+    facts = get_facts(engine.Engine(PROGRAM).evaluate())
+
+    assert evaluated == [['reach'], ['even', 'odd'], ['top']]
+    assert facts['reach'] == set((x, y, 'none') for x in 'abc' for y in 'abcd')
+    assert facts['top'] == set([('a', 'none'), ('b', 'none'), ('c', 'none')])
@@ -0,0 +1,84 @@
+import operator
+import numpy as np
+import pandas as pd
+import engine
+import symbols
+from symbols import symbol_table
+
+VALUES = [-3, -2.5, -0.0, 0, 0.0, 1, 1.0, 2.5, 3, 2 ** 62, 2 ** 62 + 1, 2 ** 70, 'B', 'a', '07', '1e3', 'b', 'none']
+
+def test_equal_numbers_of_different_kinds_are_distinct_symbols():
+    ids = [symbol_table.intern(value) for value in VALUES]
+
+    assert len(set(ids)) == len(VALUES)
+    assert symbol_table.intern_array(np.array(VALUES + VALUES[::-1], dtype = object)).tolist() == ids + ids[::-1]
+    assert [repr(symbol_table.decode(symbol_id)) for symbol_id in ids] == [repr(value) for value in VALUES]
+
+def test_numbers_are_compared_by_value_and_lower_than_strings():
+    ids = np.array([symbol_table.intern(value) for value in VALUES])
+    ids_x = np.repeat(ids, len(ids))
+    ids_y = np.tile(ids, len(ids))
+    pairs = [(x, y) for x in VALUES for y in VALUES]
+
+    for operation in [operator.lt, operator.le, operator.gt, operator.ge, operator.eq, operator.ne]:
+        expected = [operation(x, y) if isinstance(x, str) == isinstance(y, str) else operation(isinstance(x, str), isinstance(y, str)) for x, y in pairs]
+        assert symbol_table.compare(ids_x, operation, ids_y).tolist() == expected
+
+        # comparisons with a constant
+        assert symbol_table.compare(ids, operation, symbol_table.intern(1.0)).tolist() == [operation(x, 1.0) if not isinstance(x, str) else operation(True, False) for x in VALUES]
+
+def test_only_the_symbols_interned_since_the_last_comparison_are_typed(monkeypatch):
+    ids = np.array([symbol_table.intern(value) for value in VALUES])
+    symbol_table.compare(ids, operator.lt, ids)
+
+    kinds = []
+    get_kind = symbols.get_kind
+    monkeypatch.setattr(symbols, 'get_kind', lambda value: kinds.append(value) or get_kind(value))
+
+    for number in range(0, 3):
+        new_id = symbol_table.intern('symbol %d interned between comparisons' % number)
+        assert symbol_table.compare(ids, operator.lt, new_id).tolist() == [not isinstance(value, str) or value < symbol_table.decode(new_id) for value in VALUES]
+
+    assert len(kinds) == 3
+
+def test_rules_compare_mixed_constants():
+    program_engine = engine.Engine("""
+    v(-3). v(-2.5). v(-0.0). v(0). v(1). v(1.0). v(2.5). v(3). v(a). v(b).
+    u(1).
+    low(X) :- v(X), X < 1.
+    one(X) :- v(X), X = 1.
+    high(X) :- v(X), X >= 2.5, X < b.
+    same(X) :- v(X), u(X).
+    """)
+    program_engine.evaluate()
+
+    def get_values(relation):
+        # the symbols of the first column, as reprs so that 1 and 1.0 are told apart
+        return sorted(repr(value) for value in symbol_table.decode_array(program_engine.relation(relation, decode = False).iloc[:, 0].values))
+
+    assert get_values('low') == sorted(['-3', '-2.5', '-0.0', '0'])
+    assert get_values('high') == sorted(['2.5', '3', "'a'"])
+
+    # 1 and 1.0 are compared equal, but are distinct symbols
+    assert get_values('one') == sorted(['1', '1.0'])
+    assert get_values('same') == ['1']
+
+def test_symbols_are_interned_to_dense_ids_in_the_order_they_are_first_seen():
+    table = symbols.SymbolTable()
+    ids = table.intern_array(np.array(['b', 'a', 'b', 3, 'c', 'a', 3], dtype = object))
+
+    assert ids.dtype == symbols.SYMBOL_DTYPE
+    assert ids.tolist() == [0, 1, 0, 2, 3, 1, 2]
+    assert table.intern('c') == 3 and table.intern('d') == 4 and len(table) == 5
+    assert table.decode_array(np.array([4, 2, 0])).tolist() == ['d', 3, 'b']
+
+def test_data_frames_are_encoded_to_ids_and_decoded_back_to_symbols():
+    data_frame = pd.DataFrame([['a', 1, 'none'], ['b', 2.5, 'c2+c1'], ['a', 1, 'none']], dtype = object)
+    encoded = symbols.encode_records(data_frame)
+
+    assert all(encoded[column].dtype == symbols.SYMBOL_DTYPE for column in encoded.columns)
+    assert encoded.iloc[0].tolist() == encoded.iloc[2].tolist()
+    assert encoded.iloc[0, 2] == symbols.NONE
+
+    decoded = symbols.decode_data_frame(encoded)
+    assert [tuple(record) for record in decoded.itertuples(index = False, name = None)] == [('a', 1, 'none'), ('b', 2.5, 'c1+c2'), ('a', 1, 'none')]
@@ -0,0 +1,32 @@
+import os
+import pytest
+import engine
+from conftest import get_facts, TEST_CASES
+
+@pytest.mark.parametrize('file_name', sorted(name for name in os.listdir(TEST_CASES) if name.endswith('.clg')))
+def test_top_down_evaluation_gives_the_facts_of_bottom_up_evaluation(file_name):
+    file_path = os.path.join(TEST_CASES, file_name)
+    top_down = engine.Engine.from_file(file_path, engine = 'topdown').evaluate()
+    bottom_up = engine.Engine.from_file(file_path).evaluate()
+
+    assert get_facts(top_down) == get_facts(bottom_up)
+
+PROGRAM = """
+edge(a, b).
+edge(b, c).
+edge(c, a).
+edge(c, d).
+edge(x, y).
+path(X, Y) :- edge(X, Y).
+path(X, Z) :- path(X, Y), path(Y, Z).
+cycle(X) :- path(X, X).
+"""
+
+@pytest.mark.parametrize('query', ['path(a, X)?', 'path(X, d)?', 'path(d, X)?', 'cycle(X)?', 'path(X, Y), cycle(Y)?', 'path(x, y)?', 'path(X, Y), X < Y?', 'path(a, Y), Y != b?'])
+def test_top_down_queries_give_the_answers_of_bottom_up_evaluation(query):
+    top_down = engine.Engine(PROGRAM, engine = 'topdown')
+    bottom_up = engine.Engine(PROGRAM, magic_sets = False)
+
+    # the tables of the subgoals are kept between the queries of the top-down engine
+    for text in [query, 'path(b, X)?', query]:
+        assert set(top_down.rows(text)) == set(bottom_up.rows(text))
@@ -15,6 +15,10 @@ tokens = ['OPEN_CURLY',    # {
           'THETA',         # >
           'QUESTION_MARK', # ?
           'ANNOTATION',    # @
+          'INPUT',         # .input
+          'STRING',        # "quoted string"
+          'INTEGER',       # 42, -7
+          'FLOAT',         # 2.5, -0.75, 1.5e3
           'UPPER_NAME',    # name starting with uppercase
           'LOWER_NAME'     # name starting with lowercase
           ]
@@ -32,11 +36,29 @@ t_PERIOD = r'\.'
 t_THETA = r'!=|<=|>=|<|>|='
 t_QUESTION_MARK = r'\?'
 t_ANNOTATION = r'\@'
+t_INPUT = r'\.input(?![A-Za-z0-9_])'
+t_STRING = r'\"[^\"\n]*\"'
 t_UPPER_NAME = r'[A-Z][A-Za-z0-9_]*'
 t_LOWER_NAME = r'[a-z0-9_][A-Za-z0-9_]*'
 
 t_ignore = ' \t'
 
+# integer and float literals, also read by the fact reader: an integer has no leading zero, so that names like 07 stay names,
+# a float has a fractional part and an optional exponent, like 1.5e3, and a number followed by a letter, a digit or an underscore is a name like 1st
+INTEGER = r'-?(?:0|[1-9][0-9]*)(?![A-Za-z0-9_])'
+FLOAT = r'-?(?:0|[1-9][0-9]*)\.[0-9]+(?:[eE][-+]?[0-9]+)?(?![A-Za-z0-9_])'
+
+# numbers are matched before names, their tokens holding the int or float they are written for
+@lex.TOKEN(FLOAT)
+def t_FLOAT(token):
+    token.value = float(token.value)
+    return token
+
+@lex.TOKEN(INTEGER)
+def t_INTEGER(token):
+    token.value = int(token.value)
+    return token
+
 def t_comment(token):
     r'[%].*'
 
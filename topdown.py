@@ -0,0 +1,383 @@
+import numpy as np
+import pandas as pd
+from symbols import symbol_table, context_table, empty_data_frame, NONE, SYMBOL_DTYPE
+from elements import is_upper_case
+from plans import compare
+
+class Literal(object):
+
+    def __init__(self, predicate):
+        """
+        predicate of a rule body with each term of its arguments and context either a variable or a constant's symbol id
+        """
+        self.name = predicate.name
+        self.terms = [term if is_upper_case(term) else symbol_table.intern(term) for term in predicate.arguments]
+        self.terms.append(predicate.context if is_upper_case(predicate.context) else context_table.intern(predicate.context))
+
+        # if the context is variable, facts with none context do not match the literal
+        self.context_variable = is_upper_case(predicate.context)
+
+    def get_pattern(self, bindings):
+        """
+        returns the call pattern of the literal for the bindings of the variables:
+        a tuple with the symbol id of each bound term and None for each free term
+        """
+        return tuple(bindings.get(term) if isinstance(term, str) else term for term in self.terms)
+
+    def __repr__(self):
+        return '%r' % (self.__dict__)
+
+class TabledRule(object):
+
+    def __init__(self, rule):
+        """
+        rule compiled for top-down evaluation: the head terms, the body literals and the constraints
+        the order in which the body is resolved is chosen for each set of variables bound by the head
+        """
+        self.head_terms = [term if is_upper_case(term) else symbol_table.intern(term) for term in rule.head.arguments]
+        self.head_terms.append(rule.head.context if is_upper_case(rule.head.context) else context_table.intern(rule.head.context))
+        self.literals = [Literal(predicate) for predicate in rule.body if predicate.type != 'constraint']
+
+        # constraints as tuples of the form (variable, theta operator, variable/constant symbol id)
+        self.constraints = [(predicate.term_x, predicate.theta, predicate.term_y if is_upper_case(predicate.term_y) else symbol_table.intern(predicate.term_y)) for predicate in rule.body if predicate.type == 'constraint']
+
+        self.orders = {}
+
+    def unify_head(self, pattern):
+        """
+        returns the bindings of the head variables to the bound terms of a call pattern, or None if the head does not match it
+        """
+        bindings = {}
+
+        for term, value in zip(self.head_terms, pattern):
+            if value is None:
+                continue
+
+            if not isinstance(term, str):
+                if term != value:
+                    return None
+            elif bindings.setdefault(term, value) != value:
+                return None
+
+        return bindings
+
+    def get_order(self, bound, derived_relations):
+        """
+        returns the steps resolving the body once the variables in bound are bound, each step being a literal or a constraint
+        the literal resolved next is the one with the most bound terms, preferring base relations and then the order of the body
+        a constraint is checked as soon as its variables are bound
+        """
+        key = frozenset(bound)
+
+        if key in self.orders:
+            return self.orders[key]
+
+        bound = set(bound)
+        remaining = list(self.literals)
+        constraints = list(self.constraints)
+        order = []
+
+        while True:
+            for constraint in list(constraints):
+                if constraint[0] in bound and (not isinstance(constraint[2], str) or constraint[2] in bound):
+                    order.append(constraint)
+                    constraints.remove(constraint)
+
+            if not len(remaining):
+                break
+
+            literal = max(remaining, key = lambda literal: (sum(1 for term in literal.terms if term in bound or not isinstance(term, str)), literal.name not in derived_relations, -remaining.index(literal)))
+            remaining.remove(literal)
+            order.append(literal)
+            bound |= set(term for term in literal.terms if isinstance(term, str))
+
+        # constraints whose variables are never bound are left for the end
+        order += constraints
+        self.orders[key] = order
+
+        return order
+
+    def __repr__(self):
+        return '%r' % (self.__dict__)
+
+class TopDownEngine(object):
+
+    def __init__(self, rules, EDB, IDB, CDB):
+        """
+        tabled top-down evaluation: each subgoal, a relation with a call pattern, is resolved against the facts and rules of its relation,
+        and its answers are kept in a table so that calls to the same subgoal reuse them and recursion terminates
+
+        subgoals depending on each other are evaluated again until none of them gets new answers,
+        then they are all complete and their tables are final
+        the subgoals called are solved with an explicit stack instead of recursive calls, so that long chains of subgoals do not overflow the call stack
+        """
+        self.rules = {}
+
+        for rule in rules:
+            self.rules.setdefault(rule.head.name, []).append(TabledRule(rule))
+
+        # facts of EDB and CDB relations, and the facts IDB relations start with, as arrays of symbol ids
+        self.facts = {}
+
+        for DB in [EDB, CDB, IDB]:
+            for relation in DB.keys():
+                self.facts[relation] = DB[relation].values.astype(SYMBOL_DTYPE)
+
+        # hash indexes over the facts keyed by (relation, bound positions), built the first time a call pattern needs them
+        self.indexes = {}
+
+        # tables of answers of the subgoals, as lists and as sets of tuples of symbol ids
+        self.tables = {}
+        self.answer_sets = {}
+        self.complete = set()
+
+        # stack of the incomplete subgoals, with their positions in the stack
+        self.stack = []
+        self.positions = {}
+
+        # count of the subgoals and answers added, telling whether an evaluation of the incomplete subgoals changed anything
+        self.count = 0
+
+    def add_rule(self, rule):
+        """
+        adds a rule to the rules resolved by the engine, such as the rule deriving the answers to a query
+        subgoals of its head relation already in the tables are not evaluated again
+        """
+        self.rules.setdefault(rule.head.name, []).append(TabledRule(rule))
+
+    def query(self, relation, arity):
+        """
+        returns a data frame with all the answers of a relation with the given number of columns, arguments and context
+        """
+        answers = self.solve((relation, (None,) * arity))[0]
+
+        if not len(answers):
+            return empty_data_frame(range(0, arity))
+
+        return pd.DataFrame(np.array(answers, dtype = SYMBOL_DTYPE), index = None)
+
+    def solve(self, subgoal):
+        """
+        returns the table of a subgoal and the lowest stack position of the incomplete subgoals its answers depend on,
+        which is None if the subgoal is complete
+
+        the subgoals are solved by generators yielding the subgoals they call, each new subgoal called getting a generator
+        on top of the stack of generators, and the result of a generator being sent to the generator below it
+        """
+        generators = []
+        result = None
+
+        while True:
+            if subgoal in self.complete:
+                result = (self.tables[subgoal], None)
+            elif subgoal in self.positions:
+                result = (self.tables[subgoal], self.positions[subgoal])
+            else:
+                generators.append(self.solve_subgoal(subgoal))
+                result = None
+
+            if not len(generators):
+                return result
+
+            # resume the generators until one calls a subgoal, or the first one returns the result
+            while True:
+                try:
+                    subgoal = generators[-1].send(result)
+                    break
+                except StopIteration as stop:
+                    generators.pop()
+                    result = stop.value
+
+                    if not len(generators):
+                        return result
+
+    def solve_subgoal(self, subgoal):
+        """
+        generator solving a new subgoal, yielding the subgoals it calls and receiving their results like solve,
+        and returning the result of solve for the subgoal
+        """
+        position = len(self.stack)
+        self.stack.append(subgoal)
+        self.positions[subgoal] = position
+        self.tables[subgoal] = []
+        self.answer_sets[subgoal] = set()
+        self.count += 1
+
+        for row in self.lookup(subgoal[0], subgoal[1]):
+            self.add_answer(subgoal, row)
+
+        while True:
+            count = self.count
+            low = position
+
+            # evaluate the subgoal and every incomplete subgoal called after it, including the ones called during this loop
+            member_position = position
+            while member_position < len(self.stack):
+                member_low = yield from self.evaluate(self.stack[member_position])
+                if member_low is not None:
+                    low = min(low, member_low)
+                member_position += 1
+
+            # the subgoal depends on an incomplete subgoal called before it, which evaluates it again until completion
+            if low < position:
+                return self.tables[subgoal], low
+
+            # nothing changed, the subgoal and the subgoals called after it are complete
+            if count == self.count:
+                for member in self.stack[position : len(self.stack)]:
+                    self.complete.add(member)
+                    self.positions.pop(member)
+
+                del self.stack[position : len(self.stack)]
+
+                return self.tables[subgoal], None
+
+    def evaluate(self, subgoal):
+        """
+        generator resolving a subgoal once with the rules of its relation, adding the answers not already in its table,
+        yielding the subgoals it calls like solve_subgoal
+        returns the lowest stack position of the incomplete subgoals called, or None
+        """
+        relation, pattern = subgoal
+        low = None
+
+        for rule in self.rules.get(relation, []):
+            bindings = rule.unify_head(pattern)
+
+            if bindings is None:
+                continue
+
+            results = [bindings]
+
+            for step in rule.get_order(bindings.keys(), self.rules):
+                if isinstance(step, Literal):
+                    results, step_low = yield from self.resolve_literal(step, results)
+                    if step_low is not None:
+                        low = step_low if low is None else min(low, step_low)
+                else:
+                    results = apply_constraint(results, step)
+
+                if not len(results):
+                    break
+
+            for bindings in results:
+                self.add_answer(subgoal, tuple(bindings[term] if isinstance(term, str) else term for term in rule.head_terms))
+
+        return low
+
+    def resolve_literal(self, literal, results):
+        """
+        generator returning the bindings extending each of the bindings in results with a matching fact or answer of a literal,
+        and the lowest stack position of the incomplete subgoals called, or None, yielding the subgoals it calls like solve_subgoal
+        """
+        extended = []
+        low = None
+
+        for bindings in results:
+            pattern = literal.get_pattern(bindings)
+
+            # facts with none context never match a variable context
+            if literal.context_variable and pattern[-1] == NONE:
+                continue
+
+            if literal.name in self.rules:
+                rows, subgoal_low = yield (literal.name, pattern)
+                if subgoal_low is not None:
+                    low = subgoal_low if low is None else min(low, subgoal_low)
+            else:
+                rows = self.lookup(literal.name, pattern)
+
+            for row in rows:
+                if literal.context_variable and row[-1] == NONE:
+                    continue
+
+                new_bindings = dict(bindings)
+
+                for term, value in zip(literal.terms, row):
+                    if isinstance(term, str) and new_bindings.setdefault(term, value) != value:
+                        break
+                else:
+                    extended.append(new_bindings)
+
+        return extended, low
+
+    def lookup(self, relation, pattern):
+        """
+        returns the facts of a relation matching a call pattern
+        """
+        if relation not in self.facts:
+            return []
+
+        positions = tuple(position for position, value in enumerate(pattern) if value is not None)
+        index_key = (relation, positions)
+
+        if index_key not in self.indexes:
+            self.indexes[index_key] = get_index(self.facts[relation], positions)
+
+        if not len(positions):
+            key = ()
+        elif len(positions) == 1:
+            key = pattern[positions[0]]
+        else:
+            key = tuple(pattern[position] for position in positions)
+
+        rows = self.indexes[index_key].get(key)
+
+        if rows is None:
+            return []
+
+        return [tuple(row) for row in self.facts[relation][rows].tolist()]
+
+    def add_answer(self, subgoal, row):
+        """
+        adds an answer to the table of a subgoal if it is not already there
+        """
+        if row not in self.answer_sets[subgoal]:
+            self.answer_sets[subgoal].add(row)
+            self.tables[subgoal].append(row)
+            self.count += 1
+
+    def __repr__(self):
+        return '%r' % (self.__dict__)
+
+def top_down_evaluation(rules, EDB, IDB, CDB, relations):
+    """
+    returns a dictionary with the data frames of all the facts of the given relations, derived by tabled top-down evaluation
+    only the facts and rules the relations depend on are read
+    """
+    engine = TopDownEngine(rules, EDB, IDB, CDB)
+    results = {}
+
+    for relation in relations:
+        results[relation] = engine.query(relation, len(IDB[relation].columns))
+
+    return results
+
+def get_index(values, positions):
+    """
+    returns a dictionary mapping each key of the given columns of an array of facts to the row positions of the facts with that key,
+    keys of a single column are symbol ids and keys of several columns are tuples of symbol ids
+    """
+    if not len(positions):
+        return {() : np.arange(0, len(values))}
+
+    if len(positions) == 1:
+        return pd.Series(values[:, positions[0]]).groupby(values[:, positions[0]]).indices
+
+    return pd.DataFrame(values[:, list(positions)]).groupby(list(range(0, len(positions)))).indices
+
+def apply_constraint(results, constraint):
+    """
+    returns the bindings in results satisfying a constraint of the form (variable, theta operator, variable/constant symbol id)
+    the comparison is the one of the scans of the bottom-up evaluation
+    """
+    column_x = np.array([bindings[constraint[0]] for bindings in results], dtype = SYMBOL_DTYPE)
+
+    if isinstance(constraint[2], str):
+        column_y = np.array([bindings[constraint[2]] for bindings in results], dtype = SYMBOL_DTYPE)
+    else:
+        column_y = constraint[2]
+
+    mask = compare(column_x, constraint[1], column_y)
+
+    return [bindings for bindings, satisfied in zip(results, mask) if satisfied]